@@ -0,0 +1 @@
+"""Synthetic market data and timing / memory benchmarks for the labs and ticket_selection."""
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from benchmarks.cases import CASES, case_names
+from benchmarks.synthetic import generate_universe, load_manifest
+
+
+def _run_case(name: str, manifest: Dict[str, object], options: Dict[str, object], repeat: int) -> Dict[str, object]:
+    """
+    Body of one benchmark process: setup, one warm-up call, ``repeat``
+    timed calls, then one call under tracemalloc for the peak allocation.
+    """
+    case = CASES[name]
+    sys.path.insert(0, case.source_dir)
+    # ticket_selection/config.py creates its output folder in the cwd
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="bench_") as work:
+        os.chdir(work)
+        try:
+            return _time_case(case, manifest, options, repeat)
+        finally:
+            os.chdir(cwd)
+
+
+def _time_case(case, manifest: Dict[str, object], options: Dict[str, object], repeat: int) -> Dict[str, object]:
+    t0 = time.perf_counter()
+    fn = case.setup(manifest, options)
+    setup_s = time.perf_counter() - t0
+
+    fn()
+    times: List[float] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    out: Dict[str, object] = {
+        "setup_s": setup_s,
+        "repeat": repeat,
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+        "max_s": max(times),
+        "peak_alloc_mb": peak / 1e6,
+    }
+    try:
+        import resource
+
+        rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        out["max_rss_mb"] = rss_kb / (1e6 if sys.platform == "darwin" else 1e3)
+    except ImportError:
+        pass
+    return out
+
+
+def run_benchmarks(
+    manifest: Dict[str, object],
+    cases: Optional[List[str]] = None,
+    repeat: int = 3,
+    options: Optional[Dict[str, object]] = None,
+    verbose: bool = True,
+) -> Dict[str, Dict[str, object]]:
+    """
+    Run each case in a fresh spawned interpreter and collect its timings.
+    A failing case is recorded with an ``error`` field instead of aborting the run.
+    """
+    cases = case_names() if cases is None else cases
+    options = {} if options is None else options
+    ctx = mp.get_context("spawn")
+
+    results: Dict[str, Dict[str, object]] = {}
+    for name in cases:
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            try:
+                res = pool.submit(_run_case, name, manifest, options, repeat).result()
+            except Exception as e:
+                res = {"error": f"{type(e).__name__}: {e}"}
+        results[name] = res
+        if verbose:
+            if "error" in res:
+                print(f"  {name:<36} ERROR {res['error']}")
+            else:
+                print(
+                    f"  {name:<36} median {res['median_s'] * 1e3:9.2f} ms  "
+                    f"min {res['min_s'] * 1e3:9.2f} ms  peak {res['peak_alloc_mb']:8.2f} MB"
+                )
+    return results
+
+
+def _environment() -> Dict[str, str]:
+    import numpy
+    import pandas
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+        "cpu_count": str(os.cpu_count()),
+    }
+
+
+def compare_results(current: Dict[str, object], baseline: Dict[str, object], tolerance: float = 0.2) -> List[str]:
+    """
+    Print median time ratios current / baseline per case and return the
+    names of cases slower than ``1 + tolerance`` times the baseline.
+    """
+    slower = []
+    print(f"\n  {'case':<36} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}")
+    for name, cur in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or "error" in base or "error" in cur:
+            continue
+        ratio = cur["median_s"] / base["median_s"] if base["median_s"] > 0 else float("inf")
+        flag = ""
+        if ratio > 1.0 + tolerance:
+            slower.append(name)
+            flag = "  SLOWER"
+        print(f"  {name:<36} {base['median_s'] * 1e3:12.2f} {cur['median_s'] * 1e3:12.2f} {ratio:7.2f}{flag}")
+    return slower
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Time and memory-profile the main entry points on synthetic data")
+    parser.add_argument("--data_dir", type=str, default=None, help="Reuse a generated universe (default: generate into a temp dir)")
+    parser.add_argument("--symbols", type=int, default=50, help="Number of synthetic symbols")
+    parser.add_argument("--years", type=float, default=5.0, help="Years of daily data")
+    parser.add_argument("--pairs", type=int, default=5, help="Planted cointegrated pairs")
+    parser.add_argument("--nan_frac", type=float, default=0.01, help="Fraction of rows with NaN Close / Volume")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--cases", nargs="+", choices=case_names(), default=None, help="Cases to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed calls per case")
+    parser.add_argument("--coint_symbols", type=int, default=40, help="Symbols in the cointegration cluster")
+    parser.add_argument("--n_particles", type=int, default=500, help="Particles for particle_filter_signal")
+    parser.add_argument("--out", type=str, default=None, help="Output JSON (default: benchmarks/results/bench_<timestamp>.json)")
+    parser.add_argument("--compare", type=str, default=None, help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown vs baseline before failing")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+
+    gen = {
+        "n_symbols": args.symbols,
+        "years": args.years,
+        "n_pairs": args.pairs,
+        "nan_frac": args.nan_frac,
+        "seed": args.seed,
+    }
+    manifest = load_manifest(args.data_dir) if args.data_dir else None
+    if manifest is None:
+        data_dir = args.data_dir or tempfile.mkdtemp(prefix="synthetic_universe_")
+        print(f"Generating {args.symbols} symbols x {args.years:g} years in {data_dir}")
+        manifest = generate_universe(data_dir, **gen)
+    else:
+        print(f"Using universe in {args.data_dir}")
+
+    options = {"coint_symbols": args.coint_symbols, "n_particles": args.n_particles}
+    results = run_benchmarks(manifest, cases=args.cases, repeat=args.repeat, options=options)
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": _environment(),
+        "universe": {k: manifest[k] for k in ("n_symbols", "years", "n_days", "nan_frac", "seed")},
+        "options": {"repeat": args.repeat, **options},
+        "results": results,
+    }
+
+    out = args.out
+    if out is None:
+        out_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+        os.makedirs(out_dir, exist_ok=True)
+        out = os.path.join(out_dir, f"bench_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved results to {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        slower = compare_results(report, baseline, tolerance=args.tolerance)
+        if slower:
+            print(f"\n{len(slower)} case(s) slower than baseline by more than {args.tolerance:.0%}: {', '.join(slower)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+COLUMNS = ["Date", "Close", "High", "Low", "Open", "Volume", "Symbol", "Security Name"]
+
+
+def _symbol_names(n: int) -> List[str]:
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    names = []
+    for i in range(n):
+        a, b, c = i // (26 * 26) % 26, i // 26 % 26, i % 26
+        names.append("S" + letters[a] + letters[b] + letters[c])
+    return names
+
+
+def simulate_log_prices(
+    n_symbols: int,
+    n_days: int,
+    n_pairs: int = 5,
+    seed: int = 0,
+) -> Tuple[np.ndarray, List[Tuple[int, int, float]]]:
+    """
+    Simulate daily log prices (n_days, n_symbols) from a one factor model.
+
+    Each symbol is ``beta_i * market + own random walk``. The first
+    ``2 * n_pairs`` symbols are overwritten by planted cointegrated pairs:
+    ``y = c + h * x + u`` with ``u`` a mean reverting AR(1) spread.
+
+    Returns
+    -------
+    log_prices : np.ndarray
+    pairs : list of (i, j, hedge_ratio)
+        Column indices of the planted pairs.
+    """
+    rng = np.random.default_rng(seed)
+    market = np.cumsum(rng.normal(0.0003, 0.01, n_days))
+    betas = rng.uniform(0.5, 1.5, n_symbols)
+    idio = np.cumsum(rng.normal(0.0, 0.015, (n_days, n_symbols)), axis=0)
+    start = np.log(rng.uniform(5.0, 200.0, n_symbols))
+    log_prices = start + market[:, None] * betas + idio
+
+    n_pairs = min(n_pairs, n_symbols // 2)
+    pairs: List[Tuple[int, int, float]] = []
+    for k in range(n_pairs):
+        i, j = 2 * k, 2 * k + 1
+        hedge = float(rng.uniform(0.5, 1.5))
+        spread = np.zeros(n_days)
+        shocks = rng.normal(0.0, 0.01, n_days)
+        for t in range(1, n_days):
+            spread[t] = 0.95 * spread[t - 1] + shocks[t]
+        log_prices[:, i] = log_prices[0, i] + hedge * (log_prices[:, j] - log_prices[0, j]) + spread
+        pairs.append((i, j, hedge))
+
+    return log_prices, pairs
+
+
+def ohlcv_frame(
+    symbol: str,
+    dates: pd.DatetimeIndex,
+    log_close: np.ndarray,
+    rng: np.random.Generator,
+    nan_frac: float = 0.01,
+) -> pd.DataFrame:
+    """One symbol in the per_symbol layout, with random NaN gaps in Close / Volume."""
+    close = np.exp(log_close)
+    open_ = np.exp(np.concatenate([[log_close[0]], log_close[:-1]]) + rng.normal(0.0, 0.003, len(dates)))
+    wick = np.abs(rng.normal(0.0, 0.005, (2, len(dates))))
+    high = np.maximum(open_, close) * (1.0 + wick[0])
+    low = np.minimum(open_, close) * (1.0 - wick[1])
+    volume = rng.lognormal(11.0, 1.0, len(dates)).round()
+
+    df = pd.DataFrame(
+        {
+            "Date": dates.strftime("%Y-%m-%d"),
+            "Close": close,
+            "High": high,
+            "Low": low,
+            "Open": open_,
+            "Volume": volume,
+            "Symbol": symbol,
+            "Security Name": f"{symbol} Synthetic Corp - Common Stock",
+        },
+        columns=COLUMNS,
+    )
+    if nan_frac > 0:
+        gaps = rng.random(len(df)) < nan_frac
+        df.loc[gaps, ["Close", "Volume"]] = np.nan
+    return df
+
+
+def write_symbol_csv(df: pd.DataFrame, path: str, noise_header: bool = True) -> None:
+    """
+    Write a per_symbol CSV. With ``noise_header`` the second line repeats
+    the ticker under each price column, like the raw yfinance downloads
+    (``,ATLO,ATLO,ATLO,ATLO,ATLO,,``).
+    """
+    symbol = str(df["Symbol"].iloc[0])
+    with open(path, "w", newline="") as f:
+        f.write(",".join(COLUMNS) + "\n")
+        if noise_header:
+            f.write("," + ",".join([symbol] * 5) + ",,\n")
+        df.to_csv(f, header=False, index=False)
+
+
+def generate_universe(
+    out_dir: str,
+    n_symbols: int = 50,
+    years: float = 5.0,
+    n_pairs: int = 5,
+    nan_frac: float = 0.01,
+    noise_header: bool = True,
+    seed: int = 0,
+    start: str = "2015-01-02",
+) -> Dict[str, object]:
+    """
+    Write a synthetic per_symbol universe to ``out_dir`` (one CSV per symbol
+    plus ``manifest.json``) and return the manifest.
+
+    The manifest lists the symbols, file paths and planted cointegrated
+    pairs ``[symbol_y, symbol_x, hedge_ratio]``.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    n_days = int(round(years * 252))
+    dates = pd.bdate_range(start, periods=n_days)
+    symbols = _symbol_names(n_symbols)
+
+    log_prices, pairs = simulate_log_prices(n_symbols, n_days, n_pairs=n_pairs, seed=seed)
+    rng = np.random.default_rng(seed + 1)
+
+    paths = []
+    for k, sym in enumerate(symbols):
+        path = os.path.join(out_dir, f"{sym}.csv")
+        df = ohlcv_frame(sym, dates, log_prices[:, k], rng, nan_frac=nan_frac)
+        write_symbol_csv(df, path, noise_header=noise_header)
+        paths.append(path)
+
+    manifest: Dict[str, object] = {
+        "n_symbols": n_symbols,
+        "years": years,
+        "n_days": n_days,
+        "nan_frac": nan_frac,
+        "noise_header": noise_header,
+        "seed": seed,
+        "symbols": symbols,
+        "paths": paths,
+        "pairs": [[symbols[i], symbols[j], h] for i, j, h in pairs],
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_manifest(data_dir: str) -> Optional[Dict[str, object]]:
+    path = os.path.join(data_dir, "manifest.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate a synthetic per_symbol OHLCV universe")
+    parser.add_argument("out_dir", type=str, help="Output directory")
+    parser.add_argument("--symbols", type=int, default=50, help="Number of symbols")
+    parser.add_argument("--years", type=float, default=5.0, help="Years of daily data (252 days each)")
+    parser.add_argument("--pairs", type=int, default=5, help="Number of planted cointegrated pairs")
+    parser.add_argument("--nan_frac", type=float, default=0.01, help="Fraction of rows with NaN Close / Volume")
+    parser.add_argument("--no_noise_header", action="store_true", help="Do not write the yfinance ticker row")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    m = generate_universe(
+        args.out_dir,
+        n_symbols=args.symbols,
+        years=args.years,
+        n_pairs=args.pairs,
+        nan_frac=args.nan_frac,
+        noise_header=not args.no_noise_header,
+        seed=args.seed,
+    )
+    print(f"Wrote {m['n_symbols']} symbols x {m['n_days']} days to {args.out_dir}")
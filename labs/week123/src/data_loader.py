@@ -1,10 +1,22 @@
 from __future__ import annotations
 
-from typing import Optional
+import os
+import sys
+from typing import List, Optional
+
 import pandas as pd
 
+from pandas.api.types import union_categoricals
+
+# The compact schema lives in <repo>/shared, next to the other labs.
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+
+from shared.compact_schema import CATEGORY_COLS, to_compact  # noqa: E402
 
-def load_price_data(path: str, symbol: Optional[str] = None) -> pd.DataFrame:
+
+def load_price_data(path: str, symbol: Optional[str] = None, compact: bool = False) -> pd.DataFrame:
     """
     Load daily price data from a CSV file.
 
@@ -22,6 +34,7 @@ def load_price_data(path: str, symbol: Optional[str] = None) -> pd.DataFrame:
       - drop rows with invalid dates or missing Close
       - optionally filter by symbol
       - sort by Date and set Date as index
+      - if compact=True, convert to the compact schema (see ``to_compact``)
     """
     df = pd.read_csv(path)
 
@@ -46,4 +59,34 @@ def load_price_data(path: str, symbol: Optional[str] = None) -> pd.DataFrame:
     df = df.sort_values("Date").set_index("Date")
     df.index.name = "Date"
 
+    if compact:
+        df = to_compact(df)
+
     return df
+
+
+def concat_compact(frames: List[pd.DataFrame], **kwargs) -> pd.DataFrame:
+    """
+    ``pd.concat`` that keeps categorical columns categorical.
+
+    Plain concat falls back to object dtype when the frames' categories
+    differ (one symbol per file), so the categories are unioned first.
+    """
+    frames = [f for f in frames if f is not None]
+    if not frames:
+        return pd.DataFrame()
+    frames = [f.copy(deep=False) for f in frames]
+    for col in CATEGORY_COLS:
+        cats = [f[col] for f in frames if col in f.columns and isinstance(f[col].dtype, pd.CategoricalDtype)]
+        if len(cats) < 2:
+            continue
+        categories = union_categoricals(cats).categories
+        for f in frames:
+            if col in f.columns:
+                f[col] = f[col].astype(pd.CategoricalDtype(categories))
+    return pd.concat(frames, **kwargs)
+
+
+def memory_usage_mb(df: pd.DataFrame) -> float:
+    """Deep in-memory size of a DataFrame in MB (index included)."""
+    return float(df.memory_usage(deep=True, index=True).sum()) / 1e6
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import json
+import time
+from typing import Any, Callable, Dict, IO, List, Optional
+
+import numpy as np
+
+
+class Histogram:
+    """
+    Keep raw observations of one quantity (latency, bytes, ...) and
+    summarise them on demand.
+
+    A full universe download is a few thousand symbols, so storing the
+    raw values is cheap and gives exact percentiles.
+    """
+
+    def __init__(self) -> None:
+        self._values: List[float] = []
+
+    def observe(self, value: float) -> None:
+        self._values.append(float(value))
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def summary(self) -> Dict[str, float]:
+        if not self._values:
+            return {"count": 0, "sum": 0.0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+        arr = np.asarray(self._values, dtype=float)
+        return {
+            "count": int(arr.size),
+            "sum": float(arr.sum()),
+            "mean": float(arr.mean()),
+            "p50": float(np.percentile(arr, 50)),
+            "p95": float(np.percentile(arr, 95)),
+            "max": float(arr.max()),
+        }
+
+
+class DownloadMetrics:
+    """
+    Counters, histograms and a JSONL event log for the download pipeline.
+
+    Parameters
+    ----------
+    events_path : str, optional
+        Path of the JSON Lines event log. One JSON object is written per
+        event, through a buffered file handle. If None, events are only
+        counted, not written.
+    report_every : float
+        Minimum number of seconds between two throughput summaries
+        emitted by ``maybe_report``. Set 0 to disable periodic reports.
+    buffer_size : int
+        Buffer size in bytes for the event log file.
+    """
+
+    def __init__(
+        self,
+        events_path: Optional[str] = None,
+        report_every: float = 30.0,
+        buffer_size: int = 1 << 16,
+    ) -> None:
+        self.counters: Dict[str, int] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self.report_every = float(report_every)
+
+        self._t0 = time.monotonic()
+        self._last_report = self._t0
+        self._last_requests = 0
+        self._fh: Optional[IO[str]] = None
+        if events_path:
+            self._fh = open(events_path, "a", encoding="utf-8", buffering=buffer_size)
+
+    # ---------- recording ----------
+
+    def incr(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + int(n)
+
+    def observe(self, name: str, value: float) -> None:
+        hist = self.histograms.get(name)
+        if hist is None:
+            hist = self.histograms[name] = Histogram()
+        hist.observe(value)
+
+    def event(self, kind: str, **fields: Any) -> None:
+        """Append one event to the JSONL log (no-op if no log is open)."""
+        if self._fh is None:
+            return
+        record = {"ts": round(time.time(), 3), "event": kind}
+        record.update(fields)
+        self._fh.write(json.dumps(record, default=str) + "\n")
+
+    # ---------- reporting ----------
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self._t0
+
+    def throughput(self) -> Dict[str, float]:
+        """Overall rates since the metrics object was created."""
+        elapsed = max(self.elapsed(), 1e-9)
+        requests = self.counters.get("requests", 0)
+        return {
+            "elapsed_sec": float(elapsed),
+            "requests_per_sec": requests / elapsed,
+            "symbols_per_sec": self.counters.get("symbols", 0) / elapsed,
+            "bytes_per_sec": self.counters.get("bytes_written", 0) / elapsed,
+        }
+
+    def maybe_report(self, log: Callable[[str], None], force: bool = False) -> bool:
+        """
+        Emit a throughput summary through ``log`` and as a ``progress`` event
+        if at least ``report_every`` seconds passed since the last one.
+        Returns True if a report was emitted.
+        """
+        now = time.monotonic()
+        window = now - self._last_report
+        if not force and (self.report_every <= 0 or window < self.report_every):
+            return False
+
+        requests = self.counters.get("requests", 0)
+        window_rps = (requests - self._last_requests) / max(window, 1e-9)
+        self._last_report = now
+        self._last_requests = requests
+
+        rates = self.throughput()
+        lat = self.histograms.get("download_latency_sec", Histogram()).summary()
+        log(
+            f"Progress: symbols={self.counters.get('symbols', 0)} "
+            f"ok={self.counters.get('status_ok', 0)} "
+            f"retries={self.counters.get('retries', 0)} "
+            f"req/s={window_rps:.2f} (avg {rates['requests_per_sec']:.2f}) "
+            f"p50={lat['p50']:.2f}s p95={lat['p95']:.2f}s "
+            f"MB={self.counters.get('bytes_written', 0) / 1e6:.1f}"
+        )
+        self.event("progress", window_requests_per_sec=window_rps, counters=dict(self.counters), **rates)
+        return True
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "counters": dict(self.counters),
+            "histograms": {k: h.summary() for k, h in self.histograms.items()},
+            **self.throughput(),
+        }
+
+    def close(self) -> None:
+        """Write a final ``summary`` event and flush the event log."""
+        if self._fh is None:
+            return
+        self.event("summary", **self.summary())
+        self._fh.close()
+        self._fh = None
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from fundamentals import FundamentalsStore
+
+
+# Line items needed by the value / quality scores below, per SimFin dataset.
+FACTOR_ITEMS = {
+    "income": ["Net Income", "Revenue"],
+    "balance": ["Total Equity", "Total Assets", "Total Liabilities", "Shares (Basic)"],
+}
+
+FUNDAMENTAL_SCORES = ["book_to_market", "earnings_yield", "roe", "low_leverage"]
+
+
+def asof_panels(
+    statements: pd.DataFrame,
+    dates: Iterable,
+    tickers: Iterable[str],
+    items: List[str],
+    lag_days: int = 1,
+    max_age_days: Optional[int] = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Point-in-time join of statement line items onto a Date x Symbol calendar.
+
+    A statement becomes visible ``lag_days`` after its Publish Date (not its
+    fiscal period end) and stays the current value of its ticker until a
+    later statement is published. All tickers are aligned in one pass:
+
+      1. sort statements by (ticker, publish date) and give each its rank
+      2. ``searchsorted`` every availability date into the calendar
+      3. scatter the ranks into a (T, N) matrix and forward fill it with a
+         running maximum, so each cell holds the latest statement known at
+         that date
+      4. gather every line item through that index matrix
+
+    Parameters
+    ----------
+    statements : pd.DataFrame
+        Rows with Ticker, Publish Date and the ``items`` columns (Ticker may
+        be an index level, as in ``FundamentalsStore.load``).
+    dates : iterable of dates
+        Sorted calendar of the price panel.
+    tickers : iterable of str
+        Columns of the output panels.
+    items : list of str
+        Line items to emit.
+    lag_days : int
+        Calendar days between publication and first use.
+    max_age_days : int, optional
+        Blank out values older than this many days (stale statements).
+
+    Returns
+    -------
+    panels : dict
+        ``{item: Date x Symbol DataFrame}`` aligned with ``dates`` / ``tickers``.
+    """
+    index = pd.DatetimeIndex(dates)
+    columns = pd.Index(list(tickers))
+    T, N = len(index), len(columns)
+
+    st = statements.reset_index() if "Ticker" not in statements.columns else statements
+    codes = pd.Categorical(st["Ticker"], categories=columns).codes.astype(np.int64)
+    avail = (st["Publish Date"] + pd.Timedelta(days=lag_days)).to_numpy(dtype="datetime64[ns]")
+    keep = (codes >= 0) & ~np.isnat(avail)
+
+    codes = codes[keep]
+    avail = avail[keep]
+    order = np.lexsort((avail, codes))
+    codes = codes[order]
+    avail = avail[order]
+    rank = np.arange(len(order))
+
+    cal = index.to_numpy(dtype="datetime64[ns]")
+    pos = np.searchsorted(cal, avail, side="left")
+    inside = pos < T
+
+    latest = np.full((T, N), -1, dtype=np.int64)
+    np.maximum.at(latest, (pos[inside], codes[inside]), rank[inside])
+    np.maximum.accumulate(latest, axis=0, out=latest)
+
+    found = latest >= 0
+    if max_age_days is not None:
+        age = cal[:, None] - avail[np.maximum(latest, 0)]
+        found &= age <= np.timedelta64(max_age_days, "D")
+    take = np.maximum(latest, 0)
+
+    panels: Dict[str, pd.DataFrame] = {}
+    for item in items:
+        values = st[item].to_numpy(dtype=float)[keep][order]
+        if values.size == 0:
+            arr = np.full((T, N), np.nan)
+        else:
+            arr = np.where(found, values[take], np.nan)
+        panels[item] = pd.DataFrame(arr, index=index, columns=columns)
+    return panels
+
+
+def fundamental_panels(
+    prices: pd.DataFrame,
+    items: Optional[Dict[str, List[str]]] = None,
+    store: Optional[FundamentalsStore] = None,
+    lag_days: int = 1,
+    max_age_days: Optional[int] = 550,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Fundamental line items as panels aligned with a Date x Symbol price panel.
+
+    Parameters
+    ----------
+    prices : pd.DataFrame
+        Price panel (daily or month end) whose index / columns define the output.
+    items : dict, optional
+        ``{dataset: [line items]}`` (default ``FACTOR_ITEMS``).
+    store : FundamentalsStore, optional
+        Loader to use (default: a new store on ``data/simfin``).
+    lag_days, max_age_days
+        See ``asof_panels``. The default age limit drops annual statements
+        that were not followed by a newer one within about 18 months.
+    """
+    items = FACTOR_ITEMS if items is None else items
+    store = FundamentalsStore() if store is None else store
+
+    panels: Dict[str, pd.DataFrame] = {}
+    for dataset, cols in items.items():
+        statements = store.load(dataset, cols)
+        panels.update(
+            asof_panels(
+                statements,
+                prices.index,
+                prices.columns,
+                cols,
+                lag_days=lag_days,
+                max_age_days=max_age_days,
+            )
+        )
+    return panels
+
+
+def fundamental_scores(
+    prices: pd.DataFrame,
+    panels: Dict[str, pd.DataFrame],
+) -> Dict[str, pd.DataFrame]:
+    """
+    Value / quality scores (higher is better) for ``build_long_short_weights``.
+
+      - book_to_market = Total Equity / (price * shares)
+      - earnings_yield = Net Income / (price * shares)
+      - roe            = Net Income / Total Equity (positive equity only)
+      - low_leverage   = -Total Liabilities / Total Assets
+
+    ``panels`` must contain the ``FACTOR_ITEMS`` line items aligned with
+    ``prices`` (see ``fundamental_panels``).
+    """
+    market_cap = prices * panels["Shares (Basic)"]
+    market_cap = market_cap.where(market_cap > 0)
+    equity = panels["Total Equity"]
+    assets = panels["Total Assets"].where(panels["Total Assets"] > 0)
+
+    return {
+        "book_to_market": equity / market_cap,
+        "earnings_yield": panels["Net Income"] / market_cap,
+        "roe": panels["Net Income"] / equity.where(equity > 0),
+        "low_leverage": -panels["Total Liabilities"] / assets,
+    }
@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import zipfile
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+SIMFIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "simfin")
+
+DATASETS = {
+    "income": "us-income-annual.zip",
+    "balance": "us-balance-annual.zip",
+    "cashflow": "us-cashflow-annual.zip",
+    "companies": "us-companies.zip",
+}
+
+DATE_COLS = ["Report Date", "Publish Date", "Restated Date"]
+
+# Non line-item columns and their dtypes; every other column is a float64 line item.
+META_DTYPES = {
+    "Ticker": "str",
+    "SimFinId": "int64",
+    "Currency": "category",
+    "Fiscal Year": "int16",
+    "Fiscal Period": "category",
+    "Company Name": "str",
+    "IndustryId": "Int64",
+    "ISIN": "str",
+    "Business Summary": "str",
+    "Market": "category",
+    "CIK": "Int64",
+    "Main Currency": "category",
+}
+
+STATEMENT_KEYS = ["Ticker", "SimFinId", "Fiscal Year", "Report Date", "Publish Date"]
+
+
+def _zip_member(path: str) -> Tuple[zipfile.ZipFile, str]:
+    zf = zipfile.ZipFile(path)
+    members = [n for n in zf.namelist() if n.endswith(".csv")]
+    if not members:
+        zf.close()
+        raise ValueError(f"No CSV file inside {path}")
+    return zf, members[0]
+
+
+def read_simfin_header(path: str, sep: str = ";") -> List[str]:
+    """Column names of the CSV inside a SimFin bulk zip (reads one line)."""
+    zf, member = _zip_member(path)
+    with zf, zf.open(member) as fh:
+        return fh.readline().decode("utf-8").strip().split(sep)
+
+
+def read_simfin_zip(
+    path: str,
+    columns: Optional[Sequence[str]] = None,
+    sep: str = ";",
+) -> pd.DataFrame:
+    """
+    Stream a semicolon separated SimFin bulk CSV straight out of its zip.
+
+    Parameters
+    ----------
+    path : str
+        Path of the zip archive (one CSV member).
+    columns : sequence of str, optional
+        Line items to keep. The key columns (ticker, fiscal year, report /
+        publish dates) that exist in the file are always read. None reads
+        every column.
+
+    Returns
+    -------
+    df : pd.DataFrame
+        Fixed dtypes: line items float64, dates datetime64, ids int,
+        currency / period categorical. Rows without a ticker are dropped.
+    """
+    header = read_simfin_header(path, sep=sep)
+    if columns is None:
+        usecols = header
+    else:
+        missing = [c for c in columns if c not in header]
+        if missing:
+            raise KeyError(f"Columns not found in {os.path.basename(path)}: {missing}")
+        keys = [c for c in STATEMENT_KEYS if c in header and c not in columns]
+        usecols = [c for c in header if c in keys or c in columns]
+
+    dtype = {c: META_DTYPES.get(c, "float64") for c in usecols if c not in DATE_COLS}
+    dates = [c for c in usecols if c in DATE_COLS]
+
+    zf, member = _zip_member(path)
+    with zf, zf.open(member) as fh:
+        df = pd.read_csv(fh, sep=sep, usecols=usecols, dtype=dtype, parse_dates=dates)
+
+    return df.dropna(subset=["Ticker"]).reset_index(drop=True)
+
+
+class FundamentalsStore:
+    """
+    SimFin annual fundamentals indexed by (Ticker, Fiscal Year), with a
+    persistent cache.
+
+    Each dataset (income, balance, cashflow, companies) is parsed from its
+    zip once per column selection and pickled under ``cache_dir``; the cache
+    entry is keyed by the requested columns and invalidated when the zip's
+    size or mtime changes. Loaded frames are also kept in memory.
+
+    Statement rows are sorted by (Ticker, Publish Date), so all rows of one
+    ticker are a contiguous block located through a precomputed
+    ticker -> (start, stop) table, and "latest statement published on or
+    before a date" is a searchsorted inside that block.
+
+    Parameters
+    ----------
+    data_dir : str
+        Directory holding the SimFin zips (default ``data/simfin``).
+    cache_dir : str, optional
+        Cache directory (default ``<data_dir>/cache``).
+    use_cache : bool
+        Read and write the on-disk cache.
+    """
+
+    def __init__(
+        self,
+        data_dir: str = SIMFIN_DIR,
+        cache_dir: Optional[str] = None,
+        use_cache: bool = True,
+    ) -> None:
+        self.data_dir = data_dir
+        self.cache_dir = cache_dir if cache_dir is not None else os.path.join(data_dir, "cache")
+        self.use_cache = use_cache
+        self._frames: Dict[Tuple[str, Optional[Tuple[str, ...]]], pd.DataFrame] = {}
+        self._offsets: Dict[int, Dict[str, Tuple[int, int]]] = {}
+
+    # ---------- loading ----------
+
+    def _zip_path(self, dataset: str) -> str:
+        if dataset not in DATASETS:
+            raise KeyError(f"Unknown dataset '{dataset}', expected one of {list(DATASETS)}")
+        return os.path.join(self.data_dir, DATASETS[dataset])
+
+    def _cache_path(self, dataset: str, columns: Optional[Tuple[str, ...]]) -> str:
+        tag = "all" if columns is None else "|".join(columns)
+        digest = hashlib.md5(tag.encode("utf-8")).hexdigest()[:12]
+        return os.path.join(self.cache_dir, f"{dataset}_{digest}.pkl")
+
+    @staticmethod
+    def _signature(path: str) -> Tuple[int, int]:
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+
+    def _read_cache(self, cache_path: str, signature: Tuple[int, int]) -> Optional[pd.DataFrame]:
+        if not (self.use_cache and os.path.exists(cache_path)):
+            return None
+        try:
+            with open(cache_path, "rb") as f:
+                entry = pickle.load(f)
+        except Exception:
+            return None
+        if entry.get("signature") != signature:
+            return None
+        return entry["frame"]
+
+    def _write_cache(self, cache_path: str, signature: Tuple[int, int], df: pd.DataFrame) -> None:
+        if not self.use_cache:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = cache_path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump({"signature": signature, "frame": df}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache_path)
+
+    def load(self, dataset: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Load one dataset.
+
+        Statements are indexed by (Ticker, Fiscal Year) and keep the
+        SimFinId / Report Date / Publish Date columns next to the requested
+        line items; companies are indexed by Ticker.
+        """
+        key_cols = None if columns is None else tuple(columns)
+        key = (dataset, key_cols)
+        if key in self._frames:
+            return self._frames[key]
+
+        path = self._zip_path(dataset)
+        signature = self._signature(path)
+        cache_path = self._cache_path(dataset, key_cols)
+
+        df = self._read_cache(cache_path, signature)
+        if df is None:
+            df = read_simfin_zip(path, columns=columns)
+            if dataset == "companies":
+                df = df.drop_duplicates("Ticker").set_index("Ticker")
+            else:
+                df = df.sort_values(["Ticker", "Publish Date", "Fiscal Year"], kind="stable")
+                df = df.set_index(["Ticker", "Fiscal Year"])
+            self._write_cache(cache_path, signature, df)
+
+        self._frames[key] = df
+        return df
+
+    def companies(self, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Company table indexed by Ticker."""
+        return self.load("companies", columns)
+
+    # ---------- lookups ----------
+
+    def _ticker_offsets(self, df: pd.DataFrame) -> Dict[str, Tuple[int, int]]:
+        table = self._offsets.get(id(df))
+        if table is None:
+            tickers = df.index.get_level_values("Ticker").to_numpy()
+            uniq, start = np.unique(tickers, return_index=True)
+            stop = np.append(start[1:], len(tickers))
+            order = np.argsort(start)
+            table = {
+                str(uniq[i]): (int(start[i]), int(stop[i]))
+                for i in order
+            }
+            self._offsets[id(df)] = table
+        return table
+
+    def ticker(self, ticker: str, dataset: str = "income", columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """All annual statements of one ticker, ordered by publish date."""
+        df = self.load(dataset, columns)
+        start, stop = self._ticker_offsets(df).get(ticker, (0, 0))
+        return df.iloc[start:stop]
+
+    def asof(
+        self,
+        ticker: str,
+        date,
+        dataset: str = "income",
+        columns: Optional[Sequence[str]] = None,
+    ) -> Optional[pd.Series]:
+        """
+        Latest statement of ``ticker`` whose Publish Date is on or before
+        ``date`` (what was known at that date), or None.
+        """
+        rows = self.ticker(ticker, dataset, columns)
+        if rows.empty:
+            return None
+        published = rows["Publish Date"].to_numpy()
+        pos = np.searchsorted(published, np.datetime64(pd.Timestamp(date)), side="right") - 1
+        if pos < 0:
+            return None
+        return rows.iloc[pos]
+
+    def tickers(self, dataset: str = "income") -> List[str]:
+        """Tickers present in a statement dataset."""
+        return list(self._ticker_offsets(self.load(dataset)))
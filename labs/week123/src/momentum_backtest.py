@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 import numpy as np
 import pandas as pd
@@ -28,6 +28,7 @@ def backtest_cross_sectional_momentum(
     n_short: int = 20,
     long_capital: float = 0.5,
     short_capital: float = 0.5,
+    scores: Optional[pd.DataFrame] = None,
 ) -> MomentumBacktestResult:
     """
     Cross sectional momentum backtest on monthly data.
@@ -54,17 +55,24 @@ def backtest_cross_sectional_momentum(
         Capital allocated to long leg (sum of positive weights).
     short_capital : float
         Capital allocated to short leg (absolute sum of negative weights).
+    scores : pd.DataFrame, optional
+        Date x Symbol ranking scores to use instead of momentum (for example
+        point-in-time value / quality scores from ``fundamental_factors``),
+        aligned with ``log_returns``. Higher scores go long.
 
     Returns
     -------
     MomentumBacktestResult
     """
-    # 1. Momentum scores
-    scores = compute_momentum_scores(
-        log_returns,
-        lookback_months=lookback_months,
-        skip_recent_months=skip_recent_months,
-    )
+    # 1. Momentum scores (unless ranking scores are given)
+    if scores is None:
+        scores = compute_momentum_scores(
+            log_returns,
+            lookback_months=lookback_months,
+            skip_recent_months=skip_recent_months,
+        )
+    else:
+        scores = scores.reindex(index=log_returns.index, columns=log_returns.columns)
 
     # 2. Raw weights at each date, to be used for next period
     raw_weights = build_long_short_weights(
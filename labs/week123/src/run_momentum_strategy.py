@@ -5,6 +5,7 @@ import os
 
 from momentum_data import load_price_panel_from_files, to_monthly_prices, monthly_log_returns
 from momentum_backtest import backtest_cross_sectional_momentum
+from fundamental_factors import FUNDAMENTAL_SCORES, fundamental_panels, fundamental_scores
 
 
 def run_momentum_example(
@@ -15,6 +16,7 @@ def run_momentum_example(
     n_short: int = 10,
     long_capital: float = 0.5,
     short_capital: float = 0.5,
+    score: str = "momentum",
 ) -> None:
 
     # 1. Load daily prices
@@ -26,7 +28,13 @@ def run_momentum_example(
     # 3. Log returns
     log_ret = monthly_log_returns(monthly_prices)
 
-    # 4. Backtest momentum
+    # 4. Optional point-in-time fundamental scores on the month end calendar
+    scores = None
+    if score != "momentum":
+        panels = fundamental_panels(monthly_prices)
+        scores = fundamental_scores(monthly_prices, panels)[score]
+
+    # 5. Backtest
     result = backtest_cross_sectional_momentum(
         log_returns=log_ret,
         lookback_months=lookback_months,
@@ -35,9 +43,10 @@ def run_momentum_example(
         n_short=n_short,
         long_capital=long_capital,
         short_capital=short_capital,
+        scores=scores,
     )
 
-    print("Momentum backtest summary:")
+    print(f"Backtest summary ({score} scores):")
     for k, v in result.summary.items():
         if isinstance(v, float):
             print(f"  {k}: {v:.4f}")
@@ -65,6 +74,13 @@ def parse_args():
     parser.add_argument("--n_short", type=int, default=10, help="Number of short positions")
     parser.add_argument("--long_capital", type=float, default=0.5, help="Fraction of capital allocated to long side")
     parser.add_argument("--short_capital", type=float, default=0.5, help="Fraction of capital allocated to short side")
+    parser.add_argument(
+        "--score",
+        type=str,
+        choices=["momentum"] + FUNDAMENTAL_SCORES,
+        default="momentum",
+        help="Ranking score: momentum, or a point-in-time SimFin value / quality score",
+    )
 
     return parser.parse_args()
 
@@ -79,4 +95,5 @@ if __name__ == "__main__":
         n_short=args.n_short,
         long_capital=args.long_capital,
         short_capital=args.short_capital,
+        score=args.score,
     )
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
 
 from indicators import bollinger_bands
@@ -52,3 +53,72 @@ def bollinger_reversion_signals(
     out["signal"] = signal
 
     return out
+
+
+def _pack_columns(values: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Move the non-missing values of every column to the top, keeping their
+    order, and pad the rest with NaN. Rolling windows and shifts on the
+    packed matrix then only see each column's own observations.
+
+    Returns (packed, valid, rows) where ``valid`` marks the original
+    non-missing cells and ``rows`` the filled cells of ``packed``.
+    """
+    valid = ~np.isnan(values)
+    lengths = valid.sum(axis=0)
+    rows = np.arange(values.shape[0])[:, None] < lengths[None, :]
+    packed = np.full(values.shape, np.nan)
+    packed.T[rows.T] = values.T[valid.T]
+    return packed, valid, rows
+
+
+def bollinger_reversion_signals_panel(
+    prices: pd.DataFrame,
+    window: int = 20,
+    num_std: float = 2.0,
+    min_periods: int | None = None,
+) -> pd.DataFrame:
+    """
+    Bollinger reversion signals for a whole Date x Symbol price panel.
+
+    Applies the rules of ``bollinger_reversion_signals`` to every column in
+    one vectorised pass. Each symbol only uses the dates on which it has a
+    price, so the result matches running the single-symbol function on each
+    symbol's non-missing rows.
+
+    Parameters
+    ----------
+    prices : pd.DataFrame
+        Wide price panel (Date index, one column per symbol).
+    window, num_std, min_periods
+        Bollinger Band parameters, as in ``indicators.bollinger_bands``.
+
+    Returns
+    -------
+    signals : pd.DataFrame
+        int8 panel with the same shape as ``prices``: +1 buy, -1 sell,
+        0 otherwise (including dates without a price).
+    """
+    if min_periods is None:
+        min_periods = window
+
+    packed, valid, rows = _pack_columns(prices.to_numpy(dtype=float))
+
+    roll = pd.DataFrame(packed).rolling(window=window, min_periods=min_periods)
+    sma = roll.mean().to_numpy()
+    sigma = roll.std(ddof=1).to_numpy()
+    upper = sma + num_std * sigma
+    lower = sma - num_std * sigma
+
+    price, prev = packed[1:], packed[:-1]
+    inside_today = (price >= lower[1:]) & (price <= upper[1:])
+    buy = (prev < lower[:-1]) & inside_today & (price > prev)
+    sell = (prev > upper[:-1]) & inside_today & (price < prev)
+
+    sig = np.zeros(packed.shape, dtype=np.int8)
+    sig[1:][buy] = 1
+    sig[1:][sell] = -1
+
+    out = np.zeros(packed.shape, dtype=np.int8)
+    out.T[valid.T] = sig.T[rows.T]
+    return pd.DataFrame(out, index=prices.index, columns=prices.columns)
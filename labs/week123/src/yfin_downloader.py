@@ -13,6 +13,8 @@ except Exception:
     print("Please install dependencies: pip install yfinance pandas", file=sys.stderr)
     raise
 
+from download_metrics import DownloadMetrics
+
 
 def read_symbols(csv_path: str) -> pd.DataFrame:
     df = pd.read_csv(csv_path)
@@ -51,12 +53,14 @@ def safe_download_one(symbol: str,
                                  auto_adjust=auto_adjust, threads=False, progress=False)
             if not df.empty:
                 df = df.reset_index()
+            df.attrs["attempts"] = i
             return df
         except Exception as e:
             last_err = e
             time.sleep(pause * i)
     empty = pd.DataFrame()
     empty.attrs["error"] = str(last_err) if last_err else "unknown error"
+    empty.attrs["attempts"] = max_retries
     return empty
 
 
@@ -132,6 +136,10 @@ def main():
     ap.add_argument("--limit", type=int, default=None, help="Only process first N symbols (debug)")
     ap.add_argument("--logfile", default=None, help="Write logs to this file to reduce notebook stdout")
     ap.add_argument("--sleep", type=float, default=0.5, help="Sleep seconds between symbols to be polite")
+    ap.add_argument("--events", default=None,
+                    help="JSONL event log path (default: <outdir>/download_events.jsonl). Use 'off' to disable")
+    ap.add_argument("--report-every", type=float, default=30.0,
+                    help="Seconds between throughput summaries in the log. Set 0 to disable")
 
     # new filter options
     ap.add_argument("--filter", choices=["off", "pre", "post"], default="post",
@@ -141,12 +149,14 @@ def main():
                     help="Minimum daily rows to accept in post filter. Set 0 to disable row floor")
     args = ap.parse_args()
 
+    # keep one buffered handle open for the whole run instead of reopening per line
+    log_fh = open(args.logfile, "a", encoding="utf-8", buffering=1 << 16) if args.logfile else None
+
     def log(msg: str):
         ts = time.strftime("%H:%M:%S")
         line = f"[{ts}] {msg}"
-        if args.logfile:
-            with open(args.logfile, "a", encoding="utf-8") as f:
-                f.write(line + "\n")
+        if log_fh is not None:
+            log_fh.write(line + "\n")
         else:
             print(line, flush=True)
 
@@ -160,7 +170,27 @@ def main():
 
     combined_path = os.path.join(outdir, "combined_daily.csv")
     log_csv = os.path.join(outdir, "download_log.csv")
+    events_path = args.events or os.path.join(outdir, "download_events.jsonl")
+
+    metrics = DownloadMetrics(
+        events_path=None if events_path == "off" else events_path,
+        report_every=args.report_every,
+    )
+    metrics.event("start", input=args.input, n_symbols=len(df_syms), filter=args.filter,
+                  period=None if args.start else args.period, start=args.start, end=args.end)
 
+    try:
+        processed = _download_all(args, df_syms, perdir, combined_path, log_csv, metrics, log)
+    finally:
+        metrics.maybe_report(log, force=True)
+        metrics.close()
+        if log_fh is not None:
+            log_fh.close()
+
+    print(f"Done. Processed={processed}. Outputs: {combined_path}, {perdir}, {log_csv}")
+
+
+def _download_all(args, df_syms, perdir, combined_path, log_csv, metrics, log) -> int:
     logs = []
     processed = 0
     header_written = os.path.exists(combined_path) and os.path.getsize(combined_path) > 0
@@ -174,22 +204,36 @@ def main():
 
         if args.resume and not args.force and os.path.exists(per_csv) and os.path.getsize(per_csv) > 0:
             log(f"Skip existing {sym}")
+            metrics.incr("status_skipped")
+            metrics.event("symbol", symbol=sym, status="skipped")
             processed += 1
             continue
 
+        metrics.incr("symbols")
+        t_symbol = time.monotonic()
+
         # optional pre filter
         if args.filter == "pre" and not args.start:
+            t0 = time.monotonic()
             ok, reason = has_enough_history_pre(sym, args.min_years)
+            probe_sec = time.monotonic() - t0
+            metrics.incr("requests")
+            metrics.observe("probe_latency_sec", probe_sec)
             if not ok:
                 log(f"Pre filter drop {sym}: {reason}")
                 logs.append({"Symbol": sym, "Security Name": name, "status": "short_history_pre", "message": reason})
+                metrics.incr("status_short_history_pre")
+                metrics.event("symbol", symbol=sym, status="short_history_pre", message=reason,
+                              probe_sec=probe_sec, total_sec=time.monotonic() - t_symbol)
                 processed += 1
+                metrics.maybe_report(log)
                 time.sleep(max(0.0, args.sleep))
                 continue
             else:
                 log(f"Pre filter pass {sym}: {reason}")
 
         log(f"Downloading {sym} ({idx+1}/{len(df_syms)})")
+        t0 = time.monotonic()
         df = safe_download_one(
             symbol=sym,
             period=None if args.start else args.period,
@@ -200,10 +244,16 @@ def main():
             max_retries=3,
             pause=1.0
         )
+        download_sec = time.monotonic() - t0
+        attempts = int(df.attrs.get("attempts", 1))
+        metrics.incr("requests", attempts)
+        metrics.incr("retries", attempts - 1)
+        metrics.observe("download_latency_sec", download_sec)
 
         status = "ok"
         msg = ""
         wrote = False
+        n_bytes = 0
         if df.empty:
             status = "empty"
             msg = df.attrs.get("error", "")
@@ -233,18 +283,29 @@ def main():
                 # write per symbol
                 df.to_csv(per_csv, index=False)
                 wrote = True
+                n_bytes = os.path.getsize(per_csv)
 
                 # append to combined
                 mode = "a" if header_written else "w"
                 df.to_csv(combined_path, index=False, mode=mode, header=not header_written)
                 header_written = True
 
+        metrics.incr(f"status_{status}")
+        metrics.incr("rows", len(df))
+        metrics.incr("bytes_written", n_bytes)
+        if wrote:
+            metrics.observe("bytes_per_symbol", n_bytes)
+        metrics.event("symbol", symbol=sym, status=status, message=msg, attempts=attempts,
+                      download_sec=download_sec, rows=len(df), bytes=n_bytes,
+                      total_sec=time.monotonic() - t_symbol)
+
         logs.append({"Symbol": sym, "Security Name": name, "status": status, "message": msg})
         processed += 1
+        metrics.maybe_report(log)
         time.sleep(max(0.0, args.sleep))
 
     pd.DataFrame(logs).to_csv(log_csv, index=False)
-    print(f"Done. Processed={processed}. Outputs: {combined_path}, {perdir}, {log_csv}")
+    return processed
 
 
 if __name__ == "__main__":
@@ -1,11 +1,12 @@
 # backtest.py
 
-from typing import Dict
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Union
 import os
 
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 
 
 def backtest_from_positions(
@@ -33,11 +34,81 @@ def backtest_from_positions(
     df["fee"] = df["trade"] * fee_per_unit
 
     df["strategy_ret_net"] = df["strategy_ret"] - df["fee"]
-    df["equity_curve"] = df["strategy_ret_net"].cumsum().apply(np.exp)
+    df["equity_curve"] = np.exp(df["strategy_ret_net"].cumsum())
 
     return df
 
 
+@dataclass
+class MultiBacktest:
+    """
+    Kết quả backtest nhiều strategy trên cùng một chuỗi return.
+    Mọi mảng có shape (T, S), cột thứ j ứng với names[j].
+    """
+    index: pd.Index
+    names: List[str]
+    position_shifted: np.ndarray
+    fee: np.ndarray
+    strategy_ret_net: np.ndarray
+    equity_curve: np.ndarray
+
+    def equity_curves(self) -> Dict[str, pd.Series]:
+        """{tên strategy: equity curve} như bt["equity_curve"] của từng model."""
+        return {
+            name: pd.Series(self.equity_curve[:, j], index=self.index, name=name)
+            for j, name in enumerate(self.names)
+        }
+
+    def net_returns(self) -> pd.DataFrame:
+        return pd.DataFrame(self.strategy_ret_net, index=self.index, columns=self.names)
+
+    def summary(self) -> pd.DataFrame:
+        return performance_table(self)
+
+
+def backtest_positions_matrix(
+    positions: Union[pd.DataFrame, Dict[str, pd.Series]],
+    returns: pd.Series,
+    fee_bps: float = 0.0,
+) -> MultiBacktest:
+    """
+    Backtest nhiều strategy cùng lúc, cùng quy ước với backtest_from_positions:
+      - positions: DataFrame (thời gian x strategy) hoặc dict {tên: position}
+                   (reindex theo returns.index, thiếu = 0)
+      - returns  : log return dùng chung
+    Tính position dịch 1 kỳ, phí, return ròng và equity curve cho mọi cột
+    trong một lượt numpy, không copy DataFrame cho từng strategy.
+    """
+    if isinstance(positions, dict):
+        positions = pd.DataFrame(positions)
+    positions = positions.reindex(returns.index)
+    names = [str(c) for c in positions.columns]
+
+    pos = np.nan_to_num(positions.to_numpy(dtype=float), nan=0.0)
+    ret = returns.to_numpy(dtype=float)
+
+    shifted = np.zeros_like(pos)
+    shifted[1:] = pos[:-1]
+
+    fee = np.full_like(pos, np.nan)
+    fee[1:] = np.abs(np.diff(shifted, axis=0)) * (fee_bps / 10_000.0)
+
+    net = shifted * ret[:, None] - fee
+
+    # cumsum bỏ qua NaN như pandas, equity giữ NaN ở các kỳ không có return
+    equity = np.exp(np.nancumsum(net, axis=0))
+    equity[np.isnan(net)] = np.nan
+
+    return MultiBacktest(
+        index=returns.index,
+        names=names,
+        position_shifted=shifted,
+        fee=fee,
+        strategy_ret_net=net,
+        equity_curve=equity,
+    )
+
+
 def performance_summary(df: pd.DataFrame, ret_col: str = "strategy_ret_net") -> Dict[str, float]:
     """
     Thống kê cơ bản hàng năm cho cột ret_col.
@@ -69,35 +140,199 @@ def performance_summary(df: pd.DataFrame, ret_col: str = "strategy_ret_net") ->
     }
 
 
+def performance_table(bt: MultiBacktest) -> pd.DataFrame:
+    """
+    performance_summary cho mọi strategy của một MultiBacktest,
+    trả về bảng (strategy x metrics) tính một lần trên cả ma trận.
+    """
+    x = bt.strategy_ret_net
+    valid = ~np.isnan(x)
+    n = valid.sum(axis=0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_daily = np.where(valid, x, 0.0).sum(axis=0) / n
+        dev = np.where(valid, x - mean_daily, 0.0)
+        vol_daily = np.sqrt((dev ** 2).sum(axis=0) / (n - 1))
+        ann_return = mean_daily * 252.0
+        ann_vol = vol_daily * np.sqrt(252.0)
+        sharpe = np.where(ann_vol > 0, ann_return / ann_vol, 0.0)
+
+    table = pd.DataFrame(
+        {
+            "n_periods": n.astype(int),
+            "mean_daily": mean_daily,
+            "vol_daily": vol_daily,
+            "ann_return": ann_return,
+            "ann_vol": ann_vol,
+            "sharpe": sharpe,
+        },
+        index=pd.Index(bt.names, name="strategy"),
+    )
+    # cùng giá trị mặc định với performance_summary khi không có dữ liệu
+    table.loc[n == 0, table.columns[1:]] = 0.0
+    return table
+
+
+def decimate_curves(curves: Dict[str, pd.Series], max_points: int = 2000) -> pd.DataFrame:
+    """
+    Gộp các equity curve thành một DataFrame và giảm số điểm trước khi vẽ.
+    Chuỗi dài hơn max_points được chia thành max_points / 2 đoạn, mỗi đoạn
+    giữ điểm thấp nhất và cao nhất của từng curve (không mất drawdown),
+    cộng thêm điểm đầu và cuối.
+    """
+    frame = pd.DataFrame(curves)
+    n = len(frame)
+    if max_points is None or n <= max_points:
+        return frame
+
+    n_buckets = max(1, max_points // 2)
+    size = int(np.ceil(n / n_buckets))
+    pad = n_buckets * size - n
+
+    keep = [np.array([0, n - 1])]
+    for col in frame.columns:
+        v = frame[col].to_numpy(dtype=float)
+        lo = np.pad(np.where(np.isnan(v), np.inf, v), (0, pad), constant_values=np.inf)
+        hi = np.pad(np.where(np.isnan(v), -np.inf, v), (0, pad), constant_values=-np.inf)
+        offset = np.arange(n_buckets) * size
+        keep.append(offset + lo.reshape(n_buckets, size).argmin(axis=1))
+        keep.append(offset + hi.reshape(n_buckets, size).argmax(axis=1))
+
+    rows = np.unique(np.concatenate(keep))
+    return frame.iloc[rows[rows < n]]
+
+
+def render_equity_curves(
+    curves: Dict[str, pd.Series],
+    title: str,
+    filepath: str,
+    dpi: int = 150,
+    max_points: Optional[int] = 2000,
+) -> str:
+    """
+    Ghi equity curves ra filepath, không dùng pyplot:
+      - .png: Figure + FigureCanvasAgg (headless, không đụng state toàn cục
+              của pyplot, gọi được từ worker process)
+      - .csv: chỉ ghi dữ liệu đã decimate, không vẽ
+    """
+    frame = decimate_curves(curves, max_points) if max_points else pd.DataFrame(curves)
+
+    if filepath.endswith(".csv"):
+        frame.to_csv(filepath, index_label="Date")
+        return filepath
+
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=(12, 4))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    for name in frame.columns:
+        ax.plot(frame.index, frame[name].to_numpy(), label=name)
+    ax.legend()
+    ax.grid(True)
+    ax.set_title(title)
+    fig.tight_layout()
+    fig.savefig(filepath, dpi=dpi)
+    return filepath
+
+
+class EquityPlotter:
+    """
+    Hàng đợi render equity curve chạy nền trong một process pool riêng,
+    để việc vẽ không nằm trên đường chạy model.
+
+    fmt: "png" hoặc "csv" (chỉ ghi dữ liệu). n_workers=0: render ngay
+    trong process hiện tại. close() chờ mọi file được ghi xong.
+    """
+
+    def __init__(
+        self,
+        save_dir: str = "plots",
+        fmt: str = "png",
+        dpi: int = 150,
+        max_points: Optional[int] = 2000,
+        n_workers: int = 1,
+    ):
+        if fmt not in ("png", "csv"):
+            raise ValueError(f"Unknown plot format '{fmt}'")
+        self.save_dir = save_dir
+        self.fmt = fmt
+        self.dpi = dpi
+        self.max_points = max_points
+        self._pool = ProcessPoolExecutor(max_workers=n_workers) if n_workers > 0 else None
+        self._futures: List[Future] = []
+        os.makedirs(save_dir, exist_ok=True)
+
+    def submit(self, curves: Dict[str, pd.Series], title: str, symbol: str) -> None:
+        filepath = os.path.join(self.save_dir, f"equity_curves_{symbol}.{self.fmt}")
+        # decimate trước khi gửi sang worker cho nhẹ phần pickle
+        if self.max_points:
+            curves = dict(decimate_curves(curves, self.max_points).items())
+        if self._pool is None:
+            render_equity_curves(curves, title, filepath, self.dpi, None)
+            print(f"[PLOT] Saved equity curves to: {filepath}")
+            return
+        self._futures.append(
+            self._pool.submit(render_equity_curves, curves, title, filepath, self.dpi, None)
+        )
+
+    def close(self) -> List[str]:
+        paths = []
+        for fut in self._futures:
+            try:
+                paths.append(fut.result())
+            except Exception as e:
+                print(f"[WARN] Plot failed: {e}")
+        if self._pool is not None:
+            self._pool.shutdown()
+        if paths:
+            print(f"[PLOT] Saved {len(paths)} equity curve files to: {self.save_dir}")
+        self._futures = []
+        return paths
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
 def plot_equity_curves(
     curves: Dict[str, pd.Series],
     title: str,
     symbol: str,
     save_dir: str = "plots",
-    show: bool = True,
+    show: bool = False,
+    dpi: int = 150,
+    fmt: str = "png",
+    max_points: Optional[int] = 2000,
 ) -> str:
     """
     Vẽ nhiều equity curve trên cùng một hình và lưu ra file.
 
     curves: dict {model_name: equity_series}
     symbol: dùng đặt tên file, ví dụ ATLO
+    fmt: "png" hoặc "csv" (chỉ ghi dữ liệu, không vẽ)
+    show=True mở cửa sổ pyplot (chặn đến khi đóng), mặc định chỉ render
+    headless bằng Agg.
     """
     os.makedirs(save_dir, exist_ok=True)
-    filepath = os.path.join(save_dir, f"equity_curves_{symbol}.png")
-
-    plt.figure(figsize=(12, 4))
-    for name, series in curves.items():
-        series.plot(label=name)
-    plt.legend()
-    plt.grid(True)
-    plt.title(title)
-    plt.tight_layout()
-    plt.savefig(filepath, dpi=300)
-
-    if show:
-        plt.show()
-    else:
-        plt.close()
+    filepath = os.path.join(save_dir, f"equity_curves_{symbol}.{fmt}")
 
+    render_equity_curves(curves, title, filepath, dpi=dpi, max_points=max_points)
     print(f"[PLOT] Saved equity curves to: {filepath}")
+
+    if show and fmt == "png":
+        import matplotlib.pyplot as plt
+
+        plt.figure(figsize=(12, 4))
+        for name, series in curves.items():
+            series.plot(label=name)
+        plt.legend()
+        plt.grid(True)
+        plt.title(title)
+        plt.tight_layout()
+        plt.show()
+
     return filepath
@@ -0,0 +1,269 @@
+# batch.py
+
+import argparse
+import glob
+import importlib
+import importlib.util
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from backtest import EquityPlotter, decimate_curves
+from data import load_single_stock_csv, FeatureStore
+from main import run_models
+from model_registry import MODEL_REGISTRY, resolve_models
+from models_full import VOL_FORECASTERS
+
+
+DEFAULT_PER_SYMBOL_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..", "week123", "data", "yfinance", "per_symbol",
+)
+
+METRIC_COLS = ["n_periods", "mean_daily", "vol_daily", "ann_return", "ann_vol", "sharpe"]
+
+
+def resolve_csv_paths(targets: List[str], per_symbol_dir: str = DEFAULT_PER_SYMBOL_DIR) -> List[str]:
+    """
+    Chuyển danh sách target thành danh sách file CSV:
+      - thư mục  -> toàn bộ *.csv trong thư mục
+      - file.csv -> chính file đó (hoặc tìm trong per_symbol_dir)
+      - symbol   -> per_symbol_dir/<symbol>.csv
+    """
+    paths = []
+    for t in targets:
+        if os.path.isdir(t):
+            paths.extend(sorted(glob.glob(os.path.join(t, "*.csv"))))
+        elif t.endswith(".csv"):
+            paths.append(t if os.path.exists(t) else os.path.join(per_symbol_dir, os.path.basename(t)))
+        else:
+            paths.append(os.path.join(per_symbol_dir, f"{t}.csv"))
+
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        raise FileNotFoundError(f"CSV not found: {', '.join(missing)}")
+    return paths
+
+
+def _warm_up(modules: List[str]) -> None:
+    """
+    Initializer của worker: import trước các thư viện nặng mà model được
+    chọn cần (statsmodels, torch, ...) một lần cho mỗi process thay vì
+    một lần cho mỗi mã.
+    """
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(1)
+
+
+def run_symbol(csv_path: str, fee_bps: float, model_kwargs: Dict[str, object], plot: bool = False) -> Dict[str, object]:
+    """
+    Chạy toàn bộ model cho một file CSV, không in log.
+    Trả về record {symbol, models, diagnostics, elapsed_sec} hoặc {symbol, error}.
+    plot=True: record có thêm "_curves" (equity curves đã decimate) để
+    process chính gửi cho EquityPlotter, worker không tự vẽ.
+    """
+    symbol = os.path.basename(csv_path).replace(".csv", "")
+    t0 = time.time()
+    try:
+        df = FeatureStore(load_single_stock_csv(csv_path), window=20)
+        summaries, diagnostics, curves = run_models(df, symbol, fee_bps, verbose=False, **model_kwargs)
+    except Exception as e:
+        return {"symbol": symbol, "error": str(e), "elapsed_sec": time.time() - t0}
+
+    record = {
+        "symbol": symbol,
+        "models": summaries,
+        "diagnostics": diagnostics,
+        "elapsed_sec": time.time() - t0,
+    }
+    if plot:
+        record["_curves"] = dict(decimate_curves(curves).items())
+    return record
+
+
+def records_to_table(records: List[Dict[str, object]]) -> pd.DataFrame:
+    """Dàn phẳng record thành bảng (symbol, model, metrics...)."""
+    rows = []
+    for rec in records:
+        if "error" in rec:
+            rows.append({"symbol": rec["symbol"], "model": None, "error": rec["error"]})
+            continue
+        for model, perf in rec["models"].items():
+            rows.append({"symbol": rec["symbol"], "model": model, **perf, "error": None})
+    return pd.DataFrame(rows, columns=["symbol", "model"] + METRIC_COLS + ["error"])
+
+
+def _json_default(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return str(obj)
+
+
+def check_out_path(out_path: str) -> None:
+    """
+    Kiểm tra trước khi chạy batch: .parquet cần pyarrow hoặc fastparquet,
+    nếu thiếu thì báo lỗi ngay thay vì mất kết quả ở bước ghi cuối cùng.
+    """
+    if out_path.endswith(".parquet") and not any(
+        importlib.util.find_spec(engine) for engine in ("pyarrow", "fastparquet")
+    ):
+        raise ImportError(
+            f"Writing {out_path} needs pyarrow or fastparquet; install one or use a .jsonl output"
+        )
+
+
+def write_results(records: List[Dict[str, object]], out_path: str) -> str:
+    """
+    Ghi kết quả gộp của mọi mã ra một file:
+      - .parquet: bảng phẳng (symbol, model, metrics), cần pyarrow
+      - còn lại (.jsonl): mỗi dòng một mã, cùng nội dung với results_<SYMBOL>.json
+    """
+    out_dir = os.path.dirname(out_path)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    if out_path.endswith(".parquet"):
+        records_to_table(records).to_parquet(out_path, index=False)
+    else:
+        with open(out_path, "w") as f:
+            for rec in records:
+                f.write(json.dumps(rec, default=_json_default) + "\n")
+
+    print(f"[BATCH] Saved {len(records)} symbols to: {out_path}")
+    return out_path
+
+
+def run_batch(
+    csv_paths: List[str],
+    fee_bps: float = 5.0,
+    out_path: str = "results.jsonl",
+    n_workers: Optional[int] = None,
+    plot: bool = False,
+    plot_format: str = "png",
+    plot_workers: int = 1,
+    **model_kwargs,
+) -> List[Dict[str, object]]:
+    """
+    Chạy run_models cho nhiều mã trong một process pool.
+    Mỗi worker chỉ import thư viện một lần, các mã được chia đều cho worker.
+    plot=True: equity curves được render nền (EquityPlotter, plot_workers
+    process) trong lúc các mã khác vẫn chạy; plot_format png hoặc csv.
+    """
+    check_out_path(out_path)
+
+    # ARIMA song song bên trong worker sẽ tạo pool lồng nhau
+    model_kwargs["n_jobs"] = 1
+
+    specs = resolve_models(model_kwargs.get("models"))
+    heavy = sorted({m for spec in specs for m in spec.requires})
+    if model_kwargs.get("run_diagnostics", True):
+        heavy += ["statsmodels.tsa.adfvalues", "scipy.optimize", "scipy.signal"]
+
+    plotter = EquityPlotter(fmt=plot_format, n_workers=plot_workers) if plot else None
+
+    def collect(rec):
+        curves = rec.pop("_curves", None)
+        if plotter is not None and curves:
+            plotter.submit(curves, title=f"Equity curves for {rec['symbol']}", symbol=rec["symbol"])
+        records.append(rec)
+        print(f"[BATCH] {rec['symbol']} done ({len(records)}/{len(csv_paths)})")
+
+    records = []
+    t0 = time.time()
+    if n_workers == 1:
+        _warm_up(heavy)
+        for p in csv_paths:
+            collect(run_symbol(p, fee_bps, model_kwargs, plot))
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_warm_up, initargs=(heavy,)) as ex:
+            futures = [ex.submit(run_symbol, p, fee_bps, model_kwargs, plot) for p in csv_paths]
+            for fut in as_completed(futures):
+                collect(fut.result())
+
+    if plotter is not None:
+        plotter.close()
+
+    records.sort(key=lambda r: r["symbol"])
+    n_err = sum("error" in r for r in records)
+    print(f"[BATCH] {len(records)} symbols in {time.time() - t0:.1f}s, errors={n_err}")
+
+    write_results(records, out_path)
+    return records
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Run all week5 trading models on many symbols in one process pool"
+    )
+    parser.add_argument(
+        "targets",
+        nargs="*",
+        default=[DEFAULT_PER_SYMBOL_DIR],
+        help="Directories, CSV paths or symbols (default: the per_symbol directory)",
+    )
+    parser.add_argument("--per_symbol_dir", type=str, default=DEFAULT_PER_SYMBOL_DIR,
+                        help="Where to look up bare symbols")
+    parser.add_argument("--fee_bps", type=float, default=5.0,
+                        help="Transaction cost per position change in basis points")
+    parser.add_argument("--out", type=str, default="results.jsonl",
+                        help="Consolidated results file (.jsonl or .parquet)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of worker processes (default: CPU count, 1 = no pool)")
+    parser.add_argument("--plot", action="store_true",
+                        help="Also save equity curves (off by default), rendered in the background")
+    parser.add_argument("--plot_format", choices=["png", "csv"], default="png",
+                        help="Equity curve output with --plot: PNG image or decimated CSV data")
+    parser.add_argument("--plot_workers", type=int, default=1,
+                        help="Background processes rendering plots (0 = render inline)")
+    parser.add_argument("--arima_walk_forward", action="store_true",
+                        help="Use walk-forward ARIMA")
+    parser.add_argument("--arima_refit_every", type=int, default=20,
+                        help="Walk-forward ARIMA: refit parameters every N periods")
+    parser.add_argument("--arima_window", type=int, default=None,
+                        help="Walk-forward ARIMA: rolling refit window length (default: expanding window)")
+    parser.add_argument("--models", nargs="+", choices=list(MODEL_REGISTRY), default=None,
+                        help="Models to run (default: all)")
+    parser.add_argument("--no_diagnostics", action="store_true",
+                        help="Skip ADF / GARCH diagnostics")
+    parser.add_argument("--lstm_checkpoint_dir", type=str, default=None,
+                        help="Cache trained LSTM weights per symbol in this directory")
+    parser.add_argument("--vol_forecaster", choices=list(VOL_FORECASTERS), default=None,
+                        help="Out-of-sample volatility forecast for the volatility sized trend model")
+    args = parser.parse_args()
+    try:
+        check_out_path(args.out)
+    except ImportError as e:
+        parser.error(str(e))
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    paths = resolve_csv_paths(args.targets, per_symbol_dir=args.per_symbol_dir)
+    run_batch(
+        paths,
+        fee_bps=args.fee_bps,
+        out_path=args.out,
+        n_workers=args.workers,
+        plot=args.plot,
+        plot_format=args.plot_format,
+        plot_workers=args.plot_workers,
+        arima_walk_forward=args.arima_walk_forward,
+        arima_refit_every=args.arima_refit_every,
+        arima_window=args.arima_window,
+        models=args.models,
+        run_diagnostics=not args.no_diagnostics,
+        lstm_checkpoint_dir=args.lstm_checkpoint_dir,
+        vol_forecaster=args.vol_forecaster,
+    )
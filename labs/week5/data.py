@@ -1,16 +1,27 @@
 # data.py
 
-from typing import Tuple
+import os
+import sys
+from typing import Callable, Dict, List, Optional, Tuple
 import numpy as np
 import pandas as pd
 
+# Thư mục gốc repo chứa package shared/ (dùng chung với week123, ticket_selection).
+# Mọi entry point (main, batch, model_registry) import data trước.
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
 
-def load_single_stock_csv(csv_path: str) -> pd.DataFrame:
+from shared.compact_schema import to_compact  # noqa: E402
+
+
+def load_single_stock_csv(csv_path: str, compact: bool = False) -> pd.DataFrame:
     """
     Load 1 file CSV với các cột:
       Date, Open, High, Low, Close, Volume, Symbol, Security Name
 
     Chuẩn hóa index về Date và tính cột Close numeric.
+    compact=True: chuyển sang schema gọn (to_compact).
     """
     df = pd.read_csv(csv_path)
 
@@ -37,6 +48,9 @@ def load_single_stock_csv(csv_path: str) -> pd.DataFrame:
     df["Close"] = df[close_col]
 
     df = df.dropna(subset=["Close"])
+
+    if compact:
+        df = to_compact(df)
     return df
 
 
@@ -83,3 +97,113 @@ def add_volatility_features(df: pd.DataFrame, window: int = 20) -> pd.DataFrame:
     df["rolling_vol"] = df["log_return"].rolling(window).std()
     df = add_bollinger_bands(df, window=window, n_std=2.0)
     return df
+
+
+class FeatureStore:
+    """
+    Kho feature cho một mã: mỗi feature là một cột numpy 1-D dùng chung
+    một index, được tính lười (lần đầu được hỏi) và nhớ lại (memoize).
+
+    Model lấy feature theo tên, store["log_return"] trả về pd.Series bọc
+    quanh mảng có sẵn (không copy), nên không cần df.copy() cho mỗi model
+    và các rolling chỉ tính một lần.
+
+    Feature có sẵn:
+      - cột gốc: Open, High, Low, Close, Volume (nếu có trong CSV)
+      - log_return, sign_return
+      - rolling_vol (std log_return), ewma_vol
+      - bb_mid, bb_upper, bb_lower
+    """
+
+    def __init__(self, df: pd.DataFrame, window: int = 20, n_std: float = 2.0):
+        self.index = df.index
+        self.window = window
+        self.n_std = n_std
+
+        self._cols: Dict[str, np.ndarray] = {}
+        # mảng trung gian dùng chung giữa các builder, không phải feature
+        self._scratch: Dict[str, np.ndarray] = {}
+        for col in ("Open", "High", "Low", "Close", "Volume"):
+            if col in df.columns:
+                self._cols[col] = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float)
+
+        self._builders: Dict[str, Callable[["FeatureStore"], np.ndarray]] = {
+            "log_return": FeatureStore._log_return,
+            "sign_return": FeatureStore._sign_return,
+            "rolling_vol": FeatureStore._rolling_vol,
+            "ewma_vol": FeatureStore._ewma_vol,
+            "bb_mid": FeatureStore._bb_mid,
+            "bb_upper": FeatureStore._bb_upper,
+            "bb_lower": FeatureStore._bb_lower,
+        }
+
+    # ---------- truy cập ----------
+
+    def register(self, name: str, builder: Callable[["FeatureStore"], np.ndarray]) -> None:
+        """Thêm feature mới: builder(store) trả về mảng cùng độ dài index."""
+        self._builders[name] = builder
+        self._cols.pop(name, None)
+
+    def array(self, name: str) -> np.ndarray:
+        """Mảng numpy của feature (tính lần đầu, các lần sau dùng lại)."""
+        arr = self._cols.get(name)
+        if arr is None:
+            if name not in self._builders:
+                raise KeyError(f"Unknown feature '{name}'")
+            arr = np.asarray(self._builders[name](self), dtype=float)
+            self._cols[name] = arr
+        return arr
+
+    def __getitem__(self, name: str) -> pd.Series:
+        return pd.Series(self.array(name), index=self.index, name=name, copy=False)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._cols or name in self._builders
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def computed(self) -> List[str]:
+        """Các feature đã được tính."""
+        return list(self._cols)
+
+    def to_frame(self, names: Optional[List[str]] = None) -> pd.DataFrame:
+        """DataFrame gồm các feature được chọn (mặc định: các feature đã tính)."""
+        names = self.computed if names is None else names
+        return pd.DataFrame({n: self.array(n) for n in names}, index=self.index)
+
+    # ---------- builders ----------
+
+    def _rolling(self, name: str):
+        return pd.Series(self.array(name), copy=False).rolling(self.window)
+
+    def _log_return(self) -> np.ndarray:
+        close = self.array("Close")
+        out = np.full_like(close, np.nan)
+        out[1:] = np.log(close[1:] / close[:-1])
+        return out
+
+    def _sign_return(self) -> np.ndarray:
+        return np.nan_to_num(np.sign(self.array("log_return")), nan=0.0)
+
+    def _rolling_vol(self) -> np.ndarray:
+        return self._rolling("log_return").std().to_numpy()
+
+    def _ewma_vol(self) -> np.ndarray:
+        var = pd.Series(self.array("log_return"), copy=False).ewm(span=self.window).var()
+        return np.sqrt(var.to_numpy())
+
+    def _bb_mid(self) -> np.ndarray:
+        return self._rolling("Close").mean().to_numpy()
+
+    def _close_std(self) -> np.ndarray:
+        if "close_std" not in self._scratch:
+            self._scratch["close_std"] = self._rolling("Close").std().to_numpy()
+        return self._scratch["close_std"]
+
+    def _bb_upper(self) -> np.ndarray:
+        return self.array("bb_mid") + self.n_std * self._close_std()
+
+    def _bb_lower(self) -> np.ndarray:
+        return self.array("bb_mid") - self.n_std * self._close_std()
@@ -3,25 +3,20 @@
 import argparse
 import json
 import os
-from typing import Dict
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
 import pandas as pd
 
-from data import load_single_stock_csv, add_volatility_features
-from backtest import backtest_from_positions, performance_summary, plot_equity_curves
+from data import load_single_stock_csv, FeatureStore
+from backtest import backtest_positions_matrix, performance_table, plot_equity_curves
 
+from model_registry import MODEL_REGISTRY, resolve_models
 from models_full import (
     adf_test,
     historical_volatility,
-    ewma_volatility,
-    fit_garch_11,
-    build_signals_ar_ma_arima,
-    bollinger_signal,
-    volatility_position_sizing,
-    kalman_filter_trend,
-    particle_filter_signal,
+    fit_garch_11_mle,
     position_size_risk,
-    lstm_signal,
+    VOL_FORECASTERS,
 )
 
 
@@ -52,31 +47,20 @@ def save_summary_to_json(
     return out_path
 
 
-def run_all_models(csv_path: str, fee_bps: float) -> None:
-    print("===========================================")
-    print(f"[INFO] Loading data from: {csv_path}")
-    print("===========================================")
-
-    df = load_single_stock_csv(csv_path)
-    df = add_volatility_features(df, window=20)
-
+def _run_diagnostics(df: FeatureStore, log: Callable[..., None]) -> Dict[str, object]:
     # ==============================
     # Diagnostics: ADF, volatility, GARCH
     # ==============================
-    print("[INFO] Running diagnostics (ADF, volatility, GARCH)")
+    log("[INFO] Running diagnostics (ADF, volatility, GARCH)")
 
     adf_result = adf_test(df["log_return"])
     sigma_daily, sigma_annual = historical_volatility(df["log_return"])
-    ewma_vol = ewma_volatility(df["log_return"], span=20)
+    ewma_vol = df["ewma_vol"]
 
-    garch_info = {}
     try:
-        model_garch, res_garch = fit_garch_11(df["log_return"])
-        garch_info["params"] = {k: float(v) for k, v in res_garch.params.items()}
-        garch_info["aic"] = float(res_garch.aic)
-        garch_info["bic"] = float(res_garch.bic)
+        garch_info = fit_garch_11_mle(df["log_return"]).to_info()
     except Exception as e:
-        garch_info["error"] = str(e)
+        garch_info = {"error": str(e)}
 
     diagnostics = {
         "adf": adf_result,
@@ -90,20 +74,19 @@ def run_all_models(csv_path: str, fee_bps: float) -> None:
         "garch_11": garch_info,
     }
 
-    print("[LOG] ADF result:")
-    print(f"  test_stat    : {adf_result['test_stat']:.6f}")
-    print(f"  pvalue       : {adf_result['pvalue']:.6f}")
-    print(f"  is_stationary: {adf_result['is_stationary']}")
-    print()
+    log("[LOG] ADF result:")
+    log(f"  test_stat    : {adf_result['test_stat']:.6f}")
+    log(f"  pvalue       : {adf_result['pvalue']:.6f}")
+    log(f"  is_stationary: {adf_result['is_stationary']}")
+    log()
 
-    print("[LOG] Historical volatility:")
-    print(f"  sigma_daily : {sigma_daily:.6f}")
-    print(f"  sigma_annual: {sigma_annual:.6f}")
-    print()
+    log("[LOG] Historical volatility:")
+    log(f"  sigma_daily : {sigma_daily:.6f}")
+    log(f"  sigma_annual: {sigma_annual:.6f}")
+    log()
 
     # Demo position sizing theo R, M (log ra thôi)
     try:
-        from models_full import position_size_risk
         ps_demo = position_size_risk(
             equity=100_000.0,
             risk_fraction=0.01,
@@ -112,13 +95,51 @@ def run_all_models(csv_path: str, fee_bps: float) -> None:
             last_price=float(df["Close"].iloc[-1]),
         )
         diagnostics["position_sizing_demo"] = ps_demo
-        print("[LOG] Position sizing demo (equity=100k, risk=1 percent, M=2):")
-        print(f"  R_dollar            : {ps_demo['R_dollar']:.2f}")
-        print(f"  dollar_vol_per_share: {ps_demo['dollar_vol_per_share']:.4f}")
-        print(f"  shares              : {ps_demo['shares']:.2f}")
-        print()
+        log("[LOG] Position sizing demo (equity=100k, risk=1 percent, M=2):")
+        log(f"  R_dollar            : {ps_demo['R_dollar']:.2f}")
+        log(f"  dollar_vol_per_share: {ps_demo['dollar_vol_per_share']:.4f}")
+        log(f"  shares              : {ps_demo['shares']:.2f}")
+        log()
     except Exception as e:
-        print(f"[WARN] Position sizing demo failed: {e}")
+        log(f"[WARN] Position sizing demo failed: {e}")
+
+    return diagnostics
+
+
+def run_models(
+    df: Union[FeatureStore, pd.DataFrame],
+    symbol: str,
+    fee_bps: float,
+    arima_walk_forward: bool = False,
+    arima_refit_every: int = 20,
+    arima_window: Optional[int] = None,
+    n_jobs: int = 1,
+    verbose: bool = True,
+    models: Optional[List[str]] = None,
+    run_diagnostics: bool = True,
+    lstm_checkpoint_dir: Optional[str] = None,
+    vol_forecaster: Optional[str] = None,
+) -> Tuple[Dict[str, Dict[str, float]], Dict[str, object], Dict[str, pd.Series]]:
+    """
+    Chạy diagnostics + các model trên FeatureStore của một mã
+    (DataFrame giá thô sẽ được bọc thành FeatureStore(window=20)).
+    Model lấy feature theo tên, mỗi feature chỉ tính một lần.
+    Trả về (summaries, diagnostics, curves), không ghi file.
+    verbose=False tắt log (dùng khi chạy batch nhiều mã).
+    models: tên model trong MODEL_REGISTRY (None = tất cả).
+    run_diagnostics=False bỏ qua ADF/GARCH (không import statsmodels).
+    lstm_checkpoint_dir: thư mục cache trọng số LSTM theo mã.
+    vol_forecaster: rolling / ewma / garch, dự báo vol out-of-sample cho
+    VolatilitySizedTrend (None = cột rolling_vol như cũ).
+    """
+    log = print if verbose else (lambda *a, **k: None)
+
+    if not isinstance(df, FeatureStore):
+        df = FeatureStore(df, window=20)
+
+    diagnostics: Dict[str, object] = {}
+    if run_diagnostics:
+        diagnostics = _run_diagnostics(df, log)
 
     # ==============================
     # Trading models
@@ -126,134 +147,104 @@ def run_all_models(csv_path: str, fee_bps: float) -> None:
 
     curves: Dict[str, pd.Series] = {}
     summaries: Dict[str, Dict[str, float]] = {}
+    options = {
+        "arima_walk_forward": arima_walk_forward,
+        "arima_refit_every": arima_refit_every,
+        "arima_window": arima_window,
+        "n_jobs": n_jobs,
+        "lstm_checkpoint_dir": lstm_checkpoint_dir,
+        "vol_forecaster": vol_forecaster,
+    }
 
-    # 1. Classical AR, MA, ARIMA on log_return
-    print("===========================================")
-    print("[INFO] Running classical AR MA ARIMA models")
-    print("===========================================")
-
-    arima_signals = build_signals_ar_ma_arima(df)
-    for name, sig in arima_signals.items():
-        model_name = f"TS_{name}"
-        df_tmp = df.copy()
-        df_tmp["position"] = sig.reindex(df_tmp.index).fillna(0.0)
-
-        bt = backtest_from_positions(df_tmp, pos_col="position", fee_bps=fee_bps)
-        perf = performance_summary(bt)
-
-        summaries[model_name] = perf
-        curves[model_name] = bt["equity_curve"]
-
-        print(f"[MODEL] {model_name}")
-        for k, v in perf.items():
-            print(f"  {k}: {v:.6f}")
-        print()
-
-    # 2. Bollinger mean reversion
-    print("===========================================")
-    print("[INFO] Running Bollinger mean reversion model")
-    print("===========================================")
-
-    df["position_bb"] = bollinger_signal(df)
-    bt_bb = backtest_from_positions(df, pos_col="position_bb", fee_bps=fee_bps)
-    perf_bb = performance_summary(bt_bb)
-    summaries["Bollinger"] = perf_bb
-    curves["Bollinger"] = bt_bb["equity_curve"]
-
-    print("[MODEL] Bollinger")
-    for k, v in perf_bb.items():
-        print(f"  {k}: {v:.6f}")
-    print()
-
-    # 3. Volatility sized trend (sign(return) scaled by volatility)
-    print("===========================================")
-    print("[INFO] Running volatility sized trend model")
-    print("===========================================")
-
-    sign_return = df["log_return"].apply(lambda x: 1.0 if x > 0 else (-1.0 if x < 0 else 0.0))
-    vol_pos = volatility_position_sizing(df, target_vol=0.15)
-    df["position_vol_trend"] = vol_pos * sign_return
-
-    bt_vol = backtest_from_positions(df, pos_col="position_vol_trend", fee_bps=fee_bps)
-    perf_vol = performance_summary(bt_vol)
-    summaries["VolatilitySizedTrend"] = perf_vol
-    curves["VolatilitySizedTrend"] = bt_vol["equity_curve"]
-
-    print("[MODEL] VolatilitySizedTrend")
-    for k, v in perf_vol.items():
-        print(f"  {k}: {v:.6f}")
-    print()
-
-    # 4. Kalman filter trend
-    print("===========================================")
-    print("[INFO] Running Kalman filter trend model")
-    print("===========================================")
-
-    state_kf, sig_kf = kalman_filter_trend(df["Close"])
-    df_tmp = df.copy()
-    df_tmp["position"] = sig_kf.reindex(df_tmp.index).fillna(0.0)
-    bt_kf = backtest_from_positions(df_tmp, pos_col="position", fee_bps=fee_bps)
-    perf_kf = performance_summary(bt_kf)
-    summaries["KalmanTrend"] = perf_kf
-    curves["KalmanTrend"] = bt_kf["equity_curve"]
-
-    print("[MODEL] KalmanTrend")
-    for k, v in perf_kf.items():
-        print(f"  {k}: {v:.6f}")
-    print()
-
-    # 5. Particle filter on expected return
+    positions: Dict[str, pd.Series] = {}
+    for spec in resolve_models(models):
+        log("===========================================")
+        log(f"[INFO] Running {spec.title}")
+        log("===========================================")
+
+        missing = spec.missing_requirements()
+        if missing:
+            msg = f"{spec.name} requires {', '.join(missing)}"
+            if not spec.optional:
+                raise ImportError(msg)
+            log(f"[WARN] {spec.name} not run: {msg}")
+            continue
+
+        try:
+            positions.update(spec.runner(df, symbol, options))
+        except Exception as e:
+            if not spec.optional:
+                raise
+            log(f"[WARN] {spec.name} not run: {e}")
+
+    # Backtest mọi strategy trong một lượt trên cùng chuỗi log_return
+    if positions:
+        bt = backtest_positions_matrix(positions, df["log_return"], fee_bps=fee_bps)
+        curves = bt.equity_curves()
+        table = performance_table(bt)
+
+        for model_name, row in table.iterrows():
+            perf = {k: float(v) for k, v in row.items()}
+            perf["n_periods"] = int(row["n_periods"])
+            summaries[model_name] = perf
+
+            log(f"[MODEL] {model_name}")
+            for k, v in perf.items():
+                log(f"  {k}: {v:.6f}")
+            log()
+
+    return summaries, diagnostics, curves
+
+
+def run_all_models(
+    csv_path: str,
+    fee_bps: float,
+    arima_walk_forward: bool = False,
+    arima_refit_every: int = 20,
+    arima_window: Optional[int] = None,
+    n_jobs: int = 1,
+    show: bool = False,
+    plot_format: str = "png",
+    models: Optional[List[str]] = None,
+    run_diagnostics: bool = True,
+    lstm_checkpoint_dir: Optional[str] = None,
+    vol_forecaster: Optional[str] = None,
+) -> None:
     print("===========================================")
-    print("[INFO] Running Particle filter model")
+    print(f"[INFO] Loading data from: {csv_path}")
     print("===========================================")
 
-    sig_pf = particle_filter_signal(df["log_return"])
-    df_tmp = df.copy()
-    df_tmp["position"] = sig_pf.reindex(df_tmp.index).fillna(0.0)
-    bt_pf = backtest_from_positions(df_tmp, pos_col="position", fee_bps=fee_bps)
-    perf_pf = performance_summary(bt_pf)
-    summaries["ParticleFilter"] = perf_pf
-    curves["ParticleFilter"] = bt_pf["equity_curve"]
-
-    print("[MODEL] ParticleFilter")
-    for k, v in perf_pf.items():
-        print(f"  {k}: {v:.6f}")
-    print()
-
-    # 6. LSTM demo (extension)
-    print("===========================================")
-    print("[INFO] Running LSTM demo model (if torch available)")
-    print("===========================================")
+    df = FeatureStore(load_single_stock_csv(csv_path), window=20)
 
-    try:
-        sig_lstm = lstm_signal(df["log_return"], lookback=20, epochs=5)
-        df_tmp = df.copy()
-        df_tmp["position"] = sig_lstm.reindex(df_tmp.index).fillna(0.0)
-        bt_lstm = backtest_from_positions(df_tmp, pos_col="position", fee_bps=fee_bps)
-        perf_lstm = performance_summary(bt_lstm)
-        summaries["LSTM_Demo"] = perf_lstm
-        curves["LSTM_Demo"] = bt_lstm["equity_curve"]
-
-        print("[MODEL] LSTM_Demo")
-        for k, v in perf_lstm.items():
-            print(f"  {k}: {v:.6f}")
-        print()
-    except Exception as e:
-        print(f"[WARN] LSTM demo not run: {e}")
+    symbol = os.path.basename(csv_path).replace(".csv", "")
+    summaries, diagnostics, curves = run_models(
+        df,
+        symbol,
+        fee_bps,
+        arima_walk_forward=arima_walk_forward,
+        arima_refit_every=arima_refit_every,
+        arima_window=arima_window,
+        n_jobs=n_jobs,
+        models=models,
+        run_diagnostics=run_diagnostics,
+        lstm_checkpoint_dir=lstm_checkpoint_dir,
+        vol_forecaster=vol_forecaster,
+    )
 
     # ==============================
     # Save JSON + Plot
     # ==============================
     save_summary_to_json(summaries, diagnostics, csv_path)
 
-    symbol = os.path.basename(csv_path).replace(".csv", "")
-    plot_equity_curves(
-        curves=curves,
-        title=f"Equity curves for {symbol}",
-        symbol=symbol,
-        save_dir="plots",
-        show=True,
-    )
+    if plot_format != "none":
+        plot_equity_curves(
+            curves=curves,
+            title=f"Equity curves for {symbol}",
+            symbol=symbol,
+            save_dir="plots",
+            show=show,
+            fmt=plot_format,
+        )
 
     print("===========================================")
     print("[DONE] All models finished")
@@ -276,9 +267,80 @@ def parse_args() -> argparse.Namespace:
         default=5.0,
         help="Transaction cost per position change in basis points",
     )
+    parser.add_argument(
+        "--arima_walk_forward",
+        action="store_true",
+        help="Use walk-forward ARIMA (periodic warm-started refits) instead of one fit + multi-step forecast",
+    )
+    parser.add_argument(
+        "--arima_refit_every",
+        type=int,
+        default=20,
+        help="Walk-forward ARIMA: refit parameters every N periods",
+    )
+    parser.add_argument(
+        "--arima_window",
+        type=int,
+        default=None,
+        help="Walk-forward ARIMA: rolling refit window length (default: expanding window)",
+    )
+    parser.add_argument(
+        "--n_jobs",
+        type=int,
+        default=1,
+        help="Number of processes used to fit the ARIMA orders in parallel",
+    )
+    parser.add_argument(
+        "--models",
+        nargs="+",
+        choices=list(MODEL_REGISTRY),
+        default=None,
+        help="Models to run (default: all). Heavy libraries are only imported for the selected models",
+    )
+    parser.add_argument(
+        "--no_diagnostics",
+        action="store_true",
+        help="Skip ADF / GARCH diagnostics",
+    )
+    parser.add_argument(
+        "--lstm_checkpoint_dir",
+        type=str,
+        default=None,
+        help="Cache trained LSTM weights per symbol in this directory",
+    )
+    parser.add_argument(
+        "--show",
+        action="store_true",
+        help="Open an interactive window with the equity curves (blocks until closed)",
+    )
+    parser.add_argument(
+        "--plot_format",
+        choices=["png", "csv", "none"],
+        default="png",
+        help="Equity curve output: PNG image, decimated CSV data, or nothing",
+    )
+    parser.add_argument(
+        "--vol_forecaster",
+        choices=list(VOL_FORECASTERS),
+        default=None,
+        help="Out-of-sample volatility forecast used by the volatility sized trend model (default: rolling_vol column)",
+    )
     return parser.parse_args()
 
 
 if __name__ == "__main__":
     args = parse_args()
-    run_all_models(args.csv_path, fee_bps=args.fee_bps)
+    run_all_models(
+        args.csv_path,
+        fee_bps=args.fee_bps,
+        arima_walk_forward=args.arima_walk_forward,
+        arima_refit_every=args.arima_refit_every,
+        arima_window=args.arima_window,
+        n_jobs=args.n_jobs,
+        models=args.models,
+        run_diagnostics=not args.no_diagnostics,
+        lstm_checkpoint_dir=args.lstm_checkpoint_dir,
+        vol_forecaster=args.vol_forecaster,
+        show=args.show,
+        plot_format=args.plot_format,
+    )
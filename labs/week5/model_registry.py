@@ -0,0 +1,119 @@
+# model_registry.py
+#
+# Registry các trading model của Week 5.
+# Mỗi model là một ModelSpec: tên dùng trên CLI, hàm runner trả về
+# {tên strategy: position series} và danh sách thư viện nặng cần có.
+# Runner chỉ import phần cài đặt (và thư viện nặng) khi được gọi, nên chạy
+# riêng các model nhẹ không phải import statsmodels hay torch.
+# Runner nhận FeatureStore (data.py) và lấy feature theo tên, không copy df.
+
+import importlib.util
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from data import FeatureStore
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    name: str
+    title: str
+    runner: Callable[[FeatureStore, str, Dict[str, object]], Dict[str, pd.Series]]
+    requires: Tuple[str, ...] = ()
+    optional: bool = False
+
+    def missing_requirements(self) -> List[str]:
+        """Các thư viện trong requires chưa cài (chỉ kiểm tra, không import)."""
+        return [m for m in self.requires if importlib.util.find_spec(m) is None]
+
+
+def _run_arima(df: FeatureStore, symbol: str, options: Dict[str, object]) -> Dict[str, pd.Series]:
+    from models_full import build_signals_ar_ma_arima
+
+    if options.get("arima_walk_forward"):
+        signals = build_signals_ar_ma_arima(
+            df,
+            walk_forward=True,
+            n_jobs=options.get("n_jobs", 1),
+            refit_every=options.get("arima_refit_every", 20),
+            window=options.get("arima_window"),
+            symbol=symbol,
+        )
+    else:
+        signals = build_signals_ar_ma_arima(df, n_jobs=options.get("n_jobs", 1))
+    return {f"TS_{name}": sig for name, sig in signals.items()}
+
+
+def _run_bollinger(df: FeatureStore, symbol: str, options: Dict[str, object]) -> Dict[str, pd.Series]:
+    from models_full import bollinger_signal
+
+    return {"Bollinger": bollinger_signal(df)}
+
+
+def _run_vol_trend(df: FeatureStore, symbol: str, options: Dict[str, object]) -> Dict[str, pd.Series]:
+    from models_full import forecast_volatility, volatility_position_sizing
+
+    # sign(return) scaled by volatility
+    sign_return = df["sign_return"]
+    method = options.get("vol_forecaster")
+    vol = forecast_volatility(df["log_return"], method) if method else None
+    vol_pos = volatility_position_sizing(df, target_vol=0.15, vol=vol)
+    return {"VolatilitySizedTrend": vol_pos * sign_return}
+
+
+def _run_kalman(df: FeatureStore, symbol: str, options: Dict[str, object]) -> Dict[str, pd.Series]:
+    from models_full import kalman_filter_trend
+
+    _, sig = kalman_filter_trend(df["Close"])
+    return {"KalmanTrend": sig}
+
+
+def _run_particle(df: FeatureStore, symbol: str, options: Dict[str, object]) -> Dict[str, pd.Series]:
+    from models_full import particle_filter_signal
+
+    return {"ParticleFilter": particle_filter_signal(df["log_return"], seed=42)}
+
+
+def _run_lstm(df: FeatureStore, symbol: str, options: Dict[str, object]) -> Dict[str, pd.Series]:
+    from models_full import lstm_signal
+
+    sig = lstm_signal(
+        df["log_return"],
+        lookback=20,
+        epochs=5,
+        checkpoint_dir=options.get("lstm_checkpoint_dir"),
+        symbol=symbol,
+    )
+    return {"LSTM_Demo": sig}
+
+
+MODEL_REGISTRY: Dict[str, ModelSpec] = {
+    spec.name: spec
+    for spec in [
+        ModelSpec("arima", "classical AR MA ARIMA models", _run_arima, requires=("statsmodels",)),
+        ModelSpec("bollinger", "Bollinger mean reversion model", _run_bollinger),
+        ModelSpec("vol_trend", "volatility sized trend model", _run_vol_trend),
+        ModelSpec("kalman", "Kalman filter trend model", _run_kalman, requires=("scipy",)),
+        ModelSpec("particle", "Particle filter model", _run_particle),
+        ModelSpec("lstm", "LSTM demo model (if torch available)", _run_lstm, requires=("torch",), optional=True),
+    ]
+}
+
+
+def resolve_models(names: Optional[List[str]] = None) -> List[ModelSpec]:
+    """
+    Chọn model theo tên (giữ thứ tự của registry). None = tất cả.
+    Báo lỗi nếu có tên không tồn tại.
+    """
+    if names is None:
+        return list(MODEL_REGISTRY.values())
+
+    unknown = [n for n in names if n not in MODEL_REGISTRY]
+    if unknown:
+        raise ValueError(
+            f"Unknown model(s): {', '.join(unknown)}. "
+            f"Available: {', '.join(MODEL_REGISTRY)}"
+        )
+    return [spec for name, spec in MODEL_REGISTRY.items() if name in names]
@@ -12,12 +12,17 @@
 # - RNN/LSTM (extension)
 # ============================================================
 
+import hashlib
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import pandas as pd
 from typing import Dict, Tuple, Optional
 
-from statsmodels.tsa.arima.model import ARIMA
-from statsmodels.tsa.stattools import adfuller
+# statsmodels, arch, torch được import lười (trong hàm) để các model nhẹ
+# như Bollinger, Kalman không phải trả chi phí import của thư viện nặng.
 
 
 # ============================================================
@@ -30,17 +35,22 @@ def compute_log_returns(prices: pd.Series) -> pd.Series:
 
 
 def adf_test(series: pd.Series, alpha: float = 0.05) -> Dict[str, object]:
-    """ADF stationarity test với giải thích."""
-    series = series.dropna()
+    """
+    ADF stationarity test với giải thích (autolag AIC, có hằng số).
+    Dùng shared/stationarity.adf: cùng kết quả với adfuller, được cache theo
+    hash của chuỗi nên gọi lại trên cùng dữ liệu không tính lại.
+    """
+    from shared.stationarity import adf
 
-    test_stat, pval, nlags, nobs, crit, _ = adfuller(series)
+    res = adf(series.dropna())
+    pval = res["pvalue"]
 
     return {
-        "test_stat": float(test_stat),
-        "pvalue": float(pval),
-        "n_lags": int(nlags),
-        "n_obs": int(nobs),
-        "critical_values": crit,
+        "test_stat": res["stat"],
+        "pvalue": pval,
+        "n_lags": res["usedlag"],
+        "n_obs": res["nobs"],
+        "critical_values": {k: res[f"crit_{k}"] for k in ("1%", "5%", "10%")},
         "alpha": alpha,
         "is_stationary": pval <= alpha
     }
@@ -56,7 +66,10 @@ def arima_forecast_signal(
     train_ratio: float = 0.7,
 ) -> pd.Series:
     """Tín hiệu trading = sign(forecast_ARIMA)."""
+    from statsmodels.tsa.arima.model import ARIMA
+
     r = returns.dropna().copy()
+    dates = r.index
     r.index = range(len(r))
 
     split = int(len(r) * train_ratio)
@@ -70,17 +83,180 @@ def arima_forecast_signal(
         pd.Series(0.0, index=train.index),
         np.sign(forecast)
     ])
+    # statsmodels cần index số nguyên, trả lại index ngày gốc để main reindex được
+    signal.index = dates
     signal.name = f"arima_{order}"
     return signal
 
 
-def build_signals_ar_ma_arima(df: pd.DataFrame) -> Dict[str, pd.Series]:
+# Cache params ARIMA đã fit: key = (series_key, order, window_start, window_end)
+_ARIMA_PARAM_CACHE: Dict[tuple, np.ndarray] = {}
+
+
+def clear_arima_cache() -> None:
+    _ARIMA_PARAM_CACHE.clear()
+
+
+def _series_key(values: np.ndarray, symbol: Optional[str]) -> str:
+    """
+    Định danh chuỗi cho cache: luôn hash dữ liệu (cùng symbol nhưng dữ liệu
+    khác, vd file được cập nhật, không dùng lại params cũ), symbol chỉ để dễ đọc.
+    """
+    digest = hashlib.sha1(np.ascontiguousarray(values, dtype=float).tobytes()).hexdigest()
+    return digest if symbol is None else f"{symbol}:{digest}"
+
+
+def _fit_arima_window(
+    values: np.ndarray,
+    order: Tuple[int, int, int],
+    key: str,
+    lo: int,
+    hi: int,
+    start_params: Optional[np.ndarray] = None,
+):
+    """
+    Fit ARIMA trên values[lo:hi]. Nếu (key, order, lo, hi) đã có trong cache
+    thì chỉ chạy filter với params cũ (không tối ưu lại).
+    start_params: params của lần fit trước, dùng làm điểm khởi đầu (warm start).
+    """
+    from statsmodels.tsa.arima.model import ARIMA
+
+    model = ARIMA(values[lo:hi], order=order)
+    cache_key = (key, tuple(order), lo, hi)
+    params = _ARIMA_PARAM_CACHE.get(cache_key)
+    if params is not None:
+        return model.filter(params)
+
+    res = model.fit(start_params=start_params)
+    _ARIMA_PARAM_CACHE[cache_key] = np.asarray(res.params)
+    return res
+
+
+def arima_walk_forward_signal(
+    returns: pd.Series,
+    order: Tuple[int, int, int],
+    train_ratio: float = 0.7,
+    refit_every: int = 20,
+    window: Optional[int] = None,
+    symbol: Optional[str] = None,
+) -> pd.Series:
+    """
+    Walk-forward ARIMA: tín hiệu ngày t = sign(forecast 1 bước với dữ liệu đến t-1).
+
+    - Fit lần đầu trên train_ratio dữ liệu đầu.
+    - Giữa hai lần refit, params giữ nguyên và mô hình chỉ được cập nhật
+      bằng state-space extend (không fit lại).
+    - Mỗi refit_every phiên refit lại, dùng params cũ làm start_params.
+    - window: None = expanding window, số nguyên = rolling window khi refit.
+    - Kết quả fit được cache theo (symbol, order, window).
+    """
+    if refit_every < 1:
+        raise ValueError("refit_every must be at least 1.")
+
+    r = returns.dropna()
+    values = r.to_numpy(dtype=float)
+    n = len(values)
+    split = int(n * train_ratio)
+    key = _series_key(values, symbol)
+
+    forecast = np.zeros(n)
+    params = None
+    for start in range(split, n, refit_every):
+        stop = min(start + refit_every, n)
+        lo = 0 if window is None else max(0, start - window)
+
+        res = _fit_arima_window(values, order, key, lo, start, start_params=params)
+        params = np.asarray(res.params)
+
+        # predict() của kết quả extend = dự báo 1 bước cho từng quan sát mới
+        forecast[start:stop] = np.asarray(res.extend(values[start:stop]).predict())
+
+    signal = pd.Series(np.sign(forecast), index=r.index, name=f"arima_wf_{order}")
+    return signal
+
+
+def _arima_signal_job(returns: pd.Series, order: Tuple[int, int, int], walk_forward: bool, kwargs: dict):
+    """Job chạy trong process pool; trả kèm các entry cache mới để process cha gộp lại."""
+    before = set(_ARIMA_PARAM_CACHE)
+    if walk_forward:
+        sig = arima_walk_forward_signal(returns, order, **kwargs)
+    else:
+        sig = arima_forecast_signal(returns, order)
+    new_cache = {k: v for k, v in _ARIMA_PARAM_CACHE.items() if k not in before}
+    return sig, new_cache
+
+
+def build_signals_ar_ma_arima(
+    df: pd.DataFrame,
+    orders: Optional[Dict[str, Tuple[int, int, int]]] = None,
+    walk_forward: bool = False,
+    n_jobs: int = 1,
+    **walk_forward_kwargs,
+) -> Dict[str, pd.Series]:
+    """
+    Tín hiệu cho nhiều order ARIMA. Mặc định: ar1, ma1, arima_1_1_1.
+    walk_forward=True dùng arima_walk_forward_signal (refit_every, window,
+    symbol truyền qua walk_forward_kwargs).
+    n_jobs > 1: mỗi order fit trong một process riêng.
+    """
     r = df["log_return"]
-    return {
-        "ar1": arima_forecast_signal(r, (1, 0, 0)),
-        "ma1": arima_forecast_signal(r, (0, 0, 1)),
-        "arima_1_1_1": arima_forecast_signal(r, (1, 1, 1)),
-    }
+    if orders is None:
+        orders = {
+            "ar1": (1, 0, 0),
+            "ma1": (0, 0, 1),
+            "arima_1_1_1": (1, 1, 1),
+        }
+
+    if n_jobs == 1:
+        return {
+            name: _arima_signal_job(r, order, walk_forward, walk_forward_kwargs)[0]
+            for name, order in orders.items()
+        }
+
+    signals = {}
+    with ProcessPoolExecutor(max_workers=n_jobs) as ex:
+        futures = {
+            name: ex.submit(_arima_signal_job, r, order, walk_forward, walk_forward_kwargs)
+            for name, order in orders.items()
+        }
+        for name, fut in futures.items():
+            signals[name], new_cache = fut.result()
+            _ARIMA_PARAM_CACHE.update(new_cache)
+    return signals
+
+
+def _fit_order_job(values: np.ndarray, order: Tuple[int, int, int]) -> Dict[str, object]:
+    from statsmodels.tsa.arima.model import ARIMA
+
+    try:
+        res = ARIMA(values, order=order).fit()
+        return {"order": order, "aic": float(res.aic), "bic": float(res.bic), "error": None}
+    except Exception as e:
+        return {"order": order, "aic": np.nan, "bic": np.nan, "error": str(e)}
+
+
+def arima_order_search(
+    returns: pd.Series,
+    p_values=(0, 1, 2),
+    d_values=(0, 1),
+    q_values=(0, 1, 2),
+    n_jobs: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Fit toàn bộ lưới order (p, d, q) song song bằng process pool.
+    n_jobs: số process (None = số CPU, 1 = chạy tuần tự).
+    Trả về bảng order, aic, bic, error sắp xếp theo aic tăng dần.
+    """
+    values = returns.dropna().to_numpy(dtype=float)
+    grid = list(itertools.product(p_values, d_values, q_values))
+
+    if n_jobs == 1:
+        rows = [_fit_order_job(values, order) for order in grid]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as ex:
+            rows = list(ex.map(_fit_order_job, itertools.repeat(values), grid))
+
+    return pd.DataFrame(rows).sort_values("aic").reset_index(drop=True)
 
 
 # ============================================================
@@ -108,7 +284,7 @@ def ewma_volatility(returns: pd.Series, span: int = 20) -> pd.Series:
 # ============================================================
 
 def fit_garch_11(returns: pd.Series):
-    """Fit GARCH(1,1). Cần thư viện arch."""
+    """Fit GARCH(1,1). Cần thư viện arch (fit_garch_11_mle không cần)."""
     try:
         from arch import arch_model
     except ImportError:
@@ -120,6 +296,224 @@ def fit_garch_11(returns: pd.Series):
     return model, res
 
 
+GARCH_PARAM_NAMES = ["mu", "omega", "alpha[1]", "beta[1]"]
+
+
+class GarchResult:
+    """
+    Kết quả fit_garch_11_mle, cùng các thuộc tính hay dùng của kết quả arch:
+    params (pd.Series mu, omega, alpha[1], beta[1]), loglikelihood, aic, bic,
+    conditional_volatility. Đơn vị giống arch: return nhân 100.
+    """
+
+    def __init__(self, params, loglikelihood, nobs, conditional_volatility, converged):
+        self.params = pd.Series(params, index=GARCH_PARAM_NAMES, dtype=float)
+        self.loglikelihood = float(loglikelihood)
+        self.nobs = int(nobs)
+        self.aic = -2.0 * self.loglikelihood + 2.0 * len(self.params)
+        self.bic = -2.0 * self.loglikelihood + np.log(self.nobs) * len(self.params)
+        self.conditional_volatility = conditional_volatility
+        self.converged = bool(converged)
+
+    def to_info(self) -> Dict[str, object]:
+        """Dict cùng dạng garch_info trong diagnostics."""
+        return {
+            "params": {k: float(v) for k, v in self.params.items()},
+            "aic": float(self.aic),
+            "bic": float(self.bic),
+        }
+
+
+def _garch_backcast(resid: np.ndarray) -> Tuple[float, float]:
+    """
+    Phương sai khởi tạo kiểu arch: trung bình có trọng số 0.94^i của
+    resid^2 trên tối đa 75 quan sát đầu. Trả về (backcast, d backcast / d mu).
+    """
+    tau = min(75, resid.size)
+    w = 0.94 ** np.arange(tau)
+    w /= w.sum()
+    head = resid[:tau]
+    return float(w @ head ** 2), float(-2.0 * (w @ head))
+
+
+def garch_11_variance(r: np.ndarray, params: np.ndarray) -> np.ndarray:
+    """
+    Phương sai có điều kiện h_t = omega + alpha * e_{t-1}^2 + beta * h_{t-1}
+    (e = r - mu, e_{-1}^2 = h_{-1} = backcast), tính bằng một bộ lọc IIR.
+    """
+    from scipy.signal import lfilter
+
+    mu, omega, alpha, beta = params
+    e = r - mu
+    bc, _ = _garch_backcast(e)
+    e2_prev = np.empty_like(e)
+    e2_prev[0] = bc
+    e2_prev[1:] = e[:-1] ** 2
+    h, _ = lfilter([1.0], [1.0, -beta], omega + alpha * e2_prev, zi=[beta * bc])
+    return h
+
+
+def _garch_nll_grad(params: np.ndarray, r: np.ndarray) -> Tuple[float, np.ndarray]:
+    """
+    Negative log-likelihood Gaussian của GARCH(1,1) và gradient giải tích.
+    Đạo hàm của h theo (omega, alpha, beta, mu) có cùng dạng đệ quy
+    dh_t = x_t + beta * dh_{t-1}, nên cả 4 được lọc trong một lần lfilter.
+    """
+    from scipy.signal import lfilter
+
+    mu, omega, alpha, beta = params
+    e = r - mu
+    bc, dbc = _garch_backcast(e)
+
+    e2_prev = np.empty_like(e)
+    e2_prev[0] = bc
+    e2_prev[1:] = e[:-1] ** 2
+    h, _ = lfilter([1.0], [1.0, -beta], omega + alpha * e2_prev, zi=[beta * bc])
+    h = np.maximum(h, 1e-12)
+
+    h_prev = np.empty_like(h)
+    h_prev[0] = bc
+    h_prev[1:] = h[:-1]
+    de2_prev = np.empty_like(e)
+    de2_prev[0] = dbc
+    de2_prev[1:] = -2.0 * e[:-1]
+
+    # cột: omega, alpha, beta, mu
+    X = np.column_stack([np.ones_like(e), e2_prev, h_prev, alpha * de2_prev])
+    zi = np.array([[0.0, 0.0, 0.0, beta * dbc]])
+    dh, _ = lfilter([1.0], [1.0, -beta], X, axis=0, zi=zi)
+
+    e2 = e ** 2
+    nll = 0.5 * np.sum(np.log(2.0 * np.pi) + np.log(h) + e2 / h)
+
+    g_h = 0.5 * (1.0 / h - e2 / h ** 2)
+    g = g_h @ dh
+    grad = np.array([g[3] - np.sum(e / h), g[0], g[1], g[2]])
+    return float(nll), grad
+
+
+def fit_garch_11_mle(
+    returns: pd.Series,
+    start_params: Optional[object] = None,
+    scale: float = 100.0,
+) -> GarchResult:
+    """
+    GARCH(1,1) mean hằng, nhiễu Gaussian, ước lượng MLE không cần arch.
+    - phương sai đệ quy bằng lfilter, gradient giải tích (SLSQP, alpha + beta < 1)
+    - start_params: params của lần fit trước (GarchResult, pd.Series, dict
+      hoặc mảng [mu, omega, alpha, beta]) để warm start
+    - scale: nhân return trước khi fit (100 như fit_garch_11)
+    """
+    from scipy.optimize import minimize
+
+    r_s = returns.dropna() * scale
+    r = r_s.to_numpy(dtype=float)
+    if r.size < 10:
+        raise ValueError("Not enough observations for GARCH(1,1)")
+
+    var = float(r.var())
+    if start_params is None:
+        x0 = np.array([r.mean(), var * 0.05, 0.05, 0.90])
+    else:
+        if isinstance(start_params, GarchResult):
+            start_params = start_params.params
+        if isinstance(start_params, dict):
+            start_params = pd.Series(start_params)
+        if isinstance(start_params, pd.Series):
+            start_params = start_params.reindex(GARCH_PARAM_NAMES)
+        x0 = np.asarray(start_params, dtype=float)
+
+    # tối ưu theo thứ tự (mu, omega, alpha, beta) như GARCH_PARAM_NAMES
+    bounds = [
+        (-10.0 * abs(r).max(), 10.0 * abs(r).max()),
+        (1e-8 * var, 10.0 * var),
+        (0.0, 1.0),
+        (0.0, 1.0),
+    ]
+    x0 = np.clip(x0, [b[0] for b in bounds], [b[1] for b in bounds])
+    constraints = [{
+        "type": "ineq",
+        "fun": lambda x: 1.0 - 1e-6 - x[2] - x[3],
+        "jac": lambda x: np.array([0.0, 0.0, -1.0, -1.0]),
+    }]
+
+    res = minimize(
+        _garch_nll_grad, x0, args=(r,), jac=True, method="SLSQP",
+        bounds=bounds, constraints=constraints, options={"maxiter": 200, "ftol": 1e-10},
+    )
+    h = garch_11_variance(r, res.x)
+    cond_vol = pd.Series(np.sqrt(h), index=r_s.index, name="cond_vol")
+    return GarchResult(res.x, -res.fun, r.size, cond_vol, res.success)
+
+
+def _garch_batch_job(returns: pd.Series, start_params: Optional[object]) -> Dict[str, object]:
+    try:
+        return fit_garch_11_mle(returns, start_params=start_params).to_info()
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def fit_garch_11_batch(
+    returns: pd.DataFrame,
+    start_params: Optional[Dict[str, object]] = None,
+    n_jobs: int = 1,
+) -> Dict[str, Dict[str, object]]:
+    """
+    Fit GARCH(1,1) cho mọi cột của returns (Date x Symbol).
+    Trả về {symbol: garch_info} ({"params", "aic", "bic"} hoặc {"error"}).
+    start_params: {symbol: params của lần fit trước} để warm start.
+    n_jobs > 1: chia các mã cho nhiều process.
+    """
+    start_params = start_params or {}
+    cols = list(returns.columns)
+    if n_jobs == 1:
+        return {c: _garch_batch_job(returns[c], start_params.get(c)) for c in cols}
+
+    with ProcessPoolExecutor(max_workers=n_jobs) as ex:
+        infos = ex.map(
+            _garch_batch_job,
+            [returns[c] for c in cols],
+            [start_params.get(c) for c in cols],
+            chunksize=max(1, len(cols) // (4 * n_jobs)),
+        )
+        return dict(zip(cols, infos))
+
+
+def garch_volatility_forecast(
+    returns: pd.Series,
+    min_train: int = 250,
+    refit_every: int = 250,
+    scale: float = 100.0,
+) -> pd.Series:
+    """
+    Dự báo out-of-sample một bước sigma_t | r_0..r_{t-1} theo GARCH(1,1).
+    Params được fit lại mỗi refit_every kỳ (warm start từ lần trước) trên
+    toàn bộ dữ liệu trước đó; giữa hai lần fit, h_t chỉ cập nhật đệ quy
+    h_t = omega + alpha * e_{t-1}^2 + beta * h_{t-1}. Trả về vol theo ngày
+    (cùng đơn vị rolling_vol), NaN trong min_train kỳ đầu.
+    """
+    from scipy.signal import lfilter
+
+    r = returns.dropna()
+    x = r.to_numpy(dtype=float) * scale
+    n = x.size
+    out = np.full(n, np.nan)
+
+    res = None
+    for start in range(min_train, n, refit_every):
+        end = min(start + refit_every, n)
+        res = fit_garch_11_mle(r.iloc[:start], start_params=res, scale=scale)
+
+        # tiếp tục đệ quy từ h_{start-1} của lần fit này
+        mu, omega, alpha, beta = res.params.to_numpy()
+        h_last = float(res.conditional_volatility.iloc[-1]) ** 2
+        e2_prev = (x[start - 1:end - 1] - mu) ** 2
+        h, _ = lfilter([1.0], [1.0, -beta], omega + alpha * e2_prev, zi=[beta * h_last])
+        out[start:end] = np.sqrt(h) / scale
+
+    return pd.Series(out, index=r.index, name="vol_fc_garch").reindex(returns.index)
+
+
 # ============================================================
 # 5. BOLLINGER BANDS + MEAN REVERSION
 # ============================================================
@@ -142,12 +536,91 @@ def bollinger_signal(df: pd.DataFrame) -> pd.Series:
     return pos
 
 
+def _ffill_nonzero(sig: np.ndarray) -> np.ndarray:
+    """Giữ tín hiệu khác 0 gần nhất theo từng cột (replace(0, nan).ffill().fillna(0))."""
+    idx = np.where(sig != 0, np.arange(sig.shape[0])[:, None], 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return np.take_along_axis(sig, idx, axis=0)
+
+
+def bollinger_signal_panel(prices: pd.DataFrame, window: int = 20, n_std: float = 2.0) -> pd.DataFrame:
+    """
+    bollinger_signal cho cả panel giá Close (Date x Symbol) trong một lượt.
+    Mỗi cột chỉ dùng các ngày có giá của nó, nên kết quả giống chạy
+    add_bollinger_bands + bollinger_signal trên từng mã.
+    Trả về position int8 {-1, 0, 1} cùng shape với prices (0 ở ngày không có giá).
+    """
+    values = prices.to_numpy(dtype=float)
+    out = np.zeros(values.shape, dtype=np.int8)
+    has_data = ~np.isnan(values).all(axis=0)
+
+    if has_data.any():
+        Z, lengths, valid = _left_align(values[:, has_data])
+        roll = pd.DataFrame(Z).rolling(window)
+        mid = roll.mean().to_numpy()
+        sd = roll.std().to_numpy()
+        upper = mid + n_std * sd
+        lower = mid - n_std * sd
+
+        cond_long = (Z[:-1] < lower[:-1]) & (Z[1:] > lower[1:])
+        cond_short = (Z[:-1] > upper[:-1]) & (Z[1:] < upper[1:])
+        sig = np.zeros(Z.shape, dtype=np.int8)
+        sig[1:][cond_long] = 1
+        sig[1:][cond_short] = -1
+        pos = _ffill_nonzero(sig)
+
+        packed = np.arange(Z.shape[0])[:, None] < lengths[None, :]
+        sub = np.zeros(valid.shape, dtype=np.int8)
+        sub.T[valid.T] = pos.T[packed.T]
+        out[:, has_data] = sub
+
+    return pd.DataFrame(out, index=prices.index, columns=prices.columns)
+
+
 # ============================================================
 # 6. VOLATILITY POSITION SIZING
 # ============================================================
 
-def volatility_position_sizing(df: pd.DataFrame, target_vol: float = 0.15) -> pd.Series:
-    vol = df["rolling_vol"] * np.sqrt(252)
+def rolling_volatility_forecast(returns: pd.Series, window: int = 20) -> pd.Series:
+    """Dự báo một bước: std của window return trước ngày t (không gồm r_t)."""
+    return rolling_volatility(returns, window).shift(1).rename("vol_fc_rolling")
+
+
+def ewma_volatility_forecast(returns: pd.Series, span: int = 20) -> pd.Series:
+    """Dự báo một bước: EWMA vol tính đến ngày t-1."""
+    return ewma_volatility(returns, span).shift(1).rename("vol_fc_ewma")
+
+
+VOL_FORECASTERS = {
+    "rolling": rolling_volatility_forecast,
+    "ewma": ewma_volatility_forecast,
+    "garch": garch_volatility_forecast,
+}
+
+
+def forecast_volatility(returns: pd.Series, method: str = "rolling", **kwargs) -> pd.Series:
+    """
+    Dự báo vol ngày out-of-sample một bước theo method trong VOL_FORECASTERS
+    (rolling, ewma, garch). kwargs truyền cho forecaster tương ứng.
+    """
+    if method not in VOL_FORECASTERS:
+        raise ValueError(f"Unknown volatility forecaster '{method}'. Available: {', '.join(VOL_FORECASTERS)}")
+    return VOL_FORECASTERS[method](returns, **kwargs)
+
+
+def volatility_position_sizing(
+    df: pd.DataFrame,
+    target_vol: float = 0.15,
+    vol: Optional[pd.Series] = None,
+) -> pd.Series:
+    """
+    Position = target_vol / vol năm hoá, cắt về [-1, 1].
+    vol: vol ngày dùng để sizing, ví dụ forecast_volatility(...);
+    mặc định là cột rolling_vol của df.
+    """
+    if vol is None:
+        vol = df["rolling_vol"]
+    vol = vol * np.sqrt(252)
     pos = (target_vol / vol).clip(-1, 1).fillna(0)
     pos.name = "position_vol_sizing"
     return pos
@@ -157,28 +630,129 @@ def volatility_position_sizing(df: pd.DataFrame, target_vol: float = 0.15) -> pd
 # 7. KALMAN FILTER (Random Walk Model)
 # ============================================================
 
-def kalman_filter_trend(price: pd.Series) -> Tuple[pd.Series, pd.Series]:
-    z = price.dropna()
-    n = len(z)
-
-    Q, R = 1e-4, 1e-2
-
-    xhat = np.zeros(n)
-    P = np.zeros(n)
-
-    xhat[0] = z.iloc[0]
-    P[0] = 1
-
+def _left_align(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Dồn các giá trị hợp lệ (không NaN) của mỗi cột về đầu mảng, giữ thứ tự
+    thời gian. Tương đương dropna riêng từng cột rồi xếp chung một ma trận,
+    để các filter chỉ phụ thuộc số bước có thể chạy batch.
+
+    Phần đệm phía sau lặp lại giá trị cuối của cột, kết quả ở đó bị bỏ đi.
+    Trả về (Z, lengths, valid) với Z shape (max_length x n_cols).
+    """
+    valid = ~np.isnan(values)
+    lengths = valid.sum(axis=0)
+    n_max = int(lengths.max()) if lengths.size else 0
+
+    flat = values.T[valid.T]
+    packed = np.arange(n_max)[None, :] < lengths[:, None]
+    ZT = np.repeat(flat[np.cumsum(lengths) - 1][:, None], n_max, axis=1)
+    ZT[packed] = flat
+    return ZT.T, lengths, valid
+
+
+def kalman_gain_sequence(
+    n: int,
+    Q: float = 1e-4,
+    R: float = 1e-2,
+    P0: float = 1.0,
+    tol: float = 1e-15,
+) -> Tuple[np.ndarray, int]:
+    """
+    Dãy Kalman gain K_t cho mô hình random walk với Q, R cố định.
+
+    K_t không phụ thuộc dữ liệu nên chỉ cần tính một lần. Vòng lặp dừng khi
+    K_t hội tụ (|K_t - K_{t-1}| <= tol), phần còn lại điền bằng K steady-state.
+    K[0] = 1 tương ứng với xhat[0] = z[0].
+
+    Trả về (K, t_conv): t_conv là bước đầu tiên mà K đã là steady-state.
+    """
+    K = np.empty(n)
+    if n == 0:
+        return K, 0
+    K[0] = 1.0
+
+    P = P0
+    t_conv = n
     for t in range(1, n):
-        x_minus = xhat[t-1]
-        P_minus = P[t-1] + Q
-
-        K = P_minus / (P_minus + R)
+        P_minus = P + Q
+        K[t] = P_minus / (P_minus + R)
+        P = (1 - K[t]) * P_minus
+        if t > 1 and abs(K[t] - K[t-1]) <= tol:
+            K[t:] = K[t]
+            t_conv = t
+            break
+    return K, t_conv
+
+
+def _kalman_filter_matrix(Z: np.ndarray, Q: float, R: float) -> np.ndarray:
+    """
+    Chạy filter trên ma trận Z (n_steps x n_series) cùng lúc cho mọi cột.
+
+    Giai đoạn gain còn thay đổi chạy vòng lặp ngắn (vector hóa theo cột),
+    giai đoạn steady-state là filter tuyến tính bậc 1 nên dùng lfilter:
+      x_t = (1 - K) x_{t-1} + K z_t
+    """
+    from scipy.signal import lfilter
+
+    n = Z.shape[0]
+    X = np.empty_like(Z, dtype=float)
+    if n == 0:
+        return X
+
+    K, t_conv = kalman_gain_sequence(n, Q=Q, R=R)
+
+    X[0] = Z[0]
+    for t in range(1, t_conv):
+        X[t] = X[t-1] + K[t] * (Z[t] - X[t-1])
+
+    if t_conv < n:
+        k = K[t_conv]
+        zi = ((1 - k) * X[t_conv-1])[None, :]
+        X[t_conv:], _ = lfilter([k], [1.0, -(1 - k)], Z[t_conv:], axis=0, zi=zi)
+    return X
+
+
+def kalman_filter_trend_batch(
+    prices: pd.DataFrame,
+    Q: float = 1e-4,
+    R: float = 1e-2,
+) -> Dict[str, Tuple[pd.Series, pd.Series]]:
+    """
+    Kalman filter trend cho nhiều mã cùng lúc.
+
+    prices: DataFrame Date x Symbol. Mỗi cột được dropna riêng như
+    kalman_filter_trend; vì gain chỉ phụ thuộc số bước, các cột được
+    dồn về đầu mảng (left-aligned) và lọc chung trong một ma trận.
+
+    Trả về dict {symbol: (state, signal)} giống output của kalman_filter_trend.
+    """
+    cols = [c for c in prices.columns if prices[c].notna().any()]
+    if not cols:
+        return {}
+
+    Z, lengths, valid = _left_align(prices[cols].to_numpy(dtype=float))
+    X = _kalman_filter_matrix(Z, Q=Q, R=R)
+
+    out = {}
+    for j, col in enumerate(cols):
+        idx = prices.index[valid[:, j]]
+        state = pd.Series(X[:lengths[j], j], index=idx, name="kalman_state")
+        signal = np.sign(state.diff()).fillna(0)
+        signal.name = "position_kalman"
+        out[col] = (state, signal)
+    return out
+
+
+def kalman_filter_trend(
+    price: pd.Series,
+    Q: float = 1e-4,
+    R: float = 1e-2,
+) -> Tuple[pd.Series, pd.Series]:
+    z = price.dropna()
 
-        xhat[t] = x_minus + K * (z.iloc[t] - x_minus)
-        P[t] = (1 - K) * P_minus
+    X = _kalman_filter_matrix(z.to_numpy(dtype=float)[:, None], Q=Q, R=R)
 
-    state = pd.Series(xhat, index=z.index, name="kalman_state")
+    state = pd.Series(X[:, 0], index=z.index, name="kalman_state")
     signal = np.sign(state.diff()).fillna(0)
     signal.name = "position_kalman"
 
@@ -189,41 +763,158 @@ def kalman_filter_trend(price: pd.Series) -> Tuple[pd.Series, pd.Series]:
 # 8. PARTICLE FILTER
 # ============================================================
 
+def _resample_indices(
+    weights: np.ndarray,
+    rng: np.random.Generator,
+    method: str = "systematic",
+) -> np.ndarray:
+    """
+    Systematic / stratified resampling O(N) cho nhiều hàng cùng lúc.
+
+    weights: (n_rows x n_particles), mỗi hàng đã chuẩn hóa tổng = 1.
+    Trả về chỉ số particle được chọn, cùng shape với weights.
+
+    Vị trí thứ k là (u_k + k) / N. Thay vì tìm kiếm từng vị trí, đếm số vị
+    trí nhỏ hơn mỗi giá trị CDF (công thức đóng), suy ra số bản sao của
+    từng particle rồi np.repeat.
+    """
+    n_rows, n = weights.shape
+    scaled = n * np.cumsum(weights, axis=1)
+    scaled[:, -1] = n
+
+    if method == "systematic":
+        u = rng.random((n_rows, 1))
+        below = np.clip(np.ceil(scaled - u), 0, n)
+    elif method == "stratified":
+        u = rng.random((n_rows, n))
+        fl = np.minimum(np.floor(scaled), n).astype(np.int64)
+        u_at = np.take_along_axis(u, np.minimum(fl, n - 1), axis=1)
+        below = fl + ((fl < n) & (u_at < scaled - fl))
+    else:
+        raise ValueError("method must be 'systematic' or 'stratified'.")
+
+    counts = np.diff(below.astype(np.int64), axis=1, prepend=0)
+    flat = np.repeat(np.arange(n_rows * n), counts.ravel())
+    return flat.reshape(n_rows, n) - np.arange(n_rows)[:, None] * n
+
+
+def particle_filter_matrix(
+    Y: np.ndarray,
+    n_particles: int = 500,
+    process_std=0.01,
+    obs_std=0.02,
+    seed=None,
+    resample: str = "systematic",
+) -> np.ndarray:
+    """
+    Particle filter (random walk + nhiễu Gaussian) chạy batch.
+
+    Y: ma trận quan sát (n_steps x n_series), không có NaN.
+    Particles là mảng (n_series x n_particles), mỗi bước thời gian xử lý toàn
+    bộ series bằng numpy. Weights giữ ở dạng log để tránh underflow.
+
+    process_std, obs_std có thể là số hoặc mảng (n_series,), dùng để chạy
+    nhiều bộ tham số trên cùng một chuỗi (lặp cột của Y).
+    seed: int hoặc np.random.Generator để kết quả tái lập được.
+
+    Trả về ước lượng E[x_t | y_1..t] shape (n_steps x n_series).
+    """
+    if resample not in ("systematic", "stratified"):
+        raise ValueError("resample must be 'systematic' or 'stratified'.")
+
+    Y = np.asarray(Y, dtype=float)
+    if Y.ndim == 1:
+        Y = Y[:, None]
+    n_steps, n_series = Y.shape
+    rng = np.random.default_rng(seed)
+
+    process_std = np.broadcast_to(np.asarray(process_std, dtype=float), (n_series,))[:, None]
+    obs_std = np.broadcast_to(np.asarray(obs_std, dtype=float), (n_series,))[:, None]
+
+    particles = np.zeros((n_series, n_particles))
+    log_w = np.full((n_series, n_particles), -np.log(n_particles))
+    estimates = np.empty((n_steps, n_series))
+    noise = np.empty((n_series, n_particles))
+
+    for t in range(n_steps):
+        rng.standard_normal(out=noise)
+        noise *= process_std
+        particles += noise
+
+        # log-likelihood Gaussian, bỏ hằng số vì weights được chuẩn hóa lại
+        log_w += -0.5 * ((Y[t][:, None] - particles) / obs_std) ** 2
+
+        # chuẩn hóa trong log-space (log-sum-exp)
+        m = log_w.max(axis=1, keepdims=True)
+        w = np.exp(log_w - m)
+        total = w.sum(axis=1, keepdims=True)
+        w /= total
+        log_w -= m + np.log(total)
+
+        estimates[t] = np.sum(particles * w, axis=1)
+
+        neff = 1.0 / np.sum(w ** 2, axis=1)
+        rows = np.flatnonzero(neff < n_particles / 2)
+        if rows.size:
+            idx = _resample_indices(w[rows], rng, method=resample)
+            particles[rows] = np.take_along_axis(particles[rows], idx, axis=1)
+            log_w[rows] = -np.log(n_particles)
+
+    return estimates
+
+
+def particle_filter_batch(
+    returns: pd.DataFrame,
+    n_particles: int = 500,
+    process_std: float = 0.01,
+    obs_std: float = 0.02,
+    seed=None,
+    resample: str = "systematic",
+) -> pd.DataFrame:
+    """
+    particle_filter_signal cho nhiều mã: returns là DataFrame Date x Symbol.
+    Mỗi cột được dropna riêng (như bản một mã), trả về DataFrame position
+    Date x Symbol, NaN ở các ngày mã đó không có dữ liệu.
+    """
+    cols = [c for c in returns.columns if returns[c].notna().any()]
+    out = pd.DataFrame(np.nan, index=returns.index, columns=returns.columns)
+    if not cols:
+        return out
+
+    Y, lengths, valid = _left_align(returns[cols].to_numpy(dtype=float))
+    est = particle_filter_matrix(
+        Y,
+        n_particles=n_particles,
+        process_std=process_std,
+        obs_std=obs_std,
+        seed=seed,
+        resample=resample,
+    )
+    for j, col in enumerate(cols):
+        out.loc[valid[:, j], col] = np.sign(est[:lengths[j], j])
+    return out
+
+
 def particle_filter_signal(
     returns: pd.Series,
     n_particles: int = 500,
     process_std: float = 0.01,
     obs_std: float = 0.02,
+    seed=None,
+    resample: str = "systematic",
 ) -> pd.Series:
 
     r = returns.dropna()
-    particles = np.zeros(n_particles)
-    weights = np.ones(n_particles) / n_particles
 
-    sig = []
-
-    for y in r:
-        particles += np.random.normal(0, process_std, n_particles)
-
-        likelihood = (
-            np.exp(-0.5 * ((y - particles) / obs_std)**2) /
-            (obs_std * np.sqrt(2 * np.pi))
-        )
-
-        weights *= likelihood
-        weights += 1e-12
-        weights /= weights.sum()
-
-        estimate = np.sum(particles * weights)
-        sig.append(np.sign(estimate))
-
-        neff = 1.0 / np.sum(weights**2)
-        if neff < n_particles / 2:
-            idx = np.random.choice(n_particles, n_particles, p=weights)
-            particles = particles[idx]
-            weights = np.ones(n_particles) / n_particles
-
-    return pd.Series(sig, index=r.index, name="position_particle")
+    est = particle_filter_matrix(
+        r.to_numpy(dtype=float),
+        n_particles=n_particles,
+        process_std=process_std,
+        obs_std=obs_std,
+        seed=seed,
+        resample=resample,
+    )
+    return pd.Series(np.sign(est[:, 0]), index=r.index, name="position_particle")
 
 
 # ============================================================
@@ -252,48 +943,211 @@ def position_size_risk(
 # 10. RNN / LSTM (EXTENSION)
 # ============================================================
 
-import torch
-import torch.nn as nn
-
-
-class LSTMForecaster(nn.Module):
-    def __init__(self, hidden=32):
-        super().__init__()
-        self.lstm = nn.LSTM(1, hidden, batch_first=True)
-        self.fc = nn.Linear(hidden, 1)
-
-    def forward(self, x):
-        out, _ = self.lstm(x)
-        return self.fc(out[:, -1])
-
-
-def lstm_signal(returns: pd.Series, lookback=20, epochs=5) -> pd.Series:
-    r = returns.dropna().values.astype(np.float32)
-    X, y = [], []
-
-    for i in range(len(r) - lookback):
-        X.append(r[i:i+lookback])
-        y.append(r[i+lookback])
-
-    X = np.array(X)[:, :, None]
-    y = np.array(y)[:, None]
-
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    model = LSTMForecaster().to(device)
-    opt = torch.optim.Adam(model.parameters(), lr=1e-3)
+_LSTM_CLASS = None
+
+
+def _lstm_forecaster_class():
+    """Tạo class LSTMForecaster lần đầu cần dùng (import torch tại đây)."""
+    global _LSTM_CLASS
+    if _LSTM_CLASS is None:
+        import torch.nn as nn
+
+        class LSTMForecaster(nn.Module):
+            def __init__(self, hidden=32):
+                super().__init__()
+                self.lstm = nn.LSTM(1, hidden, batch_first=True)
+                self.fc = nn.Linear(hidden, 1)
+
+            def forward(self, x):
+                out, _ = self.lstm(x)
+                return self.fc(out[:, -1])
+
+        _LSTM_CLASS = LSTMForecaster
+    return _LSTM_CLASS
+
+
+def __getattr__(name):
+    # giữ tương thích `from models_full import LSTMForecaster`
+    if name == "LSTMForecaster":
+        return _lstm_forecaster_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _lstm_checkpoint_path(
+    checkpoint_dir: str,
+    symbol: Optional[str],
+    train_values: np.ndarray,
+    config: Dict[str, object],
+) -> str:
+    """
+    File checkpoint theo symbol + hash(dữ liệu train, hyper-params). Với lần
+    fine-tune, config chứa lịch block (refit_every) và tên checkpoint trước
+    đó (parent), vì trọng số phụ thuộc cả chuỗi các lần train trước.
+    """
+    h = hashlib.sha1(np.ascontiguousarray(train_values).tobytes())
+    h.update(repr(sorted(config.items())).encode())
+    name = f"lstm_{symbol or 'series'}_{h.hexdigest()[:12]}.pt"
+    return os.path.join(checkpoint_dir, name)
+
+
+def _lstm_fit(
+    model,
+    windows: np.ndarray,
+    targets: np.ndarray,
+    n_train: int,
+    epochs: int,
+    batch_size: int,
+    val_ratio: float,
+    lr: float,
+    device: str,
+    seed: Optional[int],
+):
+    """
+    Train mini-batch trên windows[:n_train]. val_ratio cuối (theo thời gian)
+    dùng làm validation, giữ lại trọng số có val loss thấp nhất.
+    """
+    import torch
+    import torch.nn as nn
+    from torch.utils.data import BatchSampler, DataLoader, RandomSampler
+
+    def gather(idx):
+        # chỉ copy đúng các window của batch, không materialize toàn bộ X
+        idx = np.asarray(idx)
+        X = torch.from_numpy(np.ascontiguousarray(windows[idx])[:, :, None])
+        y = torch.from_numpy(targets[idx][:, None])
+        return X.to(device), y.to(device)
+
+    n_val = int(n_train * val_ratio)
+    n_fit = n_train - n_val
+    if n_fit < 1:
+        return model
+
+    gen = torch.Generator()
+    if seed is not None:
+        gen.manual_seed(seed)
+    sampler = BatchSampler(RandomSampler(range(n_fit), generator=gen), batch_size, drop_last=False)
+    loader = DataLoader(np.arange(n_fit), sampler=sampler, batch_size=None, collate_fn=gather)
+
+    opt = torch.optim.Adam(model.parameters(), lr=lr)
     loss_fn = nn.MSELoss()
 
-    X_t = torch.tensor(X).to(device)
-    y_t = torch.tensor(y).to(device)
-
+    best_loss, best_state = np.inf, None
     for _ in range(epochs):
-        opt.zero_grad()
-        loss = loss_fn(model(X_t), y_t)
-        loss.backward()
-        opt.step()
-
-    preds = model(X_t).detach().cpu().numpy().ravel()
-    sig = np.sign(preds)
+        model.train()
+        for X_b, y_b in loader:
+            opt.zero_grad()
+            loss = loss_fn(model(X_b), y_b)
+            loss.backward()
+            opt.step()
+
+        if n_val:
+            model.eval()
+            with torch.no_grad():
+                X_v, y_v = gather(np.arange(n_fit, n_train))
+                val_loss = float(loss_fn(model(X_v), y_v))
+            if val_loss < best_loss:
+                best_loss = val_loss
+                best_state = {k: v.detach().clone() for k, v in model.state_dict().items()}
+
+    if best_state is not None:
+        model.load_state_dict(best_state)
+    return model
+
+
+def _lstm_predict(model, windows: np.ndarray, batch_size: int, device: str) -> np.ndarray:
+    import torch
+
+    model.eval()
+    out = []
+    with torch.no_grad():
+        for i in range(0, len(windows), batch_size):
+            X = torch.from_numpy(np.ascontiguousarray(windows[i:i + batch_size])[:, :, None]).to(device)
+            out.append(model(X).cpu().numpy().ravel())
+    return np.concatenate(out) if out else np.zeros(0, dtype=np.float32)
+
+
+def lstm_signal(
+    returns: pd.Series,
+    lookback=20,
+    epochs=5,
+    batch_size: int = 256,
+    train_ratio: float = 0.7,
+    val_ratio: float = 0.1,
+    refit_every: Optional[int] = None,
+    finetune_epochs: int = 1,
+    lr: float = 1e-3,
+    num_threads: Optional[int] = None,
+    checkpoint_dir: Optional[str] = None,
+    symbol: Optional[str] = None,
+    seed: Optional[int] = 0,
+) -> pd.Series:
+    """
+    Tín hiệu = sign(dự báo LSTM cho return kế tiếp), chỉ out-of-sample.
+
+    - Window lookback tạo bằng sliding_window_view (view, không copy);
+      mỗi mini-batch chỉ copy các window của batch đó.
+    - Train trên train_ratio đầu (val_ratio cuối của phần train làm
+      validation), các ngày train có position 0.
+    - Walk-forward: phần test dự báo theo block refit_every phiên; đầu mỗi
+      block model được fine-tune thêm finetune_epochs trên dữ liệu đã có.
+      refit_every=None: không fine-tune.
+    - num_threads: số thread CPU của torch (None = giữ nguyên).
+    - checkpoint_dir: cache state_dict mỗi lần train theo symbol + dữ liệu +
+      chuỗi các lần train trước, chạy lại sẽ load thay vì train lại.
+    """
+    import torch
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    if num_threads is not None:
+        torch.set_num_threads(num_threads)
+    if seed is not None:
+        torch.manual_seed(seed)
+
+    LSTMForecaster = _lstm_forecaster_class()
+
+    r_all = returns.dropna()
+    r = r_all.to_numpy(dtype=np.float32)
+    n = len(r) - lookback
+    idx = r_all.index[lookback:]
+    if n <= 0:
+        return pd.Series(0.0, index=idx, name="position_lstm")
+
+    windows = sliding_window_view(r, lookback)[:n]   # windows[i] = r[i:i+lookback]
+    targets = r[lookback:]
 
-    idx = returns.dropna().index[lookback:]
-    return pd.Series(sig, index=idx, name="position_lstm")
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    model = LSTMForecaster().to(device)
+    config = {"lookback": lookback, "epochs": epochs, "batch_size": batch_size,
+              "val_ratio": val_ratio, "lr": lr, "seed": seed}
+    parent = None   # tên checkpoint của lần train trước (lineage)
+
+    def fit(n_train: int, n_epochs: int):
+        nonlocal parent
+        path = None
+        if checkpoint_dir:
+            os.makedirs(checkpoint_dir, exist_ok=True)
+            key = {**config, "epochs": n_epochs}
+            if parent is not None:
+                key.update(refit_every=refit_every, parent=parent)
+            path = _lstm_checkpoint_path(checkpoint_dir, symbol, r[:n_train + lookback], key)
+            parent = os.path.basename(path)
+            if os.path.exists(path):
+                model.load_state_dict(torch.load(path, map_location=device))
+                return
+        _lstm_fit(model, windows, targets, n_train, n_epochs, batch_size,
+                  val_ratio, lr, device, seed)
+        if path:
+            torch.save(model.state_dict(), path)
+
+    split = int(n * train_ratio)
+    fit(split, epochs)
+
+    preds = np.zeros(n, dtype=np.float32)
+    step = refit_every or (n - split) or 1
+    for start in range(split, n, step):
+        if start > split:
+            fit(start, finetune_epochs)
+        stop = min(start + step, n)
+        preds[start:stop] = _lstm_predict(model, windows[start:stop], batch_size, device)
+
+    return pd.Series(np.sign(preds), index=idx, name="position_lstm")
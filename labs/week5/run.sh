@@ -2,15 +2,15 @@
 
 set -euo pipefail
 
-# Path to per-symbol yfinance data
-PER_SYMBOL_DIR="/workspaces/CF_Tien23280088_Hoang23280060/week1-3/data/yfinance/per_symbol"
-
 DEFAULT_FEE_BPS=5.0
 
 # Move to folder where run.sh is (week5)
 PROJECT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 cd "$PROJECT_DIR"
 
+# Path to per-symbol yfinance data
+PER_SYMBOL_DIR="${PER_SYMBOL_DIR:-$PROJECT_DIR/../week123/data/yfinance/per_symbol}"
+
 run_one_csv() {
     local csv_path="$1"
     local fee_bps="$2"
@@ -33,7 +33,8 @@ run_one_csv() {
     echo "-------------------------------------------"
 }
 
-# Case 1: no arguments → run all CSV files
+# Case 1: no arguments → run all CSV files in one batch process
+# (one interpreter + process pool, results consolidated in results.jsonl)
 if [ $# -eq 0 ]; then
     echo "Running all CSV files in: $PER_SYMBOL_DIR"
 
@@ -45,9 +46,7 @@ if [ $# -eq 0 ]; then
         exit 1
     fi
 
-    for csv in "${CSV_FILES[@]}"; do
-        run_one_csv "$csv" "$DEFAULT_FEE_BPS"
-    done
+    python3 batch.py "$PER_SYMBOL_DIR" --fee_bps "$DEFAULT_FEE_BPS" --out results.jsonl
 
     echo "==========================================="
     echo " All jobs finished."
@@ -5,9 +5,11 @@ import pandas as pd
 
 from config import BETA_MIN_OBS
 from data_loader import load_ohlcv
+from returns_volume import build_log_price_panel
 
 """
 Tính beta với SPY cho toàn universe.
+compute_all_betas_panel: beta SPY + factor tuỳ chọn cho mọi mã trong một lần hồi quy.
 """
 
 
@@ -47,3 +49,98 @@ def compute_all_betas(tickers, spy_ret):
             rows.append(res)
     df_beta = pd.DataFrame(rows)
     return df_beta
+
+
+def factor_regression(returns, factors, min_obs=BETA_MIN_OBS):
+    """
+    Hồi quy r_i = alpha + sum_k beta_ik f_k + e cho mọi cột của returns cùng lúc.
+
+    returns: (T, N) return các mã, NaN = thiếu; factors: (T, K) return factor
+    (SPY, ETF ngành, ...) cùng các ngày. Mỗi mã dùng mask riêng (ngày mã và
+    mọi factor đều có giá trị); X'X và X'y của cả N mã được tính bằng vài
+    phép nhân ma trận rồi giải một lượt np.linalg.solve (N, K+1, K+1).
+
+    Trả về dict mảng: alpha (N,), beta (N, K), r2, resid_vol (daily), n_obs;
+    NaN ở mã có ít hơn min_obs quan sát.
+    """
+    R = np.asarray(returns, dtype=float)
+    F = np.asarray(factors, dtype=float)
+    if F.ndim == 1:
+        F = F[:, None]
+    T, N = R.shape
+    K = F.shape[1]
+
+    X = np.column_stack([np.ones(T), F])                        # (T, K+1)
+    row_ok = ~np.isnan(F).any(axis=1)
+    M = (~np.isnan(R) & row_ok[:, None]).astype(float)         # (T, N)
+    X = np.where(row_ok[:, None], X, 0.0)
+    Y = np.where(M > 0, R, 0.0)
+
+    n = M.sum(axis=0)
+    XX = (X[:, :, None] * X[:, None, :]).reshape(T, -1)        # (T, (K+1)^2)
+    XtX = (XX.T @ M).T.reshape(N, K + 1, K + 1)
+    Xty = (X.T @ Y).T                                          # (N, K+1)
+
+    ok = n >= max(min_obs, K + 2)
+    ok &= np.linalg.det(np.where(ok[:, None, None], XtX, np.eye(K + 1))) > 0
+    coef = np.full((N, K + 1), np.nan)
+    if ok.any():
+        coef[ok] = np.linalg.solve(XtX[ok], Xty[ok][:, :, None])[:, :, 0]
+
+    resid = (Y - X @ np.nan_to_num(coef).T) * M
+    ssr = (resid * resid).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = Y.sum(axis=0) / n
+        sst = ((Y - mean) ** 2 * M).sum(axis=0)
+        r2 = np.where(sst > 0, 1.0 - ssr / sst, np.nan)
+        resid_vol = np.sqrt(ssr / (n - K - 1))
+
+    r2[~ok] = np.nan
+    resid_vol[~ok] = np.nan
+    return {
+        "alpha": coef[:, 0],
+        "beta": coef[:, 1:],
+        "r2": r2,
+        "resid_vol": resid_vol,
+        "n_obs": n.astype(np.int64),
+    }
+
+
+def compute_all_betas_panel(tickers, spy_ret, factor_rets=None, min_obs=BETA_MIN_OBS):
+    """
+    Beta với SPY (và các factor trong factor_rets nếu có) cho cả universe
+    trong một lần hồi quy trên return panel.
+
+    spy_ret: DataFrame Date, r_m (compute_spy_returns).
+    factor_rets: DataFrame cột Date + mỗi factor một cột log return, tuỳ chọn.
+    Trả về DataFrame ticker, beta_spy, [beta_<factor>...], alpha, r2,
+    resid_vol (annualized), n_obs; cùng cột ticker, beta_spy như compute_all_betas.
+    Khác compute_all_betas ở chỗ return sau ngày mã bị thiếu giá là NaN
+    thay vì return gộp nhiều ngày.
+    """
+    start_date = spy_ret["Date"].min()
+    end_date = spy_ret["Date"].max()
+
+    panel = build_log_price_panel(
+        tickers, min_obs=0, start=start_date, end=end_date, dtype=np.float64
+    )
+    if panel is None:
+        return pd.DataFrame(columns=["ticker", "beta_spy"])
+
+    factors = spy_ret.set_index("Date")[["r_m"]].rename(columns={"r_m": "spy"})
+    if factor_rets is not None:
+        factors = factors.join(factor_rets.set_index("Date"), how="left")
+
+    rets = panel.diff()
+    factors = factors.reindex(rets.index)
+
+    res = factor_regression(rets.to_numpy(), factors.to_numpy(), min_obs=min_obs)
+
+    df_beta = pd.DataFrame({"ticker": rets.columns})
+    for k, name in enumerate(factors.columns):
+        df_beta[f"beta_{name}"] = res["beta"][:, k]
+    df_beta["alpha"] = res["alpha"]
+    df_beta["r2"] = res["r2"]
+    df_beta["resid_vol"] = res["resid_vol"] * np.sqrt(252.0)
+    df_beta["n_obs"] = res["n_obs"]
+    return df_beta.dropna(subset=["beta_spy"]).reset_index(drop=True)
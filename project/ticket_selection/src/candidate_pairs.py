@@ -0,0 +1,179 @@
+# pair_cluster/candidate_pairs.py
+
+import os
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from config import (
+    DATA_DIR,
+    OUTPUT_DIR,
+    RET_LOOKBACK_YEARS,
+    RET_MIN_OBS,
+    COINT_MIN_OBS,
+    COINT_ALPHA,
+    UNIV_KNN_K,
+    UNIV_PCA_COMPONENTS,
+    UNIV_MIN_CORR,
+    UNIV_BLOCK_SIZE,
+)
+from data_loader import list_tickers
+from returns_volume import build_log_price_panel
+from shared.stationarity import coint_pairs
+
+"""
+Tìm cặp ứng viên trên toàn universe, không chia theo (sectorKey, industryKey).
+
+Ma trận correlation đầy đủ của ~5000 mã là O(N^2) bộ nhớ và thời gian, nên
+mỗi mã chỉ giữ k láng giềng gần nhất:
+  - method="pca": embedding PCA (vài chục chiều) của return chuẩn hoá,
+    tìm kNN bằng cKDTree trên embedding đã chuẩn hoá độ dài
+    (khoảng cách Euclid trên mặt cầu đơn vị tương đương cosine)
+  - method="corr": top-k correlation chính xác, tính theo block
+    (block_size x N), không giữ cả ma trận N x N
+Các cặp ứng viên được chấm lại bằng correlation return thật, lọc min_corr,
+rồi mới đưa qua cointegration (coint_pairs).
+"""
+
+
+def standardize_returns(returns):
+    """
+    Chuẩn hoá từng cột return (T, N): trừ mean, chia std * sqrt(số quan sát),
+    NaN thay bằng 0. Khi đó Z[:, i] @ Z[:, j] xấp xỉ correlation(i, j)
+    (chính xác nếu hai mã không thiếu ngày nào).
+    """
+    R = np.asarray(returns, dtype=np.float32)
+    valid = ~np.isnan(R)
+    n = valid.sum(axis=0).astype(np.float32)
+    R0 = np.where(valid, R, 0.0).astype(np.float32)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = R0.sum(axis=0) / n
+        Z = np.where(valid, R0 - mean, 0.0).astype(np.float32)
+        norm = np.sqrt((Z * Z).sum(axis=0))
+        Z /= np.where(norm > 0, norm, np.inf)
+    return Z
+
+
+def pca_embedding(Z, n_components=UNIV_PCA_COMPONENTS):
+    """
+    Embedding PCA (N, n_components) của các cột Z (T, N): hàng i là toạ độ
+    của mã i trên n_components thành phần chính đầu tiên.
+    SVD rút gọn trên (T, N) nên chi phí O(T^2 N), không cần ma trận N x N.
+    """
+    _, s, Vt = np.linalg.svd(Z, full_matrices=False)
+    k = min(n_components, len(s))
+    return (Vt[:k].T * s[:k]).astype(np.float32)
+
+
+def _knn_embedding(E, k):
+    norm = np.linalg.norm(E, axis=1, keepdims=True)
+    U = E / np.where(norm > 0, norm, 1.0)
+    k = min(k + 1, len(U))
+    _, nbr = cKDTree(U).query(U, k=k)
+    return nbr.reshape(len(U), -1)
+
+
+def _knn_corr_blocked(Z, k, block_size=UNIV_BLOCK_SIZE):
+    N = Z.shape[1]
+    k = min(k, N - 1)
+    nbr = np.empty((N, k), dtype=np.int64)
+    for i0 in range(0, N, block_size):
+        i1 = min(i0 + block_size, N)
+        C = Z[:, i0:i1].T @ Z                      # (block, N)
+        C[np.arange(i1 - i0), np.arange(i0, i1)] = -np.inf
+        nbr[i0:i1] = np.argpartition(-C, k - 1, axis=1)[:, :k]
+    return nbr
+
+
+def _pairs_from_neighbours(nbr):
+    rows = np.repeat(np.arange(nbr.shape[0]), nbr.shape[1])
+    cols = nbr.ravel()
+    keep = rows != cols
+    ij = np.stack([np.minimum(rows, cols), np.maximum(rows, cols)], axis=1)[keep]
+    return np.unique(ij, axis=0)
+
+
+def candidate_pairs(
+    returns,
+    k=UNIV_KNN_K,
+    method="pca",
+    n_components=UNIV_PCA_COMPONENTS,
+    min_corr=UNIV_MIN_CORR,
+    block_size=UNIV_BLOCK_SIZE,
+):
+    """
+    Cặp ứng viên từ return panel (Date x ticker).
+    Mỗi mã lấy k láng giềng gần nhất (method "pca" hoặc "corr"), gộp và bỏ
+    trùng (i, j) / (j, i), giữ cặp có correlation >= min_corr.
+    Trả về DataFrame ticker1, ticker2, corr sắp theo corr giảm dần.
+    """
+    tickers = np.asarray(returns.columns)
+    Z = standardize_returns(returns.to_numpy())
+
+    if method == "pca":
+        nbr = _knn_embedding(pca_embedding(Z, n_components=n_components), k)
+    elif method == "corr":
+        nbr = _knn_corr_blocked(Z, k, block_size=block_size)
+    else:
+        raise ValueError(f"Unknown method: {method}")
+
+    ij = _pairs_from_neighbours(nbr)
+    if ij.size == 0:
+        return pd.DataFrame(columns=["ticker1", "ticker2", "corr"])
+
+    corr = np.einsum("tp,tp->p", Z[:, ij[:, 0]], Z[:, ij[:, 1]])
+    out = pd.DataFrame(
+        {"ticker1": tickers[ij[:, 0]], "ticker2": tickers[ij[:, 1]], "corr": corr}
+    )
+    out = out[out["corr"] >= min_corr]
+    return out.sort_values("corr", ascending=False).reset_index(drop=True)
+
+
+def find_universe_pairs(
+    tickers=None,
+    k=UNIV_KNN_K,
+    method="pca",
+    min_corr=UNIV_MIN_CORR,
+    lookback_years=RET_LOOKBACK_YEARS,
+    min_obs=COINT_MIN_OBS,
+    alpha=COINT_ALPHA,
+):
+    """
+    Toàn bộ universe -> cặp ứng viên kNN -> cointegration.
+    Trả về (res_df, good_pairs) giống find_cointegrated_pairs; res_df có thêm
+    cột corr và hedge_ratio.
+    """
+    if tickers is None:
+        tickers = list_tickers(DATA_DIR)
+
+    panel = build_log_price_panel(tickers, lookback_years=lookback_years, min_obs=RET_MIN_OBS)
+    if panel is None or panel.shape[1] < 2:
+        return pd.DataFrame(), []
+    print(f"Universe panel: {panel.shape[0]} dates x {panel.shape[1]} tickers")
+
+    cands = candidate_pairs(panel.diff(), k=k, method=method, min_corr=min_corr)
+    print(f"Candidate pairs: {len(cands)}")
+    if cands.empty:
+        return pd.DataFrame(), []
+
+    pairs = list(zip(cands["ticker1"], cands["ticker2"]))
+    res = coint_pairs(panel, pairs, min_obs=min_obs)
+    if res.empty:
+        return pd.DataFrame(), []
+
+    res = res.merge(cands, on=["ticker1", "ticker2"], how="left")
+    res_df = res[["ticker1", "ticker2", "corr", "pvalue", "stat", "hedge_ratio"]]
+    res_df = res_df.sort_values("pvalue").reset_index(drop=True)
+
+    good = res_df[res_df["pvalue"] < alpha]
+    good_pairs = list(zip(good["ticker1"], good["ticker2"], good["pvalue"]))
+    return res_df, good_pairs
+
+
+if __name__ == "__main__":
+    res_df, good_pairs = find_universe_pairs()
+    out_path = os.path.join(OUTPUT_DIR, "pairs_universe.csv")
+    res_df.to_csv(out_path, index=False)
+    print(f"{len(good_pairs)} cointegrated pairs, saved {len(res_df)} tested pairs to {out_path}")
@@ -4,13 +4,13 @@ from itertools import combinations
 
 import numpy as np
 import pandas as pd
-from statsmodels.tsa.stattools import coint
 
 from config import COINT_LOOKBACK_YEARS, COINT_MIN_OBS, COINT_ALPHA
 from data_loader import load_ohlcv
+from shared.stationarity import coint_pairs
 
 """
-Test cointegration cho một cụm mã.
+Test cointegration cho một cụm mã (Engle-Granger theo lô, xem shared/stationarity.py).
 """
 
 
@@ -25,38 +25,29 @@ def find_cointegrated_pairs(df_cluster, tickers,
     start_cut = max_date - pd.Timedelta(days=365 * lookback_years)
     df_win = df_cluster[df_cluster["Date"] >= start_cut].copy()
 
-    results = []
-    good_pairs = []
-
-    for t1, t2 in combinations(tickers, 2):
-        s1 = df_win[df_win["ticker"] == t1][["Date", "Close"]]
-        s2 = df_win[df_win["ticker"] == t2][["Date", "Close"]]
-
-        merged = pd.merge(s1, s2, on="Date", how="inner", suffixes=("_1", "_2"))
-        merged = merged.dropna()
-        if merged.shape[0] < min_obs:
-            continue
+    # log giá (Date x ticker), Close <= 0 coi như thiếu; mỗi cặp dùng các
+    # ngày cả hai cùng có giá
+    panel = df_win.pivot_table(index="Date", columns="ticker", values="Close", aggfunc="last")
+    panel = panel.reindex(columns=[t for t in tickers if t in panel.columns])
+    panel = np.log(panel.where(panel > 0))
 
-        y1 = np.log(merged["Close_1"].values)
-        y2 = np.log(merged["Close_2"].values)
-
-        try:
-            stat, pvalue, crit = coint(y1, y2)
-        except Exception as e:
-            print(f"[warn] coint error {t1}-{t2}: {e}")
-            continue
+    # lỗi được cô lập theo lô / theo cặp bên trong coint_pairs
+    pairs = list(combinations(panel.columns, 2))
+    res = coint_pairs(panel, pairs, min_obs=min_obs)
 
+    results = []
+    good_pairs = []
+    for row in res.itertuples(index=False):
         results.append(
             {
-                "ticker1": t1,
-                "ticker2": t2,
-                "pvalue": pvalue,
-                "stat": stat,
+                "ticker1": row.ticker1,
+                "ticker2": row.ticker2,
+                "pvalue": row.pvalue,
+                "stat": row.stat,
             }
         )
-
-        if pvalue < alpha:
-            good_pairs.append((t1, t2, pvalue))
+        if row.pvalue < alpha:
+            good_pairs.append((row.ticker1, row.ticker2, row.pvalue))
 
     res_df = pd.DataFrame(results).sort_values("pvalue") if results else pd.DataFrame()
     return res_df, good_pairs
@@ -1,6 +1,7 @@
 # pair_cluster/config.py
 
 import os
+import sys
 
 """
 Config và tham số toàn bộ pipeline.
@@ -15,10 +16,24 @@ SPY_PATH = "/kaggle/input/computational-finance/SPY.csv"
 # File sector industry (nếu đã tạo trước)
 SECTOR_FILE = "/kaggle/input/computational-finance/sector_industry.csv"
 
+# Thư mục SimFin bulk zip (us-income-annual.zip, us-balance-annual.zip)
+SIMFIN_DIR = "/kaggle/input/computational-finance/simfin"
+
+# Thư mục gốc repo: chứa package shared/ (stationarity, compact schema) dùng
+# chung với labs/, mọi module import config trước nên chỉ cần thêm ở đây
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+
 # Folder output cuối cùng
 OUTPUT_DIR = "clusters"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Cách chia group trước process_group:
+#   "sector"      = theo (sectorKey, industryKey) của sector_industry
+#   "correlation" = hierarchical clustering theo correlation distance (corr_clustering.py)
+GROUPING = "sector"
+
 # Ngưỡng và tham số
 MIN_GROUP_SIZE = 10          # số mã tối thiểu cho một cặp sector industry
 VOL_MIN_OBS = 200             # số quan sát tối thiểu để tính vol 1y
@@ -39,3 +54,38 @@ TOP_K_BY_CORR = 10            # chọn tối đa 10 mã có mean corr cao nhất
 COINT_LOOKBACK_YEARS = 3
 COINT_MIN_OBS = 200
 COINT_ALPHA = 0.05            # pvalue < 0.05 thì coi là cointegrated
+
+# Pairs backtest trên các file cluster_*.csv
+PAIR_HEDGE_WINDOW = 252       # số phiên để ước lượng hedge ratio (rolling OLS)
+PAIR_Z_WINDOW = 60            # số phiên cho mean/std của spread khi tính z-score
+PAIR_ENTRY_Z = 2.0            # |z| > 2 thì vào lệnh
+PAIR_EXIT_Z = 0.5             # |z| < 0.5 thì đóng lệnh
+PAIR_COST_BPS = 5.0           # phí mỗi đơn vị turnover, basis points
+PAIR_TRADING_YEARS = 1        # trade năm cuối file; cặp chọn trên COINT_LOOKBACK_YEARS năm trước đó
+
+# Kalman hedge ratio (state = intercept, beta, random walk)
+KALMAN_DELTA = 1e-4           # tốc độ trôi của state: W = delta / (1 - delta) * I
+KALMAN_OBS_VAR = 1e-3         # phương sai nhiễu quan sát của log giá
+
+# Tìm cặp ứng viên trên toàn universe (không chia theo sector/industry)
+UNIV_KNN_K = 10               # số láng giềng gần nhất giữ lại cho mỗi mã
+UNIV_PCA_COMPONENTS = 20      # số chiều embedding PCA của return chuẩn hoá
+UNIV_MIN_CORR = 0.5           # bỏ cặp ứng viên có correlation return thấp hơn
+UNIV_BLOCK_SIZE = 512         # số mã mỗi block khi tính top-k correlation
+
+# Hierarchical clustering theo correlation distance d = sqrt(2 (1 - rho))
+CORR_LINKAGE = "average"      # average / complete / single / ward
+CORR_CLUSTER_MAX_SIZE = 40    # cắt cây sao cho mỗi cụm có tối đa 40 mã
+CORR_CLUSTER_MIN_SIZE = MIN_GROUP_SIZE  # cụm nhỏ hơn được gộp vào cụm gần nhất còn chỗ
+CORR_MAX_MEMORY_MB = 1024     # giới hạn bộ nhớ cho ma trận khoảng cách + linkage
+
+# Universe point-in-time (không nhìn trước) cho backtest
+PIT_REBALANCE = "ME"          # tần suất rebalance (pandas offset alias), "ME" = cuối tháng
+
+# Lọc theo fundamental (SimFin) trong từng group, trước process_group
+USE_FUNDAMENTAL_FILTER = False
+FUND_CACHE_FILE = "fundamentals_cache.csv"   # bảng fundamental theo ticker, tính một lần
+FUND_LOG_MCAP_TOL = 1.5       # |log market cap - median| <= 1.5 (khoảng x4.5 quanh median)
+FUND_LEVERAGE_TOL = 0.25      # |liabilities / assets - median| <= 0.25
+FUND_ROA_TOL = 0.10           # |net income / assets - median| <= 0.10
+FUND_KEEP_MISSING = True      # giữ mã không có dữ liệu SimFin
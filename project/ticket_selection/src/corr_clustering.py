@@ -0,0 +1,193 @@
+# pair_cluster/corr_clustering.py
+
+import numpy as np
+import pandas as pd
+from scipy.cluster.hierarchy import linkage
+
+from config import (
+    RET_LOOKBACK_YEARS,
+    CORR_LINKAGE,
+    CORR_CLUSTER_MAX_SIZE,
+    CORR_CLUSTER_MIN_SIZE,
+    CORR_MAX_MEMORY_MB,
+    UNIV_BLOCK_SIZE,
+)
+from returns_volume import build_log_price_panel
+from candidate_pairs import standardize_returns
+
+"""
+Chia group bằng dữ liệu (không cần sector_industry / yahooquery):
+hierarchical clustering trên correlation distance của return.
+
+  - return chuẩn hoá Z (standardize_returns), rho_ij ~ Z_i . Z_j
+  - khoảng cách d_ij = sqrt(2 (1 - rho_ij)), lưu dạng condensed float32
+    (N (N - 1) / 2 phần tử), tính theo block hàng nên không có ma trận N x N
+  - linkage của scipy (CORR_LINKAGE), scipy đổi condensed sang float64 nên
+    bộ nhớ đỉnh khoảng 12 byte mỗi cặp, kiểm tra trước với CORR_MAX_MEMORY_MB
+  - cắt cây từ gốc xuống: node nào lớn hơn max_size thì tách thành hai con,
+    nên mỗi cụm có tối đa max_size mã
+  - cây average linkage rất lệch (tách dần từng mã lẻ), nên sau khi cắt các
+    cụm nhỏ hơn min_size được gộp vào cụm gần nhất còn chỗ (merge_small_clusters)
+"""
+
+
+def condensed_corr_distance(Z, block_size=UNIV_BLOCK_SIZE):
+    """
+    Condensed distance float32 sqrt(2 (1 - rho)) giữa các cột của Z (T, N),
+    thứ tự giống scipy.spatial.distance.pdist. Mỗi lần chỉ tính một block
+    (block_size x N) của ma trận correlation.
+    """
+    N = Z.shape[1]
+    d = np.empty(N * (N - 1) // 2, dtype=np.float32)
+    pos = 0
+    for i0 in range(0, N, block_size):
+        i1 = min(i0 + block_size, N)
+        C = Z[:, i0:i1].T @ Z[:, i0:]              # (block, N - i0)
+        np.clip(C, -1.0, 1.0, out=C)
+        D = np.sqrt(2.0 * (1.0 - C))
+        for r in range(i1 - i0):
+            row = D[r, r + 1:]
+            d[pos:pos + row.size] = row
+            pos += row.size
+    return d
+
+
+def linkage_memory_mb(n_tickers):
+    """Bộ nhớ đỉnh ước lượng (MB): condensed float32 + bản float64 trong linkage."""
+    n_pairs = n_tickers * (n_tickers - 1) // 2
+    return n_pairs * 12 / 1e6
+
+
+def cut_by_size(Lk, n, max_size=CORR_CLUSTER_MAX_SIZE):
+    """
+    Gán nhãn cụm từ linkage matrix Lk (n lá): đi từ gốc, node có hơn
+    max_size lá thì tách tiếp, ngược lại thành một cụm.
+    Trả về mảng nhãn (n,), đánh số 0.. theo thứ tự duyệt.
+    """
+    labels = np.empty(n, dtype=np.int64)
+    if n == 1:
+        labels[0] = 0
+        return labels
+
+    children = Lk[:, :2].astype(np.int64)
+    sizes = Lk[:, 3].astype(np.int64)
+
+    def leaves(node):
+        out, stack = [], [node]
+        while stack:
+            v = stack.pop()
+            if v < n:
+                out.append(v)
+            else:
+                stack.extend(children[v - n])
+        return out
+
+    label = 0
+    stack = [2 * n - 2]
+    while stack:
+        v = stack.pop()
+        size = 1 if v < n else sizes[v - n]
+        if size > max_size:
+            stack.extend(children[v - n][::-1])
+        else:
+            labels[leaves(v)] = label
+            label += 1
+    return labels
+
+
+def merge_small_clusters(labels, Z, min_size=CORR_CLUSTER_MIN_SIZE, max_size=CORR_CLUSTER_MAX_SIZE):
+    """
+    Gộp các cụm có ít hơn min_size mã. Mỗi bước lấy cụm nhỏ nhất và gộp vào
+    cụm có correlation trung bình giữa hai cụm cao nhất (cùng tiêu chí với
+    average linkage: s_a . s_b / (n_a n_b), s = tổng các cột Z của cụm) mà
+    tổng số mã không vượt max_size. Cụm không còn chỗ để gộp giữ nguyên.
+    Trả về nhãn mới (n,), đánh số 0.. theo thứ tự xuất hiện.
+    """
+    uniq, inv = np.unique(labels, return_inverse=True)
+    K = len(uniq)
+    sizes = np.bincount(inv, minlength=K).astype(np.int64)
+
+    # tổng các cột Z theo cụm, (K, T)
+    order = np.argsort(inv, kind="stable")
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    S = np.add.reduceat(Z[:, order].astype(np.float64), starts, axis=1).T
+
+    parent = np.arange(K)
+    alive = np.ones(K, dtype=bool)
+    stuck = np.zeros(K, dtype=bool)
+    while True:
+        small = np.flatnonzero(alive & ~stuck & (sizes < min_size))
+        if small.size == 0:
+            break
+        a = small[np.argmin(sizes[small])]
+        ok = alive & (sizes + sizes[a] <= max_size)
+        ok[a] = False
+        if not ok.any():
+            stuck[a] = True
+            continue
+        cand = np.flatnonzero(ok)
+        sim = (S[cand] @ S[a]) / (sizes[cand] * sizes[a])
+        b = cand[np.argmax(sim)]
+        S[b] += S[a]
+        sizes[b] += sizes[a]
+        alive[a] = False
+        parent[a] = b
+
+    root = parent.copy()
+    for k in range(K):
+        r = k
+        while parent[r] != r:
+            r = parent[r]
+        root[k] = r
+    return pd.factorize(root[inv])[0].astype(np.int64)
+
+
+def cluster_returns(
+    returns,
+    max_size=CORR_CLUSTER_MAX_SIZE,
+    min_size=CORR_CLUSTER_MIN_SIZE,
+    method=CORR_LINKAGE,
+    max_memory_mb=CORR_MAX_MEMORY_MB,
+):
+    """
+    Hierarchical clustering các cột của return panel (Date x ticker).
+    Mỗi cụm có tối đa max_size mã và (nếu còn chỗ để gộp) tối thiểu min_size mã.
+    Trả về DataFrame ticker, cluster.
+    """
+    tickers = list(returns.columns)
+    n = len(tickers)
+    if n < 2:
+        return pd.DataFrame({"ticker": tickers, "cluster": np.zeros(n, dtype=np.int64)})
+
+    need = linkage_memory_mb(n)
+    if need > max_memory_mb:
+        raise ValueError(
+            f"linkage on {n} tickers needs ~{need:.0f} MB > {max_memory_mb} MB, "
+            "raise CORR_MAX_MEMORY_MB or pre-filter the universe"
+        )
+
+    Z = standardize_returns(returns.to_numpy())
+    d = condensed_corr_distance(Z)
+    Lk = linkage(d, method=method)
+    del d
+
+    labels = cut_by_size(Lk, n, max_size=max_size)
+    labels = merge_small_clusters(labels, Z, min_size=min_size, max_size=max_size)
+    return pd.DataFrame({"ticker": tickers, "cluster": labels})
+
+
+def get_correlation_groups(tickers, lookback_years=RET_LOOKBACK_YEARS, max_size=CORR_CLUSTER_MAX_SIZE,
+                           min_size=CORR_CLUSTER_MIN_SIZE):
+    """
+    Bảng group cùng format với get_sector_industry (ticker, sectorKey,
+    industryKey) để dùng thẳng trong run_full_pipeline:
+    sectorKey = "corr", industryKey = "cluster{k}".
+    """
+    panel = build_log_price_panel(tickers, lookback_years=lookback_years)
+    if panel is None:
+        return pd.DataFrame(columns=["ticker", "sectorKey", "industryKey"])
+
+    df = cluster_returns(panel.diff().iloc[1:], max_size=max_size, min_size=min_size)
+    df["sectorKey"] = "corr"
+    df["industryKey"] = [f"cluster{k:04d}" for k in df["cluster"]]
+    return df[["ticker", "sectorKey", "industryKey"]]
@@ -5,12 +5,14 @@ import numpy as np
 import pandas as pd
 
 from config import DATA_DIR, SPY_PATH, VOL_LOOKBACK_DAYS
+from shared.compact_schema import apply_schema, infer_compact_schema
 
 """
 Các hàm đọc dữ liệu cơ bản:
 - list_tickers
 - load_ohlcv cho từng mã
 - load_spy, compute_spy_returns
+- compact_ohlcv: schema gọn (float32 giá, uint volume, ngày)
 """
 
 
@@ -20,11 +22,12 @@ def list_tickers(data_dir=DATA_DIR):
     )
 
 
-def load_ohlcv(ticker, data_dir=DATA_DIR):
+def load_ohlcv(ticker, data_dir=DATA_DIR, compact=False):
     """
     Đọc file 1 ticker, trả về DataFrame với cột:
       Date (datetime), Open, High, Low, Close, Volume (numeric)
     Tự xử lý một số kiểu header noise (dòng đầu chứa ticker, v.v.).
+    compact=True: trả về theo schema gọn của compact_ohlcv.
     """
     path = os.path.join(data_dir, f"{ticker}.csv")
     if not os.path.exists(path):
@@ -109,9 +112,21 @@ def load_ohlcv(ticker, data_dir=DATA_DIR):
         }
     )
 
+    if compact:
+        out = compact_ohlcv(out)
     return out
 
 
+def compact_ohlcv(df, schema=None):
+    """
+    Ép bảng OHLCV về schema gọn (mặc định infer_compact_schema(df), xem
+    shared/compact_schema.py), Date được normalize về ngày.
+    """
+    if schema is None:
+        schema = infer_compact_schema(df)
+    return apply_schema(df, schema)
+
+
 def load_spy(spy_path=SPY_PATH):
     """
     Load SPY với các format tương tự file riêng:
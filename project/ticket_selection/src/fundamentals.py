@@ -0,0 +1,187 @@
+# pair_cluster/fundamentals.py
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    DATA_DIR,
+    SIMFIN_DIR,
+    FUND_CACHE_FILE,
+    FUND_LOG_MCAP_TOL,
+    FUND_LEVERAGE_TOL,
+    FUND_ROA_TOL,
+    FUND_KEEP_MISSING,
+)
+from data_loader import load_ohlcv
+
+"""
+Lọc group theo fundamental từ SimFin bulk zip (báo cáo năm mới nhất):
+  - log_mcap: log(Shares (Basic) x Close cuối cùng)
+  - leverage: Total Liabilities / Total Assets
+  - roa:      Net Income / Total Assets
+  - net_margin: Net Income / Revenue (chỉ để tham khảo)
+
+Bảng fundamental tính một lần cho mỗi ticker và lưu ở FUND_CACHE_FILE cùng
+chữ ký (kích thước, mtime) của các zip và của file giá ticker (log_mcap dùng
+Close cuối); lần chạy sau chỉ tính thêm các ticker chưa có trong cache, zip
+hoặc file giá đổi thì tính lại. Đọc zip lỗi thì không ghi cache.
+fundamental_filter giữ các mã gần median của group (giống lọc beta band),
+làm nhỏ group trước bước correlation và cointegration.
+"""
+
+FUND_COLS = ["log_mcap", "leverage", "roa", "net_margin"]
+STATEMENTS = ["income", "balance"]
+
+
+def _statement_path(name):
+    return os.path.join(SIMFIN_DIR, f"us-{name}-annual.zip")
+
+
+def simfin_signature():
+    """
+    Chữ ký các zip SimFin dùng ở đây, "income:size:mtime_ns|balance:...",
+    None nếu thiếu file. Cache chỉ dùng được khi chữ ký khớp.
+    """
+    parts = []
+    for name in STATEMENTS:
+        try:
+            st = os.stat(_statement_path(name))
+        except OSError:
+            return None
+        parts.append(f"{name}:{st.st_size}:{st.st_mtime_ns}")
+    return "|".join(parts)
+
+
+def _row_signature(zip_signature, ticker, data_dir=DATA_DIR):
+    """Chữ ký một dòng cache: chữ ký zip + (size, mtime) file giá của ticker."""
+    try:
+        st = os.stat(os.path.join(data_dir, f"{ticker}.csv"))
+        price = f"price:{st.st_size}:{st.st_mtime_ns}"
+    except OSError:
+        price = "price:missing"
+    return f"{zip_signature}|{price}"
+
+
+def _read_statement(name, columns):
+    df = pd.read_csv(
+        _statement_path(name),
+        sep=";",
+        usecols=["Ticker", "Fiscal Year", "Publish Date"] + columns,
+        dtype={"Ticker": str, **{c: "float64" for c in columns}},
+        parse_dates=["Publish Date"],
+        # ticker "NA", "NAN"... giữ nguyên, chỉ ô trống là thiếu
+        keep_default_na=False,
+        na_values={c: [""] for c in ["Fiscal Year", "Publish Date"] + columns},
+    )
+    df = df[df["Ticker"] != ""].sort_values(["Ticker", "Publish Date"])
+    # báo cáo năm mới nhất của mỗi ticker
+    return df.groupby("Ticker").tail(1).set_index("Ticker")[columns]
+
+
+def compute_fundamental_table(tickers):
+    """
+    Bảng ticker, log_mcap, leverage, roa, net_margin cho các tickers.
+    Ticker không có trong SimFin vẫn có dòng (NaN) để cache nhớ là đã tính.
+    Trả về None nếu không đọc được SimFin.
+    """
+    try:
+        inc = _read_statement("income", ["Revenue", "Net Income"])
+        bal = _read_statement("balance", ["Shares (Basic)", "Total Assets", "Total Liabilities"])
+    except Exception as e:
+        print(f"[warn] cannot read SimFin data: {e}")
+        return None
+
+    df = pd.DataFrame(index=pd.Index(list(tickers), name="ticker"))
+    df = df.join(inc).join(bal)
+
+    # giá đóng cửa cuối cùng, chỉ load cho mã có số cổ phiếu
+    last_close = {}
+    for tk in df.index[df["Shares (Basic)"].notna()]:
+        px = load_ohlcv(tk)
+        if px is not None and not px.empty:
+            last_close[tk] = float(px["Close"].iloc[-1])
+    close = pd.Series(last_close, dtype=float).reindex(df.index)
+
+    assets = df["Total Assets"].where(df["Total Assets"] > 0)
+    mcap = (df["Shares (Basic)"] * close).where(lambda x: x > 0)
+    out = pd.DataFrame(
+        {
+            "log_mcap": np.log(mcap),
+            "leverage": df["Total Liabilities"] / assets,
+            "roa": df["Net Income"] / assets,
+            "net_margin": df["Net Income"] / df["Revenue"].where(df["Revenue"] > 0),
+        },
+        index=df.index,
+    )
+    return out.replace([np.inf, -np.inf], np.nan).reset_index()
+
+
+def load_fundamental_table(tickers, cache_file=FUND_CACHE_FILE):
+    """
+    Bảng fundamental cho tickers, đọc từ cache_file nếu có và chỉ tính
+    các ticker còn thiếu, rồi ghi lại cache. Dòng cache có chữ ký khác
+    (zip SimFin hoặc file giá của ticker đã đổi) bị bỏ và tính lại. Nếu đọc
+    SimFin lỗi, các ticker thiếu có dòng NaN nhưng không được ghi vào cache.
+    """
+    tickers = list(tickers)
+    signature = simfin_signature()
+
+    cached = None
+    if cache_file and signature is not None and os.path.exists(cache_file):
+        # ticker như "NA", "NAN" không được đọc thành NaN
+        cached = pd.read_csv(
+            cache_file,
+            dtype={"ticker": str, "signature": str},
+            keep_default_na=False,
+            na_values={c: ["", "nan", "NaN"] for c in FUND_COLS},
+        )
+        if "signature" in cached.columns:
+            expected = cached["ticker"].map(lambda t: _row_signature(signature, t))
+            cached = cached[cached["signature"] == expected]
+        else:
+            cached = None
+    have = set() if cached is None else set(cached["ticker"])
+    missing = [t for t in tickers if t not in have]
+
+    if missing:
+        print(f"Computing fundamentals for {len(missing)} tickers...")
+        fresh = compute_fundamental_table(missing) if signature is not None else None
+        failed = fresh is None
+        if failed:
+            if signature is None:
+                print(f"[warn] SimFin zips not found in {SIMFIN_DIR}")
+            fresh = pd.DataFrame({"ticker": missing}).reindex(columns=["ticker"] + FUND_COLS)
+        else:
+            fresh["signature"] = [_row_signature(signature, t) for t in fresh["ticker"]]
+        cached = fresh if cached is None else pd.concat([cached, fresh], ignore_index=True)
+        if cache_file and not failed:
+            cached.to_csv(cache_file, index=False)
+
+    out = cached[cached["ticker"].isin(tickers)].reset_index(drop=True)
+    return out[["ticker"] + FUND_COLS]
+
+
+def fundamental_filter(
+    df_group,
+    mcap_tol=FUND_LOG_MCAP_TOL,
+    leverage_tol=FUND_LEVERAGE_TOL,
+    roa_tol=FUND_ROA_TOL,
+    keep_missing=FUND_KEEP_MISSING,
+):
+    """
+    Giữ các mã của group có log_mcap, leverage, roa gần median của group
+    (median tính trên các mã có dữ liệu). df_group cần các cột FUND_COLS
+    (merge từ load_fundamental_table). Mã thiếu một chỉ số thì giữ hay bỏ
+    theo keep_missing.
+    """
+    mask = np.ones(len(df_group), dtype=bool)
+    for col, tol in (("log_mcap", mcap_tol), ("leverage", leverage_tol), ("roa", roa_tol)):
+        x = df_group[col].to_numpy(dtype=float)
+        has = ~np.isnan(x)
+        if has.sum() < 2:
+            continue
+        near = np.abs(x - np.median(x[has])) <= tol
+        mask &= np.where(has, near, keep_missing)
+    return df_group[mask].copy()
@@ -0,0 +1,106 @@
+# pair_cluster/kalman_hedge.py
+
+import numpy as np
+import pandas as pd
+
+from config import KALMAN_DELTA, KALMAN_OBS_VAR
+
+"""
+Hedge ratio động bằng Kalman filter cho nhiều cặp cùng lúc.
+
+Mỗi cặp (y, x) là một hồi quy có hệ số trôi theo random walk:
+    y_t     = a_t + b_t x_t + e_t,          e_t ~ N(0, obs_var)
+    (a, b)_t = (a, b)_{t-1} + w_t,          w_t ~ N(0, delta / (1 - delta) I)
+
+State 2 chiều nên hiệp phương sai 2x2 của mọi cặp được lưu thành ba mảng
+(P00, P01, P11) shape (P,), mỗi bước thời gian cập nhật cả P cặp bằng phép
+toán mảng; chỉ có vòng lặp theo thời gian.
+
+Output theo từng ngày t (Date x cặp):
+  - alpha, beta: ước lượng dùng được tại t, tính từ dữ liệu đến t-1 (prior)
+  - innovation: y_t - (alpha_t + beta_t x_t), sai số dự báo một bước
+  - innovation_var: phương sai dự báo của innovation
+"""
+
+
+def kalman_hedge_ratios(Y, X, delta=KALMAN_DELTA, obs_var=KALMAN_OBS_VAR, init_var=1.0):
+    """
+    Kalman regression y ~ a + b x trên các cột của Y, X (T, P).
+    Ngày có NaN ở y hoặc x chỉ dự báo (không cập nhật state).
+    Trả về dict mảng (T, P): alpha, beta, innovation, innovation_var.
+    """
+    Y = np.asarray(Y, dtype=float)
+    X = np.asarray(X, dtype=float)
+    if Y.ndim == 1:
+        Y, X = Y[:, None], X[:, None]
+    T, n_pairs = Y.shape
+
+    w = delta / (1.0 - delta)
+    a = np.zeros(n_pairs)
+    b = np.zeros(n_pairs)
+    P00 = np.full(n_pairs, init_var)
+    P01 = np.zeros(n_pairs)
+    P11 = np.full(n_pairs, init_var)
+
+    alpha = np.full((T, n_pairs), np.nan)
+    beta = np.full((T, n_pairs), np.nan)
+    innov = np.full((T, n_pairs), np.nan)
+    innov_var = np.full((T, n_pairs), np.nan)
+    started = np.zeros(n_pairs, dtype=bool)
+
+    for t in range(T):
+        x = X[t]
+        y = Y[t]
+        ok = ~(np.isnan(x) | np.isnan(y))
+
+        # dự báo: state giữ nguyên, hiệp phương sai cộng W (chỉ sau quan sát đầu)
+        P00 = np.where(started, P00 + w, P00)
+        P11 = np.where(started, P11 + w, P11)
+
+        alpha[t] = np.where(started, a, np.nan)
+        beta[t] = np.where(started, b, np.nan)
+
+        xs = np.where(ok, x, 0.0)
+        e = np.where(ok, y, 0.0) - (a + b * xs)
+        S = P00 + 2.0 * P01 * xs + P11 * xs * xs + obs_var
+        K0 = (P00 + P01 * xs) / S
+        K1 = (P01 + P11 * xs) / S
+
+        innov[t] = np.where(ok & started, e, np.nan)
+        innov_var[t] = np.where(ok & started, S, np.nan)
+
+        # cập nhật chỉ ở các cặp có quan sát hôm nay
+        a = np.where(ok, a + K0 * e, a)
+        b = np.where(ok, b + K1 * e, b)
+        P00 = np.where(ok, P00 - K0 * K0 * S, P00)
+        P01 = np.where(ok, P01 - K0 * K1 * S, P01)
+        P11 = np.where(ok, P11 - K1 * K1 * S, P11)
+        started |= ok
+
+    return {
+        "alpha": alpha,
+        "beta": beta,
+        "innovation": innov,
+        "innovation_var": innov_var,
+    }
+
+
+def kalman_hedge_pairs(log_prices, pairs, delta=KALMAN_DELTA, obs_var=KALMAN_OBS_VAR, init_var=1.0):
+    """
+    Kalman hedge ratio cho các cặp [(ticker1, ticker2), ...] (vd good_pairs
+    của find_cointegrated_pairs, bỏ cột pvalue) trên log_prices (Date x ticker).
+    Trả về dict DataFrame (Date x "ticker1-ticker2"): alpha, beta,
+    innovation, innovation_var, zscore (= innovation / sqrt(innovation_var)).
+    """
+    pairs = [(p[0], p[1]) for p in pairs]
+    Y = log_prices[[a for a, _ in pairs]].to_numpy(dtype=float)
+    X = log_prices[[b for _, b in pairs]].to_numpy(dtype=float)
+
+    res = kalman_hedge_ratios(Y, X, delta=delta, obs_var=obs_var, init_var=init_var)
+    res["zscore"] = res["innovation"] / np.sqrt(res["innovation_var"])
+
+    names = [f"{a}-{b}" for a, b in pairs]
+    return {
+        k: pd.DataFrame(v, index=log_prices.index, columns=names)
+        for k, v in res.items()
+    }
@@ -0,0 +1,335 @@
+# pair_cluster/pairs_backtest.py
+
+import glob
+import os
+from itertools import combinations, product
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    OUTPUT_DIR,
+    COINT_LOOKBACK_YEARS,
+    COINT_MIN_OBS,
+    COINT_ALPHA,
+    PAIR_HEDGE_WINDOW,
+    PAIR_Z_WINDOW,
+    PAIR_ENTRY_Z,
+    PAIR_EXIT_Z,
+    PAIR_COST_BPS,
+    PAIR_TRADING_YEARS,
+)
+from cointegration import find_cointegrated_pairs
+from kalman_hedge import kalman_hedge_ratios
+
+"""
+Backtest pair trading cho các file cluster_{sector}_{industry}.csv.
+
+Mọi cặp được tính cùng lúc trên ma trận (thời gian x cặp):
+  - hedge ratio beta_t: OLS rolling y ~ a + b x trên PAIR_HEDGE_WINDOW phiên,
+    Kalman (kalman_hedge.py) hoặc ma trận truyền vào
+  - spread s_t = y_t - beta_t x_t, z-score rolling trên PAIR_Z_WINDOW phiên
+  - trạng thái: z < -entry -> long spread, z > entry -> short spread,
+    |z| < exit -> đóng, còn lại giữ nguyên trạng thái trước
+  - P&L: position ngày t-1 nhân return log hai chân, chuẩn hoá theo gross
+    exposure 1 + |beta|, trừ phí theo turnover
+  - backtest_cluster_file chọn cặp trên formation window rồi chỉ trade các
+    ngày sau đó (start), tránh look-ahead
+"""
+
+
+def load_cluster_prices(path):
+    """Đọc cluster csv, trả về log giá Close (Date x ticker)."""
+    df = pd.read_csv(path, parse_dates=["Date"])
+    panel = df.pivot_table(index="Date", columns="ticker", values="Close", aggfunc="last")
+    return np.log(panel.sort_index())
+
+
+def _pair_names(pairs):
+    return [f"{a}-{b}" for a, b in pairs]
+
+
+def _rolling_sum(x, window):
+    return pd.DataFrame(x).rolling(window, min_periods=window).sum().to_numpy()
+
+
+def rolling_hedge_ratio(Y, X, window=PAIR_HEDGE_WINDOW):
+    """
+    OLS rolling y ~ a + b x cho mọi cột cùng lúc bằng tổng trượt.
+    Trả về (alpha, beta), shape (T, P), NaN khi chưa đủ window phiên.
+    """
+    valid = ~(np.isnan(Y) | np.isnan(X))
+    y = np.where(valid, Y, 0.0)
+    x = np.where(valid, X, 0.0)
+
+    n = _rolling_sum(valid.astype(float), window)
+    sx = _rolling_sum(x, window)
+    sy = _rolling_sum(y, window)
+    sxx = _rolling_sum(x * x, window)
+    sxy = _rolling_sum(x * y, window)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var_x = sxx - sx * sx / n
+        beta = (sxy - sx * sy / n) / var_x
+        alpha = (sy - beta * sx) / n
+    bad = (n < max(2, window // 2)) | ~(var_x > 0)
+    beta[bad] = np.nan
+    alpha[bad] = np.nan
+    return alpha, beta
+
+
+def hedge_ratio_matrix(Y, X, hedge="ols", hedge_window=PAIR_HEDGE_WINDOW):
+    """Ma trận beta (T, P): hedge="ols" (rolling) hoặc "kalman" (prior, không nhìn trước)."""
+    if hedge == "ols":
+        return rolling_hedge_ratio(Y, X, window=hedge_window)[1]
+    if hedge == "kalman":
+        return kalman_hedge_ratios(Y, X)["beta"]
+    raise ValueError(f"Unknown hedge method: {hedge}")
+
+
+def _ffill_state(events):
+    """Giữ event gần nhất (NaN = không có event) theo từng cột, đầu chuỗi = 0."""
+    has = ~np.isnan(events)
+    idx = np.where(has, np.arange(events.shape[0])[:, None], -1)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    state = np.take_along_axis(np.nan_to_num(events), np.maximum(idx, 0), axis=0)
+    state[idx < 0] = 0.0
+    return state
+
+
+def pair_positions(z, entry_z=PAIR_ENTRY_Z, exit_z=PAIR_EXIT_Z):
+    """Position trên spread (+1 long, -1 short, 0) từ ma trận z-score."""
+    events = np.full(z.shape, np.nan)
+    with np.errstate(invalid="ignore"):
+        events[np.abs(z) < exit_z] = 0.0
+        events[z < -entry_z] = 1.0
+        events[z > entry_z] = -1.0
+    return _ffill_state(events)
+
+
+def _summary_stats(ret, pos):
+    """Thống kê theo cột cho ma trận return ngày (T, P)."""
+    n = ret.shape[0]
+    mean = ret.mean(axis=0)
+    vol = ret.std(axis=0, ddof=1) if n > 1 else np.zeros(ret.shape[1])
+    equity = np.exp(np.cumsum(ret, axis=0))
+    peak = np.maximum.accumulate(equity, axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sharpe = np.where(vol > 0, mean / vol * np.sqrt(252.0), 0.0)
+    n_trades = (np.abs(np.diff(pos, axis=0)) > 0).sum(axis=0)
+    return {
+        "total_return": equity[-1] - 1.0 if n else np.zeros(ret.shape[1]),
+        "ann_return": mean * 252.0,
+        "ann_vol": vol * np.sqrt(252.0),
+        "sharpe": sharpe,
+        "max_drawdown": (equity / peak - 1.0).min(axis=0) if n else np.zeros(ret.shape[1]),
+        "n_trades": n_trades,
+        "time_in_market": (pos != 0).mean(axis=0),
+    }
+
+
+def backtest_pairs(
+    log_prices,
+    pairs,
+    hedge_ratio=None,
+    hedge="ols",
+    hedge_window=PAIR_HEDGE_WINDOW,
+    z_window=PAIR_Z_WINDOW,
+    entry_z=PAIR_ENTRY_Z,
+    exit_z=PAIR_EXIT_Z,
+    cost_bps=PAIR_COST_BPS,
+    start=None,
+):
+    """
+    Backtest mọi cặp trong pairs [(ticker1, ticker2), ...] trên log_prices (Date x ticker).
+    hedge_ratio: ma trận beta (T, P) tự chọn; nếu None thì tính theo hedge:
+      "ols" = OLS rolling hedge_window phiên, "kalman" = kalman_hedge_ratios.
+    start: ngày bắt đầu trade. Các ngày trước đó chỉ dùng để khởi động hedge
+      ratio / z-score (đều chỉ nhìn quá khứ); trạng thái vị thế bắt đầu flat
+      từ start và kết quả chỉ gồm các ngày từ start.
+    Trả về dict các DataFrame (Date x cặp): hedge_ratio, spread, zscore,
+    position, returns, equity; cùng summary (mỗi cặp một dòng) và
+    aggregate (danh mục chia đều cho các cặp).
+    """
+    names = _pair_names(pairs)
+    cols = {c: i for i, c in enumerate(log_prices.columns)}
+    P = log_prices.to_numpy(dtype=float)
+    Y = P[:, [cols[a] for a, _ in pairs]]
+    X = P[:, [cols[b] for _, b in pairs]]
+
+    if hedge_ratio is None:
+        beta = hedge_ratio_matrix(Y, X, hedge=hedge, hedge_window=hedge_window)
+    else:
+        beta = np.asarray(hedge_ratio, dtype=float)
+
+    spread = Y - beta * X
+    roll = pd.DataFrame(spread).rolling(z_window, min_periods=z_window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = (spread - roll.mean().to_numpy()) / roll.std().to_numpy()
+
+    r0 = 0
+    if start is not None:
+        r0 = int(np.searchsorted(log_prices.index, pd.Timestamp(start), side="left"))
+
+    # state machine chạy từ r0: bắt đầu flat, chỉ vào lệnh khi có tín hiệu
+    # mới trong trading window (không mang vị thế mở từ trước start)
+    pos = np.zeros_like(z)
+    pos[r0:] = pair_positions(z[r0:], entry_z=entry_z, exit_z=exit_z)
+
+    # trọng số hai chân, gross exposure = 1; không có beta thì đứng ngoài
+    beta_f = np.nan_to_num(beta)
+    pos[np.isnan(beta)] = 0.0
+    gross = 1.0 + np.abs(beta_f)
+    w_y = pos / gross
+    w_x = -pos * beta_f / gross
+
+    r_y = np.nan_to_num(np.diff(Y, axis=0, prepend=np.nan))
+    r_x = np.nan_to_num(np.diff(X, axis=0, prepend=np.nan))
+
+    ret = np.zeros_like(Y)
+    ret[1:] = w_y[:-1] * r_y[1:] + w_x[:-1] * r_x[1:]
+
+    turnover = np.abs(np.diff(w_y, axis=0, prepend=0.0)) + np.abs(np.diff(w_x, axis=0, prepend=0.0))
+    ret -= turnover * cost_bps / 10_000.0
+
+    # chỉ giữ trading window
+    beta, spread, z, pos, ret = (a[r0:] for a in (beta, spread, z, pos, ret))
+    idx = log_prices.index[r0:]
+    frame = lambda a: pd.DataFrame(a, index=idx, columns=names)
+
+    stats = _summary_stats(ret, pos)
+    summary = pd.DataFrame(stats, index=pd.Index(names, name="pair"))
+    summary.insert(0, "ticker2", [b for _, b in pairs])
+    summary.insert(0, "ticker1", [a for a, _ in pairs])
+
+    port = ret.mean(axis=1, keepdims=True) if ret.shape[1] else np.zeros((ret.shape[0], 1))
+    port_pos = (pos != 0).mean(axis=1, keepdims=True) if pos.shape[1] else port
+    agg = _summary_stats(port, port_pos)
+    aggregate = {k: float(np.asarray(v).ravel()[0]) for k, v in agg.items()}
+    aggregate["n_trades"] = int(stats["n_trades"].sum())
+    aggregate["n_pairs"] = len(pairs)
+
+    return {
+        "hedge_ratio": frame(beta),
+        "spread": frame(spread),
+        "zscore": frame(z),
+        "position": frame(pos),
+        "returns": frame(ret),
+        "equity": frame(np.exp(np.cumsum(ret, axis=0))),
+        "summary": summary,
+        "aggregate": aggregate,
+    }
+
+
+def backtest_pairs_grid(
+    log_prices,
+    pairs,
+    z_windows=(20, 60),
+    entry_grid=(1.5, 2.0, 2.5),
+    exit_grid=(0.0, 0.5),
+    hedge_ratio=None,
+    hedge="ols",
+    hedge_window=PAIR_HEDGE_WINDOW,
+    cost_bps=PAIR_COST_BPS,
+    start=None,
+):
+    """
+    Chạy backtest_pairs trên lưới (z_window, entry_z, exit_z), start như backtest_pairs.
+    Hedge ratio chỉ tính một lần cho cả lưới. Trả về bảng summary gộp
+    (thêm cột z_window, entry_z, exit_z).
+    """
+    if hedge_ratio is None:
+        Y = log_prices[[a for a, _ in pairs]].to_numpy(dtype=float)
+        X = log_prices[[b for _, b in pairs]].to_numpy(dtype=float)
+        hedge_ratio = hedge_ratio_matrix(Y, X, hedge=hedge, hedge_window=hedge_window)
+
+    rows = []
+    for z_window, entry_z, exit_z in product(z_windows, entry_grid, exit_grid):
+        if exit_z >= entry_z:
+            continue
+        res = backtest_pairs(
+            log_prices, pairs,
+            hedge_ratio=hedge_ratio,
+            z_window=z_window,
+            entry_z=entry_z,
+            exit_z=exit_z,
+            cost_bps=cost_bps,
+            start=start,
+        )
+        summ = res["summary"].reset_index()
+        summ["z_window"] = z_window
+        summ["entry_z"] = entry_z
+        summ["exit_z"] = exit_z
+        rows.append(summ)
+
+    return pd.concat(rows, ignore_index=True) if rows else pd.DataFrame()
+
+
+def backtest_cluster_file(path, only_cointegrated=True, trading_years=PAIR_TRADING_YEARS, **kwargs):
+    """
+    Backtest ngoài mẫu một file cluster csv:
+      - trading window: trading_years năm cuối file
+      - formation window: COINT_LOOKBACK_YEARS năm kết thúc trước trading window,
+        only_cointegrated=True chỉ giữ các cặp có pvalue < COINT_ALPHA trên
+        window này (find_cointegrated_pairs), ngược lại mọi cặp trong file
+      - backtest_pairs(start=đầu trading window): P&L chỉ tính trên trading window
+    """
+    log_prices = load_cluster_prices(path)
+    tickers = list(log_prices.columns)
+    if log_prices.empty:
+        return None
+    trade_start = log_prices.index.max() - pd.Timedelta(days=365 * trading_years)
+
+    if only_cointegrated:
+        df_cluster = pd.read_csv(path, parse_dates=["Date"])
+        df_formation = df_cluster[df_cluster["Date"] < trade_start]
+        if df_formation.empty:
+            return None
+        _, good_pairs = find_cointegrated_pairs(
+            df_formation,
+            tickers,
+            lookback_years=COINT_LOOKBACK_YEARS,
+            min_obs=COINT_MIN_OBS,
+            alpha=COINT_ALPHA,
+        )
+        pairs = [(a, b) for a, b, _ in good_pairs]
+    else:
+        pairs = list(combinations(tickers, 2))
+
+    if not pairs:
+        return None
+    return backtest_pairs(log_prices, pairs, start=trade_start, **kwargs)
+
+
+def run_cluster_backtests(cluster_dir=OUTPUT_DIR, only_cointegrated=True, **kwargs):
+    """
+    Backtest mọi cluster_*.csv trong cluster_dir.
+    Trả về (summary các cặp, aggregate theo cluster).
+    """
+    summaries = []
+    aggregates = []
+    for path in sorted(glob.glob(os.path.join(cluster_dir, "cluster_*.csv"))):
+        name = os.path.basename(path)[len("cluster_"):-len(".csv")]
+        res = backtest_cluster_file(path, only_cointegrated=only_cointegrated, **kwargs)
+        if res is None:
+            print(f"[warn] no pairs in {name}")
+            continue
+
+        summ = res["summary"].reset_index()
+        summ.insert(0, "cluster", name)
+        summaries.append(summ)
+        aggregates.append({"cluster": name, **res["aggregate"]})
+        print(
+            f"  {name}: {res['aggregate']['n_pairs']} pairs, "
+            f"sharpe={res['aggregate']['sharpe']:.2f}, "
+            f"total_return={res['aggregate']['total_return']:.2%}"
+        )
+
+    df_summary = pd.concat(summaries, ignore_index=True) if summaries else pd.DataFrame()
+    df_aggregate = pd.DataFrame(aggregates)
+    return df_summary, df_aggregate
+
+
+if __name__ == "__main__":
+    df_summary, df_aggregate = run_cluster_backtests()
+    print(df_aggregate)
@@ -8,21 +8,28 @@ from config import (
     SECTOR_FILE,
     OUTPUT_DIR,
     MIN_GROUP_SIZE,
+    GROUPING,
+    USE_FUNDAMENTAL_FILTER,
 )
 from data_loader import list_tickers, compute_spy_returns
 from sector_industry import get_sector_industry
+from corr_clustering import get_correlation_groups
 from volatility import compute_all_vols
-from beta import compute_all_betas
+from beta import compute_all_betas_panel
 from group_pipeline import process_group
+from fundamentals import load_fundamental_table, fundamental_filter
 
 """
 Full pair trading cluster pipeline trên toàn universe:
 
 1) Lấy danh sách ticker từ folder per_symbol (price volume).
 2) Lấy sectorKey, industryKey bằng yahooquery (hoặc đọc từ sector_industry.csv nếu đã có).
+   grouping="correlation": thay bằng hierarchical clustering theo correlation
+   distance của return (sectorKey = "corr", industryKey = "clusterXXXX").
 3) Tính volatility 1 năm cho toàn bộ universe, chia decile.
 4) Tính beta với SPY cho toàn bộ universe.
 5) Với từng cặp (sectorKey, industryKey) có >= MIN_GROUP_SIZE:
+   - (USE_FUNDAMENTAL_FILTER) Lọc theo market cap, leverage, ROA gần median group (SimFin).
    - Lọc theo volatility decile (mid vol).
    - Lọc theo beta gần nhau (median ± BETA_TOL).
    - Tính return 3 năm, average dollar volume và chọn dv band.
@@ -35,13 +42,19 @@ Output: một folder OUTPUT_DIR chứa các file:
 """
 
 
-def run_full_pipeline():
+def run_full_pipeline(grouping=GROUPING, use_fundamental_filter=USE_FUNDAMENTAL_FILTER):
     # 1. Universe tickers
     tickers = list_tickers(DATA_DIR)
     print("Total tickers from per_symbol:", len(tickers))
 
     # 2. Sector industry
-    df_sector = get_sector_industry(tickers, sector_file=SECTOR_FILE)
+    if grouping == "sector":
+        df_sector = get_sector_industry(tickers, sector_file=SECTOR_FILE)
+    elif grouping == "correlation":
+        print("Clustering universe by correlation distance...")
+        df_sector = get_correlation_groups(tickers)
+    else:
+        raise ValueError(f"Unknown grouping: {grouping}")
 
     # 3. Volatility 1y
     print("Computing 1y volatility...")
@@ -50,7 +63,7 @@ def run_full_pipeline():
     # 4. Beta vs SPY
     print("Computing beta vs SPY...")
     spy_ret = compute_spy_returns(SPY_PATH)
-    df_beta = compute_all_betas(tickers, spy_ret)
+    df_beta = compute_all_betas_panel(tickers, spy_ret)
 
     # 5. Universe merged
     universe = (
@@ -60,6 +73,10 @@ def run_full_pipeline():
 
     print("Universe after merge:", universe.shape)
 
+    if use_fundamental_filter:
+        df_fund = load_fundamental_table(universe["ticker"].unique())
+        universe = universe.merge(df_fund, on="ticker", how="left")
+
     # 6. Group by sectorKey, industryKey
     grouped = universe.groupby(["sectorKey", "industryKey"])
 
@@ -72,6 +89,12 @@ def run_full_pipeline():
             f"n={df_group.shape[0]}"
         )
 
+        if use_fundamental_filter:
+            df_group = fundamental_filter(df_group)
+            print(f"  after fundamental filter: n={df_group.shape[0]}")
+            if df_group.shape[0] < MIN_GROUP_SIZE:
+                continue
+
         df_cluster_coint = process_group(sector, industry, df_group)
 
         if df_cluster_coint is None or df_cluster_coint.empty:
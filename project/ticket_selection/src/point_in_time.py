@@ -0,0 +1,172 @@
+# pair_cluster/point_in_time.py
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    DATA_DIR,
+    SPY_PATH,
+    OUTPUT_DIR,
+    VOL_MIN_OBS,
+    VOL_LOOKBACK_DAYS,
+    BETA_MIN_OBS,
+    PIT_REBALANCE,
+)
+from data_loader import list_tickers, load_spy
+from returns_volume import build_log_price_panel
+
+"""
+Universe point-in-time: vol 1y, beta SPY và vol decile tại từng ngày rebalance,
+chỉ dùng dữ liệu đến ngày đó (compute_all_vols / compute_all_betas dùng
+VOL_LOOKBACK_DAYS phiên cuối nên decile chứa thông tin tương lai so với
+đầu bất kỳ backtest nào).
+
+Tổng trượt (số quan sát, sum, sum bình phương, sum tích chéo) lấy từ cumsum
+trên cả panel: tổng của cửa sổ [t - w + 1, t] = C[t + 1] - C[t + 1 - w],
+nên chi phí O(T x N) thay vì O(T x N x window), và chỉ giữ lại các hàng
+ngày rebalance.
+
+Output: bảng dài Date, ticker, vol_1y, vol_decile, beta_spy, n_obs;
+backtest join theo Date (hoặc universe_asof cho một ngày bất kỳ).
+"""
+
+
+def rebalance_positions(index, rebalance=PIT_REBALANCE):
+    """
+    Vị trí hàng trong index (DatetimeIndex đã sort) của các ngày rebalance.
+    rebalance: offset alias ("ME", "W-FRI", "QE", ...) -> ngày giao dịch cuối
+    của mỗi kỳ; hoặc list ngày -> ngày giao dịch gần nhất <= mỗi ngày.
+    """
+    if isinstance(rebalance, str):
+        last = pd.Series(np.arange(len(index)), index=index).resample(rebalance).last()
+        return np.unique(last.dropna().to_numpy(dtype=np.int64))
+    pos = index.searchsorted(pd.DatetimeIndex(rebalance), side="right") - 1
+    return np.unique(pos[pos >= 0])
+
+
+def _window_sums(x, rows, window):
+    """Tổng cửa sổ trượt theo cột của x (T, N) (NaN = 0) tại các hàng rows."""
+    C = np.zeros((x.shape[0] + 1,) + x.shape[1:])
+    np.cumsum(np.nan_to_num(x), axis=0, out=C[1:])
+    return C[rows + 1] - C[np.maximum(rows + 1 - window, 0)]
+
+
+def rolling_vol_beta(returns, market, rows, window=VOL_LOOKBACK_DAYS):
+    """
+    Vol (std daily, ddof=1) và beta với market trên cửa sổ window phiên kết thúc
+    tại mỗi hàng trong rows, cho mọi cột của returns (T, N) cùng lúc.
+    Beta dùng các ngày cả mã và market đều có return.
+    Trả về dict mảng (len(rows), N): vol, n_vol, beta, n_beta.
+    """
+    R = np.asarray(returns, dtype=float)
+    m = np.asarray(market, dtype=float)[:, None]
+    ok = ~np.isnan(R)
+    joint = ok & ~np.isnan(m)
+
+    n = _window_sums(ok.astype(float), rows, window)
+    s1 = _window_sums(R, rows, window)
+    s2 = _window_sums(R * R, rows, window)
+
+    nb = _window_sums(joint.astype(float), rows, window)
+    Rj = np.where(joint, R, 0.0)
+    Mj = np.where(joint, m, 0.0)
+    sy = _window_sums(Rj, rows, window)
+    sx = _window_sums(Mj, rows, window)
+    sxx = _window_sums(Mj * Mj, rows, window)
+    sxy = _window_sums(Mj * Rj, rows, window)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var = np.maximum(s2 - s1 * s1 / n, 0.0) / (n - 1)
+        var_m = sxx - sx * sx / nb
+        beta = (sxy - sx * sy / nb) / var_m
+    beta[~(var_m > 1e-14)] = np.nan
+
+    return {"vol": np.sqrt(var), "n_vol": n, "beta": beta, "n_beta": nb}
+
+
+def _deciles(vol_row):
+    out = np.full(vol_row.shape, np.nan)
+    ok = np.isfinite(vol_row) & (vol_row > 0)
+    if ok.sum() >= 10:
+        out[ok] = pd.qcut(vol_row[ok], 10, labels=False) + 1
+    return out
+
+
+def point_in_time_universe(
+    log_prices,
+    spy_ret,
+    rebalance=PIT_REBALANCE,
+    window=VOL_LOOKBACK_DAYS,
+    vol_min_obs=VOL_MIN_OBS,
+    beta_min_obs=BETA_MIN_OBS,
+):
+    """
+    log_prices: log giá Close (Date x ticker), spy_ret: DataFrame Date, r_m.
+    Tại mỗi ngày rebalance: vol_1y (annualized), vol_decile (pd.qcut 10 nhóm
+    trên các mã đủ vol_min_obs return, như compute_all_vols), beta_spy
+    (NaN nếu ít hơn beta_min_obs ngày chung).
+    Trả về DataFrame Date, ticker, vol_1y, vol_decile, beta_spy, n_obs.
+    """
+    log_prices = log_prices.sort_index()
+    rets = log_prices.astype(float).diff()
+    market = spy_ret.set_index("Date")["r_m"].reindex(rets.index)
+
+    rows = rebalance_positions(rets.index, rebalance)
+    res = rolling_vol_beta(rets.to_numpy(), market.to_numpy(), rows, window=window)
+
+    vol = res["vol"] * np.sqrt(252.0)
+    vol[res["n_vol"] < vol_min_obs] = np.nan
+    beta = res["beta"]
+    beta[res["n_beta"] < beta_min_obs] = np.nan
+    deciles = np.vstack([_deciles(v) for v in vol]) if len(rows) else vol
+
+    n_rows, n_cols = vol.shape
+    out = pd.DataFrame(
+        {
+            "Date": np.repeat(rets.index[rows], n_cols),
+            "ticker": np.tile(np.asarray(rets.columns), n_rows),
+            "vol_1y": vol.ravel(),
+            "vol_decile": deciles.ravel(),
+            "beta_spy": beta.ravel(),
+            "n_obs": res["n_vol"].ravel().astype(np.int64),
+        }
+    )
+    out = out.dropna(subset=["vol_1y"])
+    out["vol_decile"] = out["vol_decile"].astype("Int64")
+    return out.reset_index(drop=True)
+
+
+def universe_asof(pit, date):
+    """Bảng universe của ngày rebalance gần nhất <= date (dùng khi backtest)."""
+    dates = pit["Date"].drop_duplicates().sort_values()
+    dates = dates[dates <= pd.Timestamp(date)]
+    if dates.empty:
+        return pit.iloc[:0]
+    return pit[pit["Date"] == dates.iloc[-1]].reset_index(drop=True)
+
+
+def build_point_in_time_universe(tickers=None, spy_path=SPY_PATH, rebalance=PIT_REBALANCE):
+    """Load toàn bộ lịch sử giá + SPY rồi gọi point_in_time_universe."""
+    if tickers is None:
+        tickers = list_tickers(DATA_DIR)
+
+    df_spy = load_spy(spy_path)
+    if df_spy is None or df_spy.empty:
+        raise RuntimeError("Không load được SPY")
+    spy_ret = df_spy.assign(r_m=np.log(df_spy["Close"]).diff())[["Date", "r_m"]].dropna()
+
+    panel = build_log_price_panel(
+        tickers, min_obs=0, start=spy_ret["Date"].min(), dtype=np.float64
+    )
+    if panel is None:
+        return pd.DataFrame()
+    return point_in_time_universe(panel, spy_ret, rebalance=rebalance)
+
+
+if __name__ == "__main__":
+    pit = build_point_in_time_universe()
+    out_path = os.path.join(OUTPUT_DIR, "universe_pit.csv")
+    pit.to_csv(out_path, index=False)
+    print(f"Saved {len(pit)} rows ({pit['Date'].nunique()} rebalance dates) to {out_path}")
@@ -5,7 +5,7 @@ from functools import reduce
 import numpy as np
 import pandas as pd
 
-from config import RET_LOOKBACK_YEARS
+from config import RET_LOOKBACK_YEARS, RET_MIN_OBS
 from data_loader import load_ohlcv
 
 """
@@ -64,3 +64,33 @@ def compute_avg_dollar_volume(price_data, range_start, range_end):
         rows.append({"ticker": tk, "avg_dollar_vol": avg_dv})
     df_dv = pd.DataFrame(rows).dropna(subset=["avg_dollar_vol"])
     return df_dv
+
+
+def build_log_price_panel(tickers, lookback_years=RET_LOOKBACK_YEARS, min_obs=RET_MIN_OBS,
+                          start=None, end=None, dtype=np.float32):
+    """
+    Log giá Close (Date x ticker, mặc định float32) của nhiều mã trên lookback_years
+    năm gần nhất, giữ NaN ở ngày mã không giao dịch (không inner join như
+    build_common_return_matrix, nên một mã mới niêm yết không cắt cả universe).
+    start / end: khoảng ngày cố định, thay cho lookback_years.
+    Bỏ mã có ít hơn min_obs ngày có giá.
+    """
+    closes = {}
+    for tk in tickers:
+        df = load_ohlcv(tk)
+        if df is None:
+            continue
+        s = df.drop_duplicates("Date", keep="last").set_index("Date")["Close"]
+        closes[tk] = s[s > 0]
+
+    if not closes:
+        return None
+
+    panel = pd.DataFrame(closes).sort_index()
+    if start is None:
+        start = panel.index.max() - pd.Timedelta(days=365 * lookback_years)
+    panel = panel[panel.index >= start]
+    if end is not None:
+        panel = panel[panel.index <= end]
+    panel = panel.loc[:, panel.notna().sum() >= min_obs]
+    return np.log(panel).astype(dtype)
@@ -0,0 +1,5 @@
+# shared/__init__.py
+#
+# Module dùng chung giữa labs/week123, labs/week5 và project/ticket_selection.
+# Mỗi thư mục đó chạy độc lập với import phẳng, nên tự đưa thư mục gốc repo
+# vào sys.path rồi import `from shared.<module> import ...`.
@@ -0,0 +1,100 @@
+# shared/compact_schema.py
+
+"""
+Schema gọn cho bảng giá OHLCV (loader của labs/week123, labs/week5 và
+project/ticket_selection):
+  - giá: float32 nếu mọi giá trị đổi qua float32 lệch không quá price_tick
+    (tuyệt đối), ngược lại float64. float32 giữ khoảng 7 chữ số có nghĩa nên
+    giá dưới vài trăm nghìn luôn qua, chỉ giá rất lớn mới giữ float64.
+  - Volume: uint32 / uint64 (UInt32 / UInt64 nếu có NaN), float64 nếu âm hoặc lẻ
+  - Symbol, Security Name, ticker: category
+  - ngày: normalize về 00:00, đơn vị giây (pandas không có datetime64[D])
+"""
+
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+
+PRICE_COLS = ["Open", "High", "Low", "Close", "Adj Close"]
+VOLUME_COLS = ["Volume"]
+CATEGORY_COLS = ["Symbol", "Security Name", "ticker"]
+
+# sai lệch tuyệt đối tối đa khi lưu giá bằng float32 (nhỏ hơn một tick giá)
+PRICE_TICK = 1e-4
+
+
+def volume_dtype(values: pd.Series) -> str:
+    """dtype nhỏ nhất chứa được cột volume."""
+    x = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+    finite = x[~np.isnan(x)]
+    if finite.size and ((finite < 0).any() or (finite != np.floor(finite)).any()):
+        return "float64"
+    big = finite.size > 0 and finite.max() >= 2 ** 32
+    if finite.size < x.size:
+        # uint numpy không chứa được NaN, dùng kiểu nullable
+        return "UInt64" if big else "UInt32"
+    return "uint64" if big else "uint32"
+
+
+def price_dtype(values: pd.Series, price_tick: float = PRICE_TICK) -> str:
+    """float32 nếu đổi qua float32 lệch không quá price_tick, ngược lại float64."""
+    x = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+    ok = np.allclose(x.astype(np.float32), x, rtol=0.0, atol=price_tick, equal_nan=True)
+    return "float32" if ok else "float64"
+
+
+def infer_compact_schema(df: pd.DataFrame, price_tick: float = PRICE_TICK) -> Dict[str, str]:
+    """
+    Chọn dtype gọn cho từng cột có trong df (xem đầu module).
+    Trả về dict {cột: dtype} để xem, sửa rồi truyền cho apply_schema
+    (vd dùng một schema chung cho nhiều file).
+    """
+    schema: Dict[str, str] = {}
+    for col in PRICE_COLS:
+        if col in df.columns:
+            schema[col] = price_dtype(df[col], price_tick=price_tick)
+    for col in VOLUME_COLS:
+        if col in df.columns:
+            schema[col] = volume_dtype(df[col])
+    for col in CATEGORY_COLS:
+        if col in df.columns:
+            schema[col] = "category"
+    return schema
+
+
+def day_resolution(dates):
+    """
+    Normalize DatetimeIndex / Series datetime về ngày, lưu đơn vị giây.
+    pandas < 2 chỉ có datetime64[ns] (không có as_unit) thì giữ ns.
+    """
+    if isinstance(dates, pd.Series):
+        dates = dates.dt.normalize()
+        return dates.dt.as_unit("s") if hasattr(dates.dt, "as_unit") else dates
+    dates = dates.normalize()
+    return dates.as_unit("s") if hasattr(dates, "as_unit") else dates
+
+
+def apply_schema(df: pd.DataFrame, schema: Dict[str, str]) -> pd.DataFrame:
+    """
+    Ép các cột theo schema (cột số được to_numeric trước) và đưa ngày (index
+    Date hoặc cột Date) về độ phân giải ngày.
+    """
+    df = df.copy()
+    for col, dtype in schema.items():
+        if col not in df.columns:
+            continue
+        if dtype != "category":
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+        df[col] = df[col].astype(dtype)
+    if isinstance(df.index, pd.DatetimeIndex):
+        df.index = day_resolution(df.index)
+    if "Date" in df.columns and pd.api.types.is_datetime64_any_dtype(df["Date"]):
+        df["Date"] = day_resolution(df["Date"])
+    return df
+
+
+def to_compact(df: pd.DataFrame, price_tick: float = PRICE_TICK) -> pd.DataFrame:
+    """apply_schema(df, infer_compact_schema(df, price_tick))."""
+    return apply_schema(df, infer_compact_schema(df, price_tick=price_tick))
@@ -0,0 +1,349 @@
+# shared/stationarity.py
+
+"""
+ADF và Engle-Granger cointegration chạy theo lô.
+
+Cùng kết quả với statsmodels adfuller(autolag="aic") và coint, nhưng:
+  - mọi chuỗi cùng độ dài được xếp thành một khối (B, T), design matrix
+    các lag được dựng một lần bằng slicing
+  - chọn lag theo AIC bằng một phép QR trên design đầy đủ: các model lag
+    nhỏ hơn là tiền tố cột, ssr của chúng đọc trực tiếp từ Q^T y
+  - hồi quy lại với lag đã chọn bằng least squares theo lô
+  - p-value và critical value tra bảng MacKinnon (statsmodels.tsa.adfvalues)
+  - kết quả được cache theo hash của chuỗi và tham số
+
+Dùng chung cho labs/week5 (adf) và project/ticket_selection (coint_pairs).
+"""
+
+import hashlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# số phần tử float tối đa của một khối design (B, n, k), giới hạn bộ nhớ
+_BLOCK_ELEMS = 20_000_000
+
+_STAT_CACHE: Dict[str, Dict[str, object]] = {}
+
+
+def clear_stationarity_cache():
+    _STAT_CACHE.clear()
+
+
+def _cache_key(kind, arrays, *params):
+    h = hashlib.sha1(kind.encode())
+    for a in arrays:
+        h.update(np.ascontiguousarray(a, dtype=float).tobytes())
+    h.update(repr(params).encode())
+    return h.hexdigest()
+
+
+def _default_maxlag(nobs, regression):
+    ntrend = len(regression) if regression != "n" else 0
+    maxlag = int(np.ceil(12.0 * np.power(nobs / 100.0, 1 / 4.0)))
+    maxlag = min(nobs // 2 - ntrend - 1, maxlag)
+    if maxlag < 0:
+        raise ValueError("sample size is too short to use selected regression component")
+    return maxlag
+
+
+def _design(X, lag, regression):
+    """
+    Design ADF cho khối X (B, T) với lag cố định, cột theo thứ tự
+    [trend..., level, dx_{t-1}, ..., dx_{t-lag}] như adfuller.
+    Trả về (Z (B, n, k), y (B, n), ntrend).
+    """
+    B, T = X.shape
+    dx = np.diff(X, axis=1)
+    n = T - 1 - lag
+    cols = []
+    if regression in ("c", "ct"):
+        cols.append(np.ones((B, n)))
+    if regression == "ct":
+        cols.append(np.broadcast_to(np.arange(1.0, n + 1), (B, n)))
+    ntrend = len(cols)
+    cols.append(X[:, lag:T - 1])
+    for j in range(1, lag + 1):
+        cols.append(dx[:, lag - j:T - 1 - j])
+    return np.stack(cols, axis=2), dx[:, lag:], ntrend
+
+
+def _select_lag_aic(X, maxlag, regression):
+    """
+    Lag có AIC nhỏ nhất cho từng chuỗi, trên cùng mẫu n = T - 1 - maxlag.
+    Model lag L dùng tiền tố ntrend + 1 + L cột của design đầy đủ, nên
+    ssr_L = ssr_full + sum_{j >= ntrend + 1 + L} (Q^T y)_j^2.
+    """
+    Z, y, ntrend = _design(X, maxlag, regression)
+    n = y.shape[1]
+    Q, _ = np.linalg.qr(Z)
+    qty = np.einsum("bnk,bn->bk", Q, y)
+    resid = y - np.einsum("bnk,bk->bn", Q, qty)
+    ssr_full = np.einsum("bn,bn->b", resid, resid)
+
+    # tail[:, p] = sum_{j >= p} qty_j^2
+    tail = np.cumsum((qty ** 2)[:, ::-1], axis=1)[:, ::-1]
+    tail = np.concatenate([tail, np.zeros((tail.shape[0], 1))], axis=1)
+
+    lags = np.arange(maxlag + 1)
+    k = ntrend + 1 + lags
+    ssr = ssr_full[:, None] + tail[:, k]
+    with np.errstate(divide="ignore"):
+        aic = n * np.log(ssr / n) + 2.0 * k
+    # argmin lấy lag nhỏ nhất khi bằng nhau, như min((aic, lag)) của statsmodels
+    return np.argmin(aic, axis=1)
+
+
+def _adf_tstat(X, lag, regression):
+    """t-stat của hệ số level trong hồi quy ADF với lag cố định."""
+    Z, y, ntrend = _design(X, lag, regression)
+    n, k = Z.shape[1], Z.shape[2]
+    Q, R = np.linalg.qr(Z)
+    qty = np.einsum("bnk,bn->bk", Q, y)
+    beta = np.linalg.solve(R, qty[..., None])[..., 0]
+    resid = y - np.einsum("bnk,bk->bn", Z, beta)
+    sigma2 = np.einsum("bn,bn->b", resid, resid) / (n - k)
+    Rinv = np.linalg.inv(R)
+    var_level = sigma2 * np.sum(Rinv[:, ntrend, :] ** 2, axis=1)
+    return beta[:, ntrend] / np.sqrt(var_level), n
+
+
+def _adf_block(X, regression, maxlag, autolag):
+    """ADF cho khối X (B, T) cùng độ dài. Trả về (stat, usedlag, nobs)."""
+    B, T = X.shape
+    if maxlag is None:
+        maxlag = _default_maxlag(T, regression)
+
+    if autolag:
+        best = _select_lag_aic(X, maxlag, regression)
+    else:
+        best = np.full(B, maxlag)
+
+    stat = np.full(B, np.nan)
+    nobs = np.zeros(B, dtype=int)
+    for lag in np.unique(best):
+        idx = np.flatnonzero(best == lag)
+        stat[idx], nobs[idx] = _adf_tstat(X[idx], int(lag), regression)
+    return stat, best, nobs
+
+
+def _blocks(B, T, k):
+    size = max(1, _BLOCK_ELEMS // max(1, T * k))
+    for start in range(0, B, size):
+        yield slice(start, min(start + size, B))
+
+
+def _group_by_length(columns):
+    """Gom các chuỗi (đã bỏ NaN) theo độ dài: {T: [vị trí]}."""
+    groups = {}
+    for i, v in enumerate(columns):
+        groups.setdefault(len(v), []).append(i)
+    return groups
+
+
+def _as_series_list(data):
+    if isinstance(data, pd.DataFrame):
+        names = list(data.columns)
+        series = [data[c].dropna().to_numpy(dtype=float) for c in names]
+    elif isinstance(data, dict):
+        names = list(data)
+        series = [pd.Series(data[k]).dropna().to_numpy(dtype=float) for k in names]
+    else:
+        names = list(range(len(data)))
+        series = [pd.Series(v).dropna().to_numpy(dtype=float) for v in data]
+    return names, series
+
+
+def _adf_results(series, regression, maxlag, autolag):
+    from statsmodels.tsa.adfvalues import mackinnoncrit, mackinnonp
+
+    if autolag not in ("aic", None):
+        raise ValueError("Only autolag='aic' or None is supported")
+
+    out: List[Optional[Dict[str, object]]] = [None] * len(series)
+    keys = [_cache_key("adf", [v], regression, maxlag, autolag) for v in series]
+
+    todo = []
+    for i, v in enumerate(series):
+        if keys[i] in _STAT_CACHE:
+            out[i] = _STAT_CACHE[keys[i]]
+        elif v.size < 3 or v.max() == v.min():
+            out[i] = {"stat": np.nan, "pvalue": np.nan, "usedlag": 0, "nobs": int(v.size),
+                      "crit_1%": np.nan, "crit_5%": np.nan, "crit_10%": np.nan}
+        else:
+            todo.append(i)
+
+    for T, members in _group_by_length([series[i] for i in todo]).items():
+        members = [todo[m] for m in members]
+        X = np.vstack([series[i] for i in members])
+        ml = maxlag if maxlag is not None else _default_maxlag(T, regression)
+        for blk in _blocks(len(members), T, ml + 3):
+            stat, usedlag, nobs = _adf_block(X[blk], regression, ml, autolag)
+            for j, i in enumerate(members[blk]):
+                crit = mackinnoncrit(N=1, regression=regression, nobs=int(nobs[j]))
+                res = {
+                    "stat": float(stat[j]),
+                    "pvalue": float(mackinnonp(stat[j], regression=regression, N=1)),
+                    "usedlag": int(usedlag[j]),
+                    "nobs": int(nobs[j]),
+                    "crit_1%": float(crit[0]),
+                    "crit_5%": float(crit[1]),
+                    "crit_10%": float(crit[2]),
+                }
+                _STAT_CACHE[keys[i]] = res
+                out[i] = res
+    return out
+
+
+def adf_batch(
+    data,
+    regression: str = "c",
+    maxlag: Optional[int] = None,
+    autolag: Optional[str] = "aic",
+) -> pd.DataFrame:
+    """
+    ADF cho nhiều chuỗi một lúc.
+    data: DataFrame (mỗi cột một chuỗi, NaN bị bỏ riêng từng cột) hoặc
+    dict/list các chuỗi. Chỉ hỗ trợ autolag "aic" hoặc None.
+    Trả về DataFrame index theo tên chuỗi, cột stat, pvalue, usedlag, nobs,
+    crit_1%, crit_5%, crit_10%.
+    """
+    names, series = _as_series_list(data)
+    out = _adf_results(series, regression, maxlag, autolag)
+    return pd.DataFrame(out, index=pd.Index(names, name="series"))
+
+
+def adf(series, regression="c", maxlag=None, autolag="aic") -> Dict[str, object]:
+    """ADF cho một chuỗi, cùng kết quả (và cache) với adf_batch."""
+    _, values = _as_series_list([series])
+    return dict(_adf_results(values, regression, maxlag, autolag)[0])
+
+
+def _coint_block(Y0, Y1, trend, maxlag, autolag):
+    """Engle-Granger cho khối cặp (B, T): OLS y0 ~ y1 (+ trend), rồi ADF residual."""
+    B, T = Y0.shape
+    cols = [Y1]
+    if trend in ("c", "ct"):
+        cols.append(np.ones((B, T)))
+    if trend == "ct":
+        cols.append(np.broadcast_to(np.arange(1.0, T + 1), (B, T)))
+    Z = np.stack(cols, axis=2)
+    Q, R = np.linalg.qr(Z)
+    coef = np.linalg.solve(R, np.einsum("btk,bt->bk", Q, Y0)[..., None])[..., 0]
+    resid = Y0 - np.einsum("btk,bk->bt", Z, coef)
+
+    ssr = np.einsum("bt,bt->b", resid, resid)
+    if trend == "n":
+        tss = np.einsum("bt,bt->b", Y0, Y0)
+    else:
+        d = Y0 - Y0.mean(axis=1, keepdims=True)
+        tss = np.einsum("bt,bt->b", d, d)
+    rsquared = 1.0 - ssr / tss
+
+    stat = np.full(B, -np.inf)
+    ok = rsquared < 1 - 100 * np.sqrt(np.finfo(float).eps)
+    if ok.any():
+        stat[ok], _, _ = _adf_block(resid[ok], "n", maxlag, autolag)
+    return stat, coef[:, 0]
+
+
+def coint_batch(
+    y0,
+    y1,
+    trend: str = "c",
+    maxlag: Optional[int] = None,
+    autolag: Optional[str] = "aic",
+) -> pd.DataFrame:
+    """
+    Engle-Granger cho nhiều cặp cùng độ dài: y0, y1 là mảng (B, T), hàng i
+    là một cặp. Cùng kết quả với statsmodels coint(y0[i], y1[i]).
+    Trả về DataFrame cột stat, pvalue, hedge_ratio, nobs, crit_1%, crit_5%, crit_10%.
+    """
+    from statsmodels.tsa.adfvalues import mackinnoncrit, mackinnonp
+
+    Y0 = np.atleast_2d(np.asarray(y0, dtype=float))
+    Y1 = np.atleast_2d(np.asarray(y1, dtype=float))
+    B, T = Y0.shape
+
+    keys = [_cache_key("coint", [Y0[i], Y1[i]], trend, maxlag, autolag) for i in range(B)]
+    out: List[Optional[Dict[str, object]]] = [_STAT_CACHE.get(k) for k in keys]
+    todo = np.array([i for i in range(B) if out[i] is None], dtype=int)
+
+    if todo.size:
+        crit = [np.nan] * 3 if trend == "n" else mackinnoncrit(N=2, regression=trend, nobs=T - 1)
+        ml = maxlag if maxlag is not None else _default_maxlag(T, "n")
+        for blk in _blocks(todo.size, T, ml + 3):
+            idx = todo[blk]
+            stat, hedge = _coint_block(Y0[idx], Y1[idx], trend, ml, autolag)
+            for j, i in enumerate(idx):
+                res = {
+                    "stat": float(stat[j]),
+                    "pvalue": float(mackinnonp(stat[j], regression=trend, N=2)),
+                    "hedge_ratio": float(hedge[j]),
+                    "nobs": int(T),
+                    "crit_1%": float(crit[0]),
+                    "crit_5%": float(crit[1]),
+                    "crit_10%": float(crit[2]),
+                }
+                _STAT_CACHE[keys[i]] = res
+                out[i] = res
+
+    return pd.DataFrame(out)
+
+
+def coint_pairs(
+    panel: pd.DataFrame,
+    pairs: Sequence[Tuple[str, str]],
+    min_obs: int = 0,
+    trend: str = "c",
+) -> pd.DataFrame:
+    """
+    Cointegration cho nhiều cặp cột của panel (Date x ticker, thường là
+    log giá). Mỗi cặp dùng các ngày cả hai cùng có giá hữu hạn; các cặp có
+    cùng số ngày chung được test chung một lô. Cặp có ít hơn min_obs ngày bị bỏ.
+    Lỗi được cô lập theo lô: lô lỗi thì test lại từng cặp, chỉ bỏ cặp lỗi.
+    Trả về DataFrame ticker1, ticker2, stat, pvalue, hedge_ratio, nobs, crit_*.
+    """
+    values = panel.to_numpy(dtype=float)
+    valid = np.isfinite(values)
+    pos = {c: i for i, c in enumerate(panel.columns)}
+
+    groups: Dict[int, List[Tuple[int, str, str, np.ndarray]]] = {}
+    for k, (t1, t2) in enumerate(pairs):
+        i, j = pos[t1], pos[t2]
+        mask = valid[:, i] & valid[:, j]
+        n = int(mask.sum())
+        if n < max(min_obs, 4):
+            continue
+        if np.ptp(values[mask, i]) == 0 or np.ptp(values[mask, j]) == 0:
+            print(f"[warn] coint skipped {t1}-{t2}: constant series")
+            continue
+        groups.setdefault(n, []).append((k, t1, t2, mask))
+
+    def run(members):
+        Y0 = np.vstack([values[m, pos[a]] for _, a, _, m in members])
+        Y1 = np.vstack([values[m, pos[b]] for _, _, b, m in members])
+        res = coint_batch(Y0, Y1, trend=trend)
+        res.insert(0, "ticker2", [b for _, _, b, _ in members])
+        res.insert(0, "ticker1", [a for _, a, _, _ in members])
+        res.index = [k for k, _, _, _ in members]
+        return res
+
+    frames = []
+    for n, members in groups.items():
+        try:
+            frames.append(run(members))
+        except Exception:
+            # một cặp lỗi không làm mất cả lô: test lại từng cặp
+            for member in members:
+                try:
+                    frames.append(run([member]))
+                except Exception as e:
+                    print(f"[warn] coint error {member[1]}-{member[2]}: {e}")
+
+    if not frames:
+        return pd.DataFrame()
+    # giữ thứ tự của pairs
+    return pd.concat(frames).sort_index().reset_index(drop=True)